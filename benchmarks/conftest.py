@@ -0,0 +1,88 @@
+"""
+Shared fixtures for the benchmark suite (pytest-benchmark).
+
+Catalog sizes come from ``BENCH_SIZES`` (default ``100,1000,10000``; add ``100000``
+for the full run). End-to-end benchmarks run against a local mock simulator whose
+latency is ``BENCH_MOCK_LATENCY_MS`` and are limited to catalogs of at most
+``BENCH_E2E_MAX`` suppliers.
+"""
+import json
+import os
+import random
+import threading
+import pytest
+from werkzeug.serving import make_server
+from src.api.mock_server import create_mock_app
+from src.api.recordings import Recordings
+
+SIZES = [int(n) for n in os.environ.get("BENCH_SIZES", "100,1000,10000").split(",") if n.strip()]
+E2E_MAX = int(os.environ.get("BENCH_E2E_MAX", "1000"))
+MOCK_LATENCY_MS = float(os.environ.get("BENCH_MOCK_LATENCY_MS", "20"))
+
+_COUNTRIES = ["Chine", "Turquie", "Inde", "Italie", "Portugal", "France", "Bangladesh",
+              "Région - Europe de l'Ouest", "Région - Asie", "Pays inconnu (par défaut)"]
+_MATERIALS = ["ei-coton", "ei-coton-organic", "ei-lin", "ei-laine-par-defaut", "ei-viscose", "ei-pet", "ei-pet-r", "ei-pa"]
+_PRODUCTS = ["chemise", "pull", "jupe", "robe", "veste"]
+_CERTIFICATIONS = ["GOTS", "GRS", "OCS", "OEKO-TEX", "EU Ecolabel"]
+_REGION_CODES = ["RNA", "RAS", "REO", "CN", "TR", "IN"]
+
+def synthetic_catalog(n: int, seed: int = 0):
+    """``n`` supplier rows shaped like data/examples/suppliers_min.yaml (deterministic)."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        blend = rng.random() < 0.3
+        first = rng.choice(_MATERIALS)
+        materials = [{"id": first, "share": 1.0 if not blend else 0.7, "spinning": "ConventionalSpinning",
+                      "country": rng.choice(_REGION_CODES)}]
+        if blend:
+            materials.append({"id": rng.choice(_MATERIALS), "share": 0.3, "spinning": "SyntheticSpinning",
+                              "country": rng.choice(_REGION_CODES)})
+        rows.append({
+            "supplier": f"Supplier {i % 500}",
+            "fabricName": f"Fabric {i}",
+            "product": rng.choice(_PRODUCTS),
+            "price_eur_per_m": round(rng.uniform(5, 40), 2),
+            "lead_time_weeks": float(rng.randint(2, 16)),
+            "fabric_lead_time_weeks": float(rng.randint(2, 12)),
+            "moq_m": float(rng.choice([50, 100, 240, 500, 1000])),
+            "material_origin": materials,
+            "countrySpinning": rng.choice(_COUNTRIES),
+            "countryFabric": rng.choice(_COUNTRIES),
+            "countryDyeing": rng.choice(_COUNTRIES),
+            "countryMaking": rng.choice(_COUNTRIES),
+            "fabricProcess": "weaving",
+            "dyeingProcess": "average",
+            "makingComplexity": rng.choice(["low", "medium", "high", "very-high"]),
+            "businessSize": "small-business",
+            "numberOfReferences": rng.choice([100, 1000, 3000]),
+            "price": float(rng.randint(50, 400)),
+            "weight_gm2": float(rng.randint(80, 300)),
+            "gross_width": float(rng.choice([140, 150, 160])),
+            "certifications": rng.sample(_CERTIFICATIONS, rng.randint(0, 2)),
+        })
+    return rows
+
+_catalogs = {}
+
+@pytest.fixture(params=SIZES, ids=lambda n: f"n={n}")
+def catalog(request):
+    """Synthetic catalog for each configured size (built once per session)."""
+    n = request.param
+    if n not in _catalogs:
+        _catalogs[n] = synthetic_catalog(n)
+    return _catalogs[n]
+
+@pytest.fixture(scope="session")
+def countries_data():
+    with open(os.path.join(Recordings().path, "countries.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.fixture(scope="session")
+def mock_api_url():
+    """Base URL of a mock simulator answering after ``BENCH_MOCK_LATENCY_MS``."""
+    server = make_server("127.0.0.1", 0, create_mock_app(latency_ms=MOCK_LATENCY_MS, seed=0), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/versions/v7.0.0/api"
+    server.shutdown()
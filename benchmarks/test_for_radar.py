@@ -0,0 +1,61 @@
+"""End-to-end radar endpoints against the local mock simulator."""
+import itertools
+import time
+import pytest
+from conftest import E2E_MAX
+from src.jobs.queue import JobQueue
+from src.scoring.context import get_scoring_context
+from src.storage.repository import payload_inputs_hash
+from src.storage.sqlite_repository import SQLiteSupplierRepository
+
+@pytest.fixture
+def ui(tmp_path, monkeypatch, mock_api_url):
+    monkeypatch.setenv("ECOBALYSE_API_URL", mock_api_url)
+    monkeypatch.setenv("ECOBALYSE_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    from src.interface import supplier_entry_ui
+    # A queue without worker threads: the benchmarks measure the request path only
+    monkeypatch.setattr(supplier_entry_ui, "_job_queue", JobQueue(str(tmp_path / "jobs.sqlite")))
+    monkeypatch.setattr(supplier_entry_ui, "_repository", None)
+    return supplier_entry_ui
+
+def _store(ui, path, rows):
+    repo = SQLiteSupplierRepository(path)
+    repo.add_many(rows)
+    ui._repository = repo
+    return repo
+
+def test_for_radar_stored_scores(benchmark, ui, catalog, tmp_path):
+    """All scores materialized: the cost of reading, converting and serializing the catalog."""
+    repo = _store(ui, str(tmp_path / "warm.sqlite"), catalog)
+    version = get_scoring_context(ui.CONFIG_ROOT).payload_version
+    repo.save_scores((row["id"], payload_inputs_hash(row), 100.0, version) for row in repo.list())
+    client = ui.app.test_client()
+    resp = benchmark(client.get, "/api/suppliers/for-radar")
+    assert resp.status_code == 200 and len(resp.get_json()) == len(catalog)
+
+def test_for_radar_stream_cold(benchmark, ui, catalog, tmp_path, monkeypatch):
+    """Nothing scored or cached: every supplier goes to the mock simulator."""
+    if len(catalog) > E2E_MAX:
+        pytest.skip(f"catalog larger than BENCH_E2E_MAX={E2E_MAX}")
+    client = ui.app.test_client()
+    rounds = itertools.count()
+    first_record = []
+
+    def setup():
+        n = next(rounds)
+        _store(ui, str(tmp_path / f"cold{n}.sqlite"), catalog)
+        monkeypatch.setenv("ECOBALYSE_CACHE_PATH", str(tmp_path / f"cache{n}.sqlite"))
+
+    def run():
+        started = time.perf_counter()
+        resp = client.get("/api/suppliers/for-radar/stream", buffered=False)
+        lines = 0
+        for chunk in resp.response:
+            if lines == 0:
+                first_record.append(time.perf_counter() - started)
+            lines += chunk.count(b"\n") if isinstance(chunk, bytes) else chunk.count("\n")
+        return lines
+
+    lines = benchmark.pedantic(run, setup=setup, rounds=3)
+    benchmark.extra_info["first_record_seconds"] = min(first_record)
+    assert lines == len(catalog)
@@ -0,0 +1,48 @@
+"""Per-record hot paths: form normalization, row conversion, payload building, country lookup."""
+import numpy as np
+import pytest
+from src.interface.supplier_entry_ui import normalize_supplier
+from src.models.supplier import SupplierColumns, supplier_from_row
+from src.scoring.ecobalyse_score import _build_payload
+from src.scoring.payload_template import compile_payload_templates
+from src.scoring.pareto import criteria_matrix, dominance_layers
+from src.utils.country_lookup import get_country_code, set_country_cache
+from src.utils.yaml_loader import load_yaml
+from src.api.recordings import Recordings
+
+COUNTRY_FIELDS = ("countrySpinning", "countryFabric", "countryDyeing", "countryMaking")
+
+def test_normalize_supplier(benchmark, catalog):
+    benchmark(lambda: [normalize_supplier(row) for row in catalog])
+
+def test_supplier_from_row(benchmark, catalog):
+    benchmark(lambda: [supplier_from_row(row) for row in catalog])
+
+def test_build_payload(benchmark, catalog, countries_data):
+    assumptions = load_yaml("config/bourrienne.yaml") or {}
+    trims_data = Recordings().reference("trims")
+    set_country_cache(countries_data)
+    suppliers = [supplier_from_row(row) for row in catalog]
+    templates = compile_payload_templates(assumptions, trims_data)
+    benchmark(lambda: [_build_payload(s, assumptions, countries_data, trims_data, templates=templates)
+                       for s in suppliers])
+
+def test_get_country_code(benchmark, catalog, countries_data):
+    set_country_cache(countries_data)
+    names = [row[field] for row in catalog for field in COUNTRY_FIELDS]
+    names += [m["country"] for row in catalog for m in row["material_origin"]]
+    benchmark(lambda: [get_country_code(name, countries_data) for name in names])
+
+def test_supplier_columns(benchmark, catalog):
+    benchmark(lambda: SupplierColumns.from_records(catalog))
+
+def test_pareto_layers(benchmark, catalog):
+    # One garment type of the catalog, without scores (every ecobalyse value ties)
+    group = [row for row in catalog if row["product"] == "chemise"]
+    benchmark(lambda: dominance_layers(criteria_matrix(group)))
+
+@pytest.mark.parametrize("max_layers", [None, 3], ids=["all", "layers=3"])
+def test_pareto_layers_independent(benchmark, catalog, max_layers):
+    # Worst case for the layer search: axes drawn independently, so few rows tie or dominate
+    matrix = np.random.default_rng(0).random((len(catalog), 6))
+    benchmark(lambda: dominance_layers(matrix, max_layers))
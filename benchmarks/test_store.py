@@ -0,0 +1,12 @@
+"""Supplier store import/export in the suppliers_min.yaml format."""
+from src.storage.repository import dump_suppliers_yaml, load_suppliers_yaml
+
+def test_dump_yaml(benchmark, catalog, tmp_path):
+    path = str(tmp_path / "suppliers.yaml")
+    benchmark(dump_suppliers_yaml, catalog, path)
+
+def test_load_yaml(benchmark, catalog, tmp_path):
+    path = str(tmp_path / "suppliers.yaml")
+    dump_suppliers_yaml(catalog, path)
+    rows = benchmark(load_suppliers_yaml, path)
+    assert len(rows) == len(catalog)
@@ -1,35 +1,299 @@
 """
 Thin Ecobalyse API client.
-NOTE: This is a skeleton. Replace the placeholders to actually call the API.
+
+Every client shares one pooled keep-alive session and, per base URL, one circuit
+breaker. Calls are retried with jittered exponential backoff on 429/5xx and
+connection errors (honouring Retry-After); tunables come from the ``http`` and
+``circuit_breaker`` sections of ecobalyse.yaml via ``configure_http``.
+
+Identical simulator calls in flight at the same time, in this process or (with
+``single_flight.path``) in other workers, share one upstream call; see
+``single_flight``.
+
+Every attempt also passes the shared rate limiter (``rate_limit``), which
+serves interactive calls before background ones.
+
+With ``recording.mode: record`` live responses are saved as fixtures; with
+``replay`` they are served from the fixtures and the network is never used.
 """
+import contextlib
+import json
 import os
+import threading
+import time
 import requests
-from typing import Optional, Dict
+from requests.adapters import HTTPAdapter
+from typing import Optional, Dict, Any
+from .resilience import RetryPolicy, CircuitBreaker, CircuitOpenError
+from .recordings import Recordings, RECORDING_MODES
+from .score_cache import payload_fingerprint
+from .rate_limit import RateLimiter, RateLimitTimeout, rate_limiter_from_config
+from .single_flight import SingleFlight, single_flight_stats, DEFAULT_LEASE_SECONDS, DEFAULT_POLL_INTERVAL_SECONDS
+from ..utils.metrics import Counter, Histogram, GaugeCallback, stage
+
+DEFAULT_POOL_MAXSIZE = 16
+DEFAULT_SIMULATOR_PATH = "/textile/simulator"
+# Parts of a simulator response worth keeping (``query`` echoes the payload back)
+SIMULATION_KEYS = ("impacts", "complementsImpacts", "durability", "lifeCycle")
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_pool_maxsize = DEFAULT_POOL_MAXSIZE
+_retry_policy = RetryPolicy()
+_breaker_settings: Dict[str, Any] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+CLIENT_EVENTS = Counter("ecobalyse_client_events_total", "Ecobalyse API attempts, retries and failed calls.", ["event"])
+UPSTREAM_SECONDS = Histogram("ecobalyse_upstream_request_seconds", "Latency of single Ecobalyse API attempts.", ["endpoint"])
+UPSTREAM_RESPONSES = Counter("ecobalyse_upstream_responses_total", "Ecobalyse API attempts by HTTP status or error type.",
+                             ["endpoint", "status"])
+_recording_mode = "off"
+_recordings: Optional[Recordings] = None
+_single_flight: Optional[SingleFlight] = SingleFlight()
+_rate_limiter: Optional[RateLimiter] = None
+
+def _mount(session: requests.Session, pool_maxsize: int):
+    # Retries are handled by EcobalyseClient so they can feed the circuit breaker
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_maxsize), max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+def configure_http(ecoconfig: Dict[str, Any]):
+    """Apply the ``http`` / ``circuit_breaker`` sections of ecobalyse.yaml process-wide."""
+    global _retry_policy, _breaker_settings, _pool_maxsize
+    http_cfg = ecoconfig.get("http", {}) or {}
+    with _lock:
+        _retry_policy = RetryPolicy.from_config(http_cfg)
+        _breaker_settings = dict(ecoconfig.get("circuit_breaker", {}) or {})
+        for breaker in _breakers.values():
+            breaker.configure(_breaker_settings.get("failure_threshold"), _breaker_settings.get("reset_timeout_seconds"))
+        pool_maxsize = int(http_cfg.get("pool_maxsize", DEFAULT_POOL_MAXSIZE))
+        if pool_maxsize != _pool_maxsize:
+            _pool_maxsize = pool_maxsize
+            if _session is not None:
+                _mount(_session, pool_maxsize)
+
+def configure_recording(ecoconfig: Dict[str, Any], project_root: str):
+    """Apply the ``recording`` section of ecobalyse.yaml (env ECOBALYSE_RECORDING / ECOBALYSE_RECORDINGS_PATH win)."""
+    global _recording_mode, _recordings
+    cfg = ecoconfig.get("recording", {}) or {}
+    mode = str(os.environ.get("ECOBALYSE_RECORDING") or cfg.get("mode") or "off").lower()
+    if mode not in RECORDING_MODES:
+        raise ValueError(f"Unknown Ecobalyse recording mode: {mode}")
+    path = os.environ.get("ECOBALYSE_RECORDINGS_PATH") or cfg.get("path") or os.path.join("data", "fixtures", "ecobalyse")
+    if not os.path.isabs(path):
+        path = os.path.join(project_root, path)
+    with _lock:
+        _recording_mode = mode
+        if _recordings is None or _recordings.path != path:
+            _recordings = Recordings(path)
+
+def configure_single_flight(ecoconfig: Dict[str, Any], project_root: str):
+    """Apply the ``single_flight`` section of ecobalyse.yaml (in-process only unless ``path`` is set)."""
+    global _single_flight
+    cfg = ecoconfig.get("single_flight", {}) or {}
+    if not cfg.get("enabled", True):
+        with _lock:
+            _single_flight = None
+        return
+    path = cfg.get("path")
+    if path and not os.path.isabs(path):
+        path = os.path.join(project_root, path)
+    lease_seconds = float(cfg.get("lease_seconds", DEFAULT_LEASE_SECONDS))
+    poll_interval = float(cfg.get("poll_interval_seconds", DEFAULT_POLL_INTERVAL_SECONDS))
+    with _lock:
+        current = _single_flight
+        if current is None or (current.path, current.lease_seconds, current.poll_interval_seconds) != (path, lease_seconds, poll_interval):
+            _single_flight = SingleFlight(path, lease_seconds=lease_seconds, poll_interval_seconds=poll_interval)
+
+def configure_rate_limit(ecoconfig: Dict[str, Any], project_root: str):
+    """Apply the ``rate_limit`` section of ecobalyse.yaml (no limit when it is absent)."""
+    global _rate_limiter
+    limiter = rate_limiter_from_config(ecoconfig, project_root)
+    with _lock:
+        if limiter is None or _rate_limiter is None or limiter.settings() != _rate_limiter.settings():
+            _rate_limiter = limiter
+
+def shared_session() -> requests.Session:
+    """Process-wide pooled session (keep-alive connections are reused across calls)."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            _mount(_session, _pool_maxsize)
+        return _session
+
+def breaker_for(base_url: str) -> CircuitBreaker:
+    key = (base_url or "").rstrip("/")
+    with _lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(**_breaker_settings)
+            _breakers[key] = breaker
+        return breaker
+
+def http_metrics() -> Dict[str, Any]:
+    """Request/retry/failure counters and the state of every circuit breaker."""
+    counters = {name: int(CLIENT_EVENTS.value(event=name)) for name in ("requests", "retries", "failures")}
+    with _lock:
+        breakers = dict(_breakers)
+    counters["breakers"] = {url: breaker.snapshot() for url, breaker in breakers.items()}
+    counters["single_flight"] = single_flight_stats()
+    limiter = _rate_limiter
+    counters["rate_limit"] = limiter.stats() if limiter is not None else None
+    return counters
+
+def _breaker_states():
+    with _lock:
+        breakers = dict(_breakers)
+    for url, breaker in breakers.items():
+        current = breaker.state
+        for state in (CircuitBreaker.CLOSED, CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN):
+            yield {"base_url": url, "state": state}, 1.0 if state == current else 0.0
+
+GaugeCallback("ecobalyse_circuit_state", "Circuit breaker state per base URL (1 for the current state).",
+              ["base_url", "state"], _breaker_states)
+
+def _count(name: str):
+    CLIENT_EVENTS.inc(event=name)
+
+def _replayed_response(data: Any) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.headers["Content-Type"] = "application/json"
+    resp._content = json.dumps(data).encode("utf-8")
+    return resp
 
 class EcobalyseClient:
-    def __init__(self, base_url: str, timeout_seconds: int = 20, api_key_env: str = None):
+    def __init__(self, base_url: str, timeout_seconds: int = 20, api_key_env: str = None, session: requests.Session = None,
+                 retry: RetryPolicy = None, breaker: CircuitBreaker = None, single_flight: SingleFlight = None,
+                 rate_limiter: RateLimiter = None, simulator_path: str = None):
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout_seconds
         self.api_key = os.getenv(api_key_env) if api_key_env else None
-        self.session = requests.Session()
+        self.session = session or shared_session()
+        self.retry = retry or _retry_policy
+        self.breaker = breaker or breaker_for(self.base_url)
+        self.single_flight = single_flight or _single_flight  # None: coalescing disabled
+        self.rate_limiter = rate_limiter or _rate_limiter  # None: unlimited
+        # ``/textile/simulator/detailed`` adds the per-step lifeCycle breakdown
+        self.simulator_path = simulator_path or DEFAULT_SIMULATOR_PATH
+        # Per-request headers: the session is shared with clients using other credentials
+        self.headers = {"Content-Type": "application/json"}
         if self.api_key:
-            self.session.headers.update({"Authorization": f"Bearer {self.api_key}"})
-        self.session.headers.update({"Content-Type": "application/json"})
+            self.headers["Authorization"] = f"Bearer {self.api_key}"
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Send a request through the circuit breaker, retrying transient failures.
+
+        Raises CircuitOpenError without calling the API while the breaker is open, and
+        the last requests exception (HTTPError for a bad status) once retries run out.
+        In replay mode the recorded response is returned (RecordingMissError if none).
+        """
+        mode, recordings = _recording_mode, _recordings
+        if mode == "replay":
+            return _replayed_response(recordings.lookup(path, kwargs.get("json")))
+        resp = self._send(method, path, **kwargs)
+        if mode == "record":
+            recordings.record(path, kwargs.get("json"), resp.json())
+        return resp
+
+    def _send(self, method: str, path: str, **kwargs) -> requests.Response:
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Ecobalyse API unavailable (circuit open): {self.base_url}")
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            _count("requests")
+            retry_after = None
+            with self._rate_limited(attempt):
+                started = time.perf_counter()
+                try:
+                    with stage("simulator" if "/simulator" in path else "reference_fetch"):
+                        resp = self.session.request(method, url, headers=self.headers, timeout=self.timeout, **kwargs)
+                except requests.ConnectionError as e:
+                    self._observe(path, started, type(e).__name__)
+                    error = e
+                except Exception as e:
+                    # Read timeouts are not retried: the request already used its whole budget
+                    self._observe(path, started, type(e).__name__)
+                    self._failed()
+                    raise
+                else:
+                    self._observe(path, started, resp.status_code)
+                    if resp.status_code not in self.retry.retry_statuses:
+                        # Success or a client error: the upstream itself is healthy
+                        self.breaker.record_success()
+                        resp.raise_for_status()
+                        return resp
+                    error = requests.HTTPError(f"{resp.status_code} Server Error for url: {url}", response=resp)
+                    retry_after = resp.headers.get("Retry-After")
+            delay = self.retry.delay(attempt, retry_after)
+            if delay is None:
+                self._failed()
+                raise error
+            _count("retries")
+            time.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def _observe(path: str, started: float, status):
+        endpoint = path.rstrip("/").rsplit("/", 1)[-1]
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+        UPSTREAM_RESPONSES.inc(endpoint=endpoint, status=status)
+
+    @contextlib.contextmanager
+    def _rate_limited(self, attempt: int):
+        # The slot is held for the attempt only, not during retry backoff
+        if self.rate_limiter is None:
+            yield
+            return
+        with contextlib.ExitStack() as slot:
+            try:
+                slot.enter_context(self.rate_limiter.acquire())
+            except RateLimitTimeout:
+                if attempt == 0:
+                    # The upstream was never reached: a half-open trial must not stay taken
+                    self.breaker.release_trial()
+                else:
+                    self._failed()  # gave up retrying a failed call
+                raise
+            yield
+
+    def _failed(self):
+        _count("failures")
+        self.breaker.record_failure()
 
     def get_score(self, payload: Dict) -> Optional[float]:
         """Call Ecobalyse score endpoint with a prepared payload.
         Returns the ECS impact as the score (float) or None on failure.
         """
+        return self.score_from(self.simulate(payload))
+
+    def simulate(self, payload: Dict) -> Optional[Dict[str, Any]]:
+        """The kept parts of the simulator response (``SIMULATION_KEYS``), or None on failure.
+
+        Concurrent calls with the same payload share one request.
+        """
+        if self.single_flight is None:
+            return self._fetch_simulation(payload)
+        key = payload_fingerprint(payload, self.base_url + self.simulator_path)
+        return self.single_flight.do(key, lambda: self._fetch_simulation(payload))
+
+    @classmethod
+    def score_from(cls, simulation: Optional[Dict[str, Any]]) -> Optional[float]:
+        raw_score = ((simulation or {}).get("impacts") or {}).get("ecs")
+        return cls._normalize_score(raw_score) if raw_score is not None else None
+
+    def _fetch_simulation(self, payload: Dict) -> Optional[Dict[str, Any]]:
         try:
-            url = f"{self.base_url}/textile/simulator"
             # print("Payload being sent:", payload)
-            resp = self.session.post(url, json=payload, timeout=self.timeout)
-            resp.raise_for_status()
+            resp = self._request("POST", self.simulator_path, json=payload)
             resp_json = resp.json()
             #print("Response schema:", resp_json)
-            raw_score = resp_json.get("impacts", {}).get("ecs")
-            if raw_score is not None:
-                return self._normalize_score(raw_score)
+            if (resp_json.get("impacts") or {}).get("ecs") is not None:
+                return {key: resp_json[key] for key in SIMULATION_KEYS if key in resp_json}
+        except CircuitOpenError as e:
+            print(e)
         except requests.HTTPError as e:
             print(f"HTTP error: {e}")
             if hasattr(e, 'response') and e.response is not None:
@@ -47,48 +311,28 @@ class EcobalyseClient:
         return float(raw_score)
 
     @staticmethod
-    def fetch_products(base_url: str, timeout: int = 20) -> Optional[list]:
+    def _fetch_reference(base_url: str, path: str, timeout: int, label: str) -> Optional[list]:
         try:
-            url = f"{base_url.rstrip('/')}/textile/products"
-            resp = requests.get(url, timeout=timeout)
-            resp.raise_for_status()
-            return resp.json()  # adapt if a nested field; else a list
+            return EcobalyseClient(base_url, timeout_seconds=timeout)._request("GET", path).json()
         except Exception as e:
-            print(f"Error fetching products: {e}")
+            print(f"Error fetching {label}: {e}")
             return None
 
+    @staticmethod
+    def fetch_products(base_url: str, timeout: int = 20) -> Optional[list]:
+        return EcobalyseClient._fetch_reference(base_url, "/textile/products", timeout, "products")
+
     @staticmethod
     def fetch_materials(base_url: str, timeout: int = 20) -> Optional[list]:
-        try:
-            url = f"{base_url.rstrip('/')}/textile/materials"
-            resp = requests.get(url, timeout=timeout)
-            resp.raise_for_status()
-            return resp.json()
-        except Exception as e:
-            print(f"Error fetching materials: {e}")
-            return None
+        return EcobalyseClient._fetch_reference(base_url, "/textile/materials", timeout, "materials")
 
     @staticmethod
     def fetch_countries(base_url: str, timeout: int = 20) -> Optional[list]:
-        try:
-            url = f"{base_url.rstrip('/')}/textile/countries"
-            resp = requests.get(url, timeout=timeout)
-            resp.raise_for_status()
-            return resp.json()
-        except Exception as e:
-            print(f"Error fetching countries: {e}")
-            return None
+        return EcobalyseClient._fetch_reference(base_url, "/textile/countries", timeout, "countries")
 
     @staticmethod
     def fetch_trims(base_url: str, timeout: int = 20) -> Optional[list]:
-        try:
-            url = f"{base_url.rstrip('/')}/textile/trims"
-            resp = requests.get(url, timeout=timeout)
-            resp.raise_for_status()
-            return resp.json()
-        except Exception as e:
-            print(f"Error fetching trims: {e}")
-            return None
+        return EcobalyseClient._fetch_reference(base_url, "/textile/trims", timeout, "trims")
 
     @staticmethod
     def fetch_material_spinning_types(base_url: str, timeout: int = 20) -> Optional[list]:
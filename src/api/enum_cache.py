@@ -0,0 +1,193 @@
+"""
+Ecobalyse reference lists (materials, countries, products, trims) cached on disk.
+
+One SQLite file is shared by every gunicorn worker, so each list is fetched once
+per TTL for the whole deployment instead of once per worker. Lists are served
+stale-while-revalidate: shortly before expiry (and after it) the cached value is
+still returned immediately while a single worker, chosen by a lease on the row,
+refetches it in a background thread. A failed fetch keeps the last good list and
+is retried after ``failure_ttl_seconds``; nothing empty is cached for long.
+
+Rows missing from the file are warmed from a bundled snapshot (the recorded
+fixtures of ``src.api.recordings``) so a cold worker answers without waiting on
+the upstream API.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any, List, Callable
+from .recordings import Recordings, DEFAULT_RECORDINGS_PATH
+from ..utils.metrics import Counter
+
+DEFAULT_ENUM_CACHE_PATH = os.path.join("data", "cache", "enums.sqlite")
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_REFRESH_AHEAD_SECONDS = 10 * 60
+DEFAULT_FAILURE_TTL_SECONDS = 60
+REFRESH_LEASE_SECONDS = 60  # another worker may take over a refresh that has not finished by then
+
+ENUM_CACHE_REQUESTS = Counter("ecobalyse_enum_cache_requests_total", "Reference list lookups by outcome.", ["result"])
+
+class EnumCache:
+    def __init__(self, path: str, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 refresh_ahead_seconds: float = DEFAULT_REFRESH_AHEAD_SECONDS,
+                 failure_ttl_seconds: float = DEFAULT_FAILURE_TTL_SECONDS,
+                 snapshots: Optional[Recordings] = None):
+        self.path = path
+        self.ttl_seconds = float(ttl_seconds)
+        self.refresh_ahead_seconds = float(refresh_ahead_seconds)
+        self.failure_ttl_seconds = float(failure_ttl_seconds)
+        self.snapshots = snapshots
+        self._local = threading.local()
+        self._threads: List[threading.Thread] = []
+        self._threads_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS enums ("
+            " name TEXT NOT NULL,"
+            " base_url TEXT NOT NULL,"
+            " data TEXT,"  # last good list (JSON), NULL if never fetched
+            " fetched_at REAL,"
+            " expires_at REAL NOT NULL,"
+            " failures INTEGER NOT NULL DEFAULT 0,"  # consecutive failed refreshes
+            " refreshing_until REAL NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (name, base_url))"
+        )
+
+    def warm(self, names: List[str], base_url: str) -> int:
+        """Insert bundled snapshots for lists not cached yet (already expired, so refreshed on first use)."""
+        if self.snapshots is None:
+            return 0
+        warmed = 0
+        for name in names:
+            data = self.snapshots.reference(name)
+            if data:
+                warmed += self._connect().execute(
+                    "INSERT OR IGNORE INTO enums(name, base_url, data, fetched_at, expires_at) VALUES (?, ?, ?, NULL, 0)",
+                    (name, base_url, json.dumps(data, ensure_ascii=False)),
+                ).rowcount
+        return warmed
+
+    def get(self, name: str, base_url: str, fetch: Callable[[], Optional[list]]) -> list:
+        """Cached list ``name``; ``fetch`` is only called inline when nothing is cached at all."""
+        row = self._connect().execute(
+            "SELECT data, expires_at FROM enums WHERE name = ? AND base_url = ?", (name, base_url)
+        ).fetchone()
+        if row is None and self.warm([name], base_url):
+            ENUM_CACHE_REQUESTS.inc(result="snapshot")
+            self._refresh_in_background(name, base_url, fetch)
+            return self.snapshots.reference(name)
+        if row is None:
+            ENUM_CACHE_REQUESTS.inc(result="miss")
+            return self._refresh(name, base_url, fetch) or []
+        data, expires_at = row
+        now = time.time()
+        if now < expires_at - self.refresh_ahead_seconds:
+            ENUM_CACHE_REQUESTS.inc(result="fresh")
+        else:
+            ENUM_CACHE_REQUESTS.inc(result="stale")
+            self._refresh_in_background(name, base_url, fetch)
+        return json.loads(data) if data is not None else []
+
+    def _claim(self, name: str, base_url: str) -> bool:
+        """Take the refresh lease on a row; False if another thread or worker holds it."""
+        now = time.time()
+        return self._connect().execute(
+            "UPDATE enums SET refreshing_until = ? WHERE name = ? AND base_url = ? AND refreshing_until < ?",
+            (now + REFRESH_LEASE_SECONDS, name, base_url, now),
+        ).rowcount == 1
+
+    def _refresh_in_background(self, name: str, base_url: str, fetch: Callable[[], Optional[list]]):
+        if not self._claim(name, base_url):
+            return
+        thread = threading.Thread(target=self._refresh, args=(name, base_url, fetch), daemon=True,
+                                  name=f"enum-refresh-{name}")
+        with self._threads_lock:
+            self._threads = [t for t in self._threads if t.is_alive()] + [thread]
+        thread.start()
+
+    def _refresh(self, name: str, base_url: str, fetch: Callable[[], Optional[list]]) -> Optional[list]:
+        try:
+            data = fetch()
+        except Exception as e:
+            print(f"Error refreshing {name}: {e}")
+            data = None
+        now = time.time()
+        conn = self._connect()
+        if data:
+            conn.execute(
+                "INSERT INTO enums(name, base_url, data, fetched_at, expires_at, failures, refreshing_until)"
+                " VALUES (?, ?, ?, ?, ?, 0, 0) ON CONFLICT(name, base_url) DO UPDATE SET"
+                " data = excluded.data, fetched_at = excluded.fetched_at, expires_at = excluded.expires_at,"
+                " failures = 0, refreshing_until = 0",
+                (name, base_url, json.dumps(data, ensure_ascii=False), now, now + self.ttl_seconds),
+            )
+            return data
+        # Keep whatever list we had; it turns stale (and is refetched) after failure_ttl_seconds
+        conn.execute(
+            "INSERT INTO enums(name, base_url, data, fetched_at, expires_at, failures, refreshing_until)"
+            " VALUES (?, ?, NULL, NULL, ?, 1, 0) ON CONFLICT(name, base_url) DO UPDATE SET"
+            " expires_at = excluded.expires_at, failures = failures + 1, refreshing_until = 0",
+            (name, base_url, now + self.failure_ttl_seconds + self.refresh_ahead_seconds),
+        )
+        return None
+
+    def join(self, timeout: float = None):
+        """Wait for background refreshes started by this process (tests, shutdown)."""
+        with self._threads_lock:
+            threads = list(self._threads)
+        for thread in threads:
+            thread.join(timeout)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        rows = self._connect().execute(
+            "SELECT name, base_url, data IS NOT NULL, fetched_at, expires_at, failures FROM enums ORDER BY name"
+        ).fetchall()
+        return [
+            {"name": name, "base_url": base_url, "cached": bool(cached), "fetched_at": fetched_at,
+             "expires_at": expires_at, "failures": failures}
+            for name, base_url, cached, fetched_at, expires_at, failures in rows
+        ]
+
+_caches: Dict[str, EnumCache] = {}
+_caches_lock = threading.Lock()
+
+def enum_cache_from_config(ecoconfig: Dict[str, Any], config_root: str) -> EnumCache:
+    """Process-wide EnumCache described by ``ecobalyse.yaml``'s ``enum_cache`` section.
+
+    Relative paths are resolved against the project root; ``ENUM_CACHE_TTL_SECONDS``
+    overrides the configured TTL.
+    """
+    cfg = (ecoconfig or {}).get("enum_cache", {}) or {}
+    project_root = os.path.dirname(os.path.abspath(config_root))
+    path = cfg.get("path", DEFAULT_ENUM_CACHE_PATH)
+    if not os.path.isabs(path):
+        path = os.path.join(project_root, path)
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            snapshot_path = cfg.get("snapshot_path")
+            if snapshot_path and not os.path.isabs(snapshot_path):
+                snapshot_path = os.path.join(project_root, snapshot_path)
+            cache = EnumCache(
+                path,
+                ttl_seconds=float(os.environ.get("ENUM_CACHE_TTL_SECONDS") or cfg.get("ttl_seconds", DEFAULT_TTL_SECONDS)),
+                refresh_ahead_seconds=cfg.get("refresh_ahead_seconds", DEFAULT_REFRESH_AHEAD_SECONDS),
+                failure_ttl_seconds=cfg.get("failure_ttl_seconds", DEFAULT_FAILURE_TTL_SECONDS),
+                snapshots=Recordings(snapshot_path or DEFAULT_RECORDINGS_PATH),
+            )
+            _caches[path] = cache
+        return cache
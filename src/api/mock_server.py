@@ -0,0 +1,134 @@
+"""
+Local stand-in for the Ecobalyse API, for offline runs and load tests.
+
+Serves ``/textile/simulator`` (and ``/simulator/detailed``), ``/textile/countries``, ``/textile/trims``,
+``/textile/materials`` and ``/textile/products`` from a recordings directory (see
+``src.api.recordings``), under both ``/api`` and ``/versions/<version>/api``.
+Simulator payloads that were never recorded get a deterministic synthetic score
+unless ``--strict`` is given. Latency and errors can be injected:
+
+    python -m src.api.mock_server --port 8001 --latency-ms 300 --jitter-ms 100 --error-rate 0.05
+    ECOBALYSE_API_URL=http://127.0.0.1:8001/versions/v7.0.0/api gunicorn ...
+"""
+from typing import Optional, Dict, Any
+import argparse
+import random
+import threading
+import time
+from flask import Flask, jsonify, request
+from .recordings import Recordings, DEFAULT_RECORDINGS_PATH, REFERENCE_ENDPOINTS, SIMULATOR_ENDPOINT, recording_key
+
+def synthetic_ecs(payload: Dict[str, Any]) -> float:
+    """Deterministic, plausible ECS score: proportional to mass, varied by the payload hash."""
+    mass = float(payload.get("mass") or 0.17)
+    spread = int(recording_key(payload)[:4], 16) / 0xFFFF  # 0..1
+    return round(mass * 1000 * (0.8 + 0.8 * spread), 2)
+
+# Share of the ECS per life-cycle step and per-kg-ish ratios of the other impacts, for synthetic responses
+SYNTHETIC_STEPS = (("Matières", 0.45), ("Filature", 0.1), ("Tissage & Tricotage", 0.15),
+                   ("Ennoblissement", 0.15), ("Confection", 0.05), ("Transport", 0.05), ("Utilisation", 0.05))
+SYNTHETIC_RATIOS = {"cch": 0.012, "wtu": 0.9, "etf": 2.4, "fwe": 0.0004}
+
+def synthetic_simulation(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Synthetic simulator response: ``synthetic_ecs`` plus consistent other impacts and life-cycle steps."""
+    ecs = synthetic_ecs(payload)
+
+    def impacts(total: float) -> Dict[str, float]:
+        return dict({"ecs": round(total, 4)}, **{name: round(total * ratio, 6) for name, ratio in SYNTHETIC_RATIOS.items()})
+
+    return {
+        "impacts": dict(impacts(ecs), ecs=ecs),
+        "complementsImpacts": {"microfibers": round(-0.02 * ecs, 4), "outOfEuropeEOL": round(-0.01 * ecs, 4)},
+        "lifeCycle": [{"label": label, "impacts": impacts(ecs * share)} for label, share in SYNTHETIC_STEPS],
+    }
+
+def create_mock_app(recordings: Recordings = None, latency_ms: float = 0, jitter_ms: float = 0,
+                    error_rate: float = 0.0, error_status: int = 503, retry_after: Optional[float] = None,
+                    strict: bool = False, seed: int = None) -> Flask:
+    recordings = recordings or Recordings()
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    stats = {"requests": 0, "errors": 0, "recorded": 0, "synthetic": 0}
+    app = Flask(__name__)
+
+    def _inject():
+        """Sleep for the configured latency; returns an error response to send, if any."""
+        with rng_lock:
+            stats["requests"] += 1
+            delay = max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000.0
+            fail = rng.random() < error_rate
+        time.sleep(delay)
+        if not fail:
+            return None
+        with rng_lock:
+            stats["errors"] += 1
+        resp = jsonify({"error": "injected failure"})
+        resp.status_code = error_status
+        if retry_after is not None:
+            resp.headers["Retry-After"] = f"{retry_after:g}"
+        return resp
+
+    def _textile(endpoint: str):
+        error = _inject()
+        if error is not None:
+            return error
+        if endpoint in REFERENCE_ENDPOINTS:
+            data = recordings.reference(endpoint)
+            if data is None:
+                return jsonify({"error": f"no recorded {endpoint}"}), 404
+            return jsonify(data)
+        if endpoint != SIMULATOR_ENDPOINT or request.method != "POST":
+            return jsonify({"error": "not found"}), 404
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({"error": "invalid JSON payload"}), 400
+        recorded = recordings.simulator_response(payload)
+        with rng_lock:
+            stats["recorded" if recorded is not None else "synthetic"] += 1
+        if recorded is not None:
+            return jsonify(recorded)
+        if strict:
+            return jsonify({"error": "payload not recorded"}), 404
+        return jsonify(dict(synthetic_simulation(payload), mock="synthetic"))
+
+    @app.route("/api/textile/<endpoint>", methods=["GET", "POST"])
+    def textile(endpoint):
+        return _textile(endpoint)
+
+    @app.route("/versions/<version>/api/textile/<endpoint>", methods=["GET", "POST"])
+    def versioned_textile(version, endpoint):
+        return _textile(endpoint)
+
+    @app.route("/api/textile/simulator/detailed", methods=["POST"])
+    @app.route("/versions/<version>/api/textile/simulator/detailed", methods=["POST"])
+    def detailed_simulator(version=None):
+        return _textile(SIMULATOR_ENDPOINT)
+
+    @app.route("/__mock/stats")
+    def mock_stats():
+        with rng_lock:
+            return jsonify(dict(stats))
+
+    return app
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.api.mock_server", description="Local Ecobalyse API stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--fixtures", default=DEFAULT_RECORDINGS_PATH, help="recordings directory")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After header sent with injected errors")
+    parser.add_argument("--strict", action="store_true", help="404 for unrecorded simulator payloads")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    app = create_mock_app(Recordings(args.fixtures), args.latency_ms, args.jitter_ms, args.error_rate,
+                          args.error_status, args.retry_after, args.strict, args.seed)
+    print(f"Mock Ecobalyse API on http://{args.host}:{args.port}/versions/v7.0.0/api (fixtures: {args.fixtures})")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Token-bucket rate limiting of Ecobalyse API calls, shared by all gunicorn workers.
+
+Every HTTP attempt takes one token from a bucket refilled at
+``requests_per_second`` up to ``burst``, plus one of ``max_concurrency``
+in-flight slots held until the response arrives. With a ``path`` the bucket,
+the slots and the waiting callers live in one row of a SQLite file, updated
+under ``BEGIN IMMEDIATE``, so the limits hold for the whole deployment rather
+than per worker. Without one they are per process.
+
+Calls belong to a lane. ``interactive`` (the default) is for dashboard requests;
+job workers and bulk rescoring run under ``with priority("background"):``. A
+background call only gets a token or slot while no interactive call is waiting
+for one. Slots and waiter entries expire, so a crashed worker cannot hold
+capacity for long.
+
+Time spent waiting goes to ``ecobalyse_rate_limit_wait_seconds`` and to the
+request's ``rate_limit_wait`` stage (X-Debug-Timing).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional, Dict, Any, Callable
+from ..utils.metrics import Counter, Histogram, stage
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BACKGROUND)
+DEFAULT_REQUESTS_PER_SECOND = 5.0
+DEFAULT_BURST = 10
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_WAIT_SECONDS = 30.0
+SLOT_LEASE_SECONDS = 300  # longer than any single attempt (timeout_seconds)
+WAITER_TTL_SECONDS = 2.0  # waiters re-register on every poll
+POLL_INTERVAL_SECONDS = 0.05
+
+RATE_LIMIT_WAIT = Histogram("ecobalyse_rate_limit_wait_seconds", "Time Ecobalyse calls waited for a token and slot.",
+                            ["lane"], buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+RATE_LIMIT_TIMEOUTS = Counter("ecobalyse_rate_limit_timeouts_total", "Ecobalyse calls that gave up waiting for the rate limiter.",
+                              ["lane"])
+
+current_lane: ContextVar[str] = ContextVar("ecobalyse_lane", default=INTERACTIVE)
+
+class RateLimitTimeout(Exception):
+    """Raised when no token or slot became available within ``max_wait_seconds``."""
+
+@contextmanager
+def priority(lane: str):
+    """Run the block's Ecobalyse calls in ``lane`` (carried into batch worker threads)."""
+    if lane not in LANES:
+        raise ValueError(f"Unknown rate limit lane: {lane}")
+    token = current_lane.set(lane)
+    try:
+        yield
+    finally:
+        current_lane.reset(token)
+
+def _empty_state(burst: float, now: float) -> Dict[str, Any]:
+    # slots / waiters: {id: [lane, expires_at]}
+    return {"tokens": float(burst), "updated_at": now, "slots": {}, "waiters": {}}
+
+class _MemoryState:
+    def __init__(self, burst: float):
+        self._lock = threading.Lock()
+        self._state = _empty_state(burst, time.time())
+
+    def transact(self, fn: Callable[[Dict[str, Any]], Any]):
+        with self._lock:
+            return fn(self._state)
+
+class _SQLiteState:
+    def __init__(self, path: str, burst: float):
+        self.path = path
+        self.burst = burst
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().execute("CREATE TABLE IF NOT EXISTS rate_limit (id INTEGER PRIMARY KEY CHECK (id = 1), state TEXT NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def transact(self, fn: Callable[[Dict[str, Any]], Any]):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT state FROM rate_limit WHERE id = 1").fetchone()
+            state = json.loads(row[0]) if row else _empty_state(self.burst, time.time())
+            result = fn(state)
+            conn.execute("INSERT OR REPLACE INTO rate_limit(id, state) VALUES (1, ?)", (json.dumps(state),))
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+class RateLimiter:
+    def __init__(self, path: str = None, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 burst: float = DEFAULT_BURST, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 max_wait_seconds: float = DEFAULT_MAX_WAIT_SECONDS):
+        self.path = path
+        self.requests_per_second = max(0.001, float(requests_per_second))
+        self.burst = max(1.0, float(burst))
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_wait_seconds = float(max_wait_seconds)
+        self._state = _SQLiteState(path, self.burst) if path else _MemoryState(self.burst)
+
+    def settings(self):
+        return (self.path, self.requests_per_second, self.burst, self.max_concurrency, self.max_wait_seconds)
+
+    def _refill(self, state: Dict[str, Any], now: float):
+        elapsed = max(0.0, now - state["updated_at"])
+        state["tokens"] = min(self.burst, state["tokens"] + elapsed * self.requests_per_second)
+        state["updated_at"] = now
+        for table in ("slots", "waiters"):
+            state[table] = {key: entry for key, entry in state[table].items() if entry[1] > now}
+
+    def _try_acquire(self, state: Dict[str, Any], call_id: str, lane: str, now: float) -> float:
+        """0 once ``call_id`` holds a token and a slot, else seconds until worth retrying."""
+        self._refill(state, now)
+        waiters = state["waiters"]
+        if lane != INTERACTIVE and any(entry[0] == INTERACTIVE for entry in waiters.values()):
+            delay = POLL_INTERVAL_SECONDS  # interactive calls go first
+        elif len(state["slots"]) >= self.max_concurrency:
+            delay = POLL_INTERVAL_SECONDS
+        elif state["tokens"] < 1.0:
+            delay = (1.0 - state["tokens"]) / self.requests_per_second
+        else:
+            state["tokens"] -= 1.0
+            state["slots"][call_id] = [lane, now + SLOT_LEASE_SECONDS]
+            waiters.pop(call_id, None)
+            return 0.0
+        waiters[call_id] = [lane, now + WAITER_TTL_SECONDS]
+        return delay
+
+    def _leave(self, state: Dict[str, Any], call_id: str):
+        state["slots"].pop(call_id, None)
+        state["waiters"].pop(call_id, None)
+
+    @contextmanager
+    def acquire(self, lane: str = None):
+        """Hold a token and an in-flight slot for one HTTP attempt.
+
+        ``lane`` defaults to the current ``priority``. Raises RateLimitTimeout after
+        ``max_wait_seconds`` without capacity.
+        """
+        lane = lane or current_lane.get()
+        call_id = uuid.uuid4().hex
+        started = time.monotonic()
+        with stage("rate_limit_wait"):
+            while True:
+                delay = self._state.transact(lambda state: self._try_acquire(state, call_id, lane, time.time()))
+                if delay <= 0:
+                    break
+                waited = time.monotonic() - started
+                if waited + delay > self.max_wait_seconds:
+                    self._state.transact(lambda state: self._leave(state, call_id))
+                    RATE_LIMIT_TIMEOUTS.inc(lane=lane)
+                    raise RateLimitTimeout(f"Ecobalyse rate limit: no capacity after {waited:.1f}s ({lane})")
+                # Re-register before our waiter entry expires
+                time.sleep(min(delay, WAITER_TTL_SECONDS / 2))
+        RATE_LIMIT_WAIT.observe(time.monotonic() - started, lane=lane)
+        try:
+            yield
+        finally:
+            self._state.transact(lambda state: self._leave(state, call_id))
+
+    def stats(self) -> Dict[str, Any]:
+        def _snapshot(state):
+            self._refill(state, time.time())
+            return {
+                "tokens": round(state["tokens"], 3),
+                "in_flight": len(state["slots"]),
+                "waiting": {lane: sum(1 for entry in state["waiters"].values() if entry[0] == lane) for lane in LANES},
+            }
+        stats = self._state.transact(_snapshot)
+        stats.update(requests_per_second=self.requests_per_second, burst=self.burst, max_concurrency=self.max_concurrency,
+                     wait_seconds={lane: {"count": int(RATE_LIMIT_WAIT.count(lane=lane)),
+                                          "timeouts": int(RATE_LIMIT_TIMEOUTS.value(lane=lane))} for lane in LANES})
+        return stats
+
+def rate_limiter_from_config(ecoconfig: Dict[str, Any], project_root: str) -> Optional[RateLimiter]:
+    """RateLimiter for ``ecobalyse.yaml``'s ``rate_limit`` section; None if absent or disabled."""
+    cfg = (ecoconfig or {}).get("rate_limit", {}) or {}
+    if not cfg or not cfg.get("enabled", True):
+        return None
+    path = cfg.get("path")
+    if path and not os.path.isabs(path):
+        path = os.path.join(project_root, path)
+    return RateLimiter(
+        path,
+        requests_per_second=cfg.get("requests_per_second", DEFAULT_REQUESTS_PER_SECOND),
+        burst=cfg.get("burst", DEFAULT_BURST),
+        max_concurrency=cfg.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+        max_wait_seconds=cfg.get("max_wait_seconds", DEFAULT_MAX_WAIT_SECONDS),
+    )
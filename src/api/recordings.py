@@ -0,0 +1,106 @@
+"""
+Recorded Ecobalyse API responses, used to run without the live simulator.
+
+A recordings directory holds one JSON file per reference list (``countries.json``,
+``trims.json``, ``materials.json``, ``products.json``) and ``simulator.jsonl``, one
+``{"key", "payload", "response"}`` line per recorded simulator call. It backs both
+the client's record/replay mode and the local mock server (``src.api.mock_server``).
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Optional, Dict, Any
+from .score_cache import canonical_payload
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_RECORDINGS_PATH = os.path.join(PROJECT_ROOT, "data", "fixtures", "ecobalyse")
+REFERENCE_ENDPOINTS = ("countries", "trims", "materials", "products")
+SIMULATOR_ENDPOINT = "simulator"
+RECORDING_MODES = ("off", "record", "replay")
+
+class RecordingMissError(LookupError):
+    """Raised in replay mode for a request that was never recorded."""
+
+def recording_key(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(canonical_payload(payload).encode("utf-8")).hexdigest()
+
+def endpoint_name(path: str) -> str:
+    """``/textile/countries`` -> ``countries``; both simulator variants -> ``simulator``."""
+    parts = path.rstrip("/").split("/")
+    if SIMULATOR_ENDPOINT in parts:
+        return SIMULATOR_ENDPOINT
+    return parts[-1]
+
+class Recordings:
+    def __init__(self, path: str = DEFAULT_RECORDINGS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._references: Dict[str, Any] = {}
+        self._simulator: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def reference(self, name: str) -> Optional[Any]:
+        with self._lock:
+            if name not in self._references:
+                try:
+                    with open(self._file(f"{name}.json"), "r", encoding="utf-8") as f:
+                        self._references[name] = json.load(f)
+                except FileNotFoundError:
+                    return None
+            return self._references[name]
+
+    def save_reference(self, name: str, data: Any):
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            tmp = self._file(f"{name}.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self._file(f"{name}.json"))
+            self._references[name] = data
+
+    def _load_simulator(self) -> Dict[str, Dict[str, Any]]:
+        if self._simulator is None:
+            entries = {}
+            try:
+                with open(self._file("simulator.jsonl"), "r", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            entries[entry["key"]] = entry["response"]
+            except FileNotFoundError:
+                pass
+            self._simulator = entries
+        return self._simulator
+
+    def simulator_response(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._load_simulator().get(recording_key(payload))
+
+    def record_simulator(self, payload: Dict[str, Any], response: Dict[str, Any]):
+        key = recording_key(payload)
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            entries = self._load_simulator()
+            if entries.get(key) == response:
+                return
+            entries[key] = response
+            with open(self._file("simulator.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "payload": payload, "response": response}, ensure_ascii=False) + "\n")
+
+    def lookup(self, path: str, payload: Dict[str, Any] = None) -> Any:
+        """Recorded response for an API path; raises RecordingMissError if there is none."""
+        name = endpoint_name(path)
+        data = self.simulator_response(payload or {}) if name == SIMULATOR_ENDPOINT else self.reference(name)
+        if data is None:
+            raise RecordingMissError(f"No recorded Ecobalyse response for {path} in {self.path}")
+        return data
+
+    def record(self, path: str, payload: Dict[str, Any], data: Any):
+        name = endpoint_name(path)
+        if name == SIMULATOR_ENDPOINT:
+            self.record_simulator(payload or {}, data)
+        elif name in REFERENCE_ENDPOINTS:
+            self.save_reference(name, data)
@@ -0,0 +1,144 @@
+"""
+Retry and circuit-breaker primitives for calls to the Ecobalyse API.
+
+``RetryPolicy`` decides whether and how long to wait before retrying a failed
+call (jittered exponential backoff, honouring ``Retry-After``). ``CircuitBreaker``
+stops calling an upstream that keeps failing until a cool-down has elapsed, so
+a degraded simulator fails fast instead of holding every worker for a full timeout.
+"""
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Tuple
+import random
+import threading
+import time
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 3
+    backoff_base_seconds: float = 0.5
+    backoff_max_seconds: float = 10.0
+    retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict[str, Any]]) -> "RetryPolicy":
+        cfg = cfg or {}
+        default = cls()
+        return cls(
+            max_retries=int(cfg.get("max_retries", default.max_retries)),
+            backoff_base_seconds=float(cfg.get("backoff_base_seconds", default.backoff_base_seconds)),
+            backoff_max_seconds=float(cfg.get("backoff_max_seconds", default.backoff_max_seconds)),
+            retry_statuses=tuple(int(s) for s in cfg.get("retry_statuses", default.retry_statuses)),
+        )
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> Optional[float]:
+        """Seconds to wait before retry number ``attempt`` (0-based), or None to give up.
+
+        A ``Retry-After`` header wins over the computed backoff; one asking for longer
+        than ``backoff_max_seconds`` ends the retries.
+        """
+        if attempt >= self.max_retries:
+            return None
+        wait = parse_retry_after(retry_after)
+        if wait is None:
+            # Full jitter: spreads retries of concurrent workers over the whole window
+            wait = random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+        return wait if wait <= self.backoff_max_seconds else None
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a ``Retry-After`` header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive failures; after
+    ``reset_timeout_seconds`` one trial call is let through (half-open) and its
+    outcome closes or re-opens the circuit."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_seconds: float = 30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout_seconds = float(reset_timeout_seconds)
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.times_opened = 0
+        self.short_circuited = 0
+
+    def configure(self, failure_threshold: int = None, reset_timeout_seconds: float = None):
+        with self._lock:
+            if failure_threshold is not None:
+                self.failure_threshold = max(1, int(failure_threshold))
+            if reset_timeout_seconds is not None:
+                self.reset_timeout_seconds = float(reset_timeout_seconds)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout_seconds:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; counts the call as short-circuited otherwise."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give back a half-open trial that never reached the upstream (no verdict either way)."""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            state = self._current_state()
+            if state == self.HALF_OPEN or (state == self.CLOSED and self._failures >= self.failure_threshold):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+                self.times_opened += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened,
+                "short_circuited": self.short_circuited,
+                "retry_in_seconds": max(0.0, self.reset_timeout_seconds - (time.monotonic() - self._opened_at))
+                if state == self.OPEN else 0.0,
+            }
@@ -0,0 +1,185 @@
+"""
+Persistent, content-addressed cache for Ecobalyse simulator results.
+
+Entries are keyed by a hash of the canonical simulator payload plus the API
+version pinned in ``ecobalyse.yaml``'s ``base_url``. They live in a SQLite file
+so they survive gunicorn restarts and are shared by every worker.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any
+
+DEFAULT_CACHE_PATH = os.path.join("data", "cache", "ecobalyse_scores.sqlite")
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60  # 30 days
+DEFAULT_MAX_ENTRIES = 50000
+
+_VERSION_RE = re.compile(r"/versions/([^/]+)")
+
+def api_version_from_url(base_url: str) -> str:
+    """Extract the pinned API version (e.g. ``v7.0.0``) from an Ecobalyse base URL."""
+    if not base_url:
+        return "unknown"
+    match = _VERSION_RE.search(base_url)
+    if match:
+        return match.group(1)
+    return base_url.rstrip("/")
+
+def canonical_payload(payload: Dict[str, Any]) -> str:
+    """Serialize a payload deterministically (sorted keys, no whitespace)."""
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+def payload_fingerprint(payload: Dict[str, Any], api_version: str) -> str:
+    """Stable cache key for a simulator payload under a given API version."""
+    digest = hashlib.sha256()
+    digest.update(api_version.encode("utf-8"))
+    digest.update(b"\n")
+    digest.update(canonical_payload(payload).encode("utf-8"))
+    return digest.hexdigest()
+
+class ScoreCache:
+    """SQLite-backed score cache with TTL expiry and LRU eviction."""
+
+    def __init__(self, path: str, ttl_seconds: int = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = int(ttl_seconds)
+        self.max_entries = int(max_entries)
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " key TEXT PRIMARY KEY,"
+            " api_version TEXT NOT NULL,"
+            " score REAL NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS scores_last_access ON scores(last_access)")
+        conn.execute("CREATE INDEX IF NOT EXISTS scores_api_version ON scores(api_version)")
+        conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO counters(name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+
+    def _bump(self, conn: sqlite3.Connection, name: str, amount: int = 1):
+        if amount:
+            conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (amount, name))
+
+    def get(self, key: str) -> Optional[float]:
+        """Return the cached score for ``key`` or None on miss/expiry."""
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT score, created_at FROM scores WHERE key = ?", (key,)).fetchone()
+        if row is None or (self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds):
+            if row is not None:
+                conn.execute("DELETE FROM scores WHERE key = ?", (key,))
+            self._bump(conn, "misses")
+            return None
+        conn.execute("UPDATE scores SET last_access = ? WHERE key = ?", (now, key))
+        self._bump(conn, "hits")
+        return float(row[0])
+
+    def set(self, key: str, score: float, api_version: str):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO scores(key, api_version, score, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, api_version, float(score), now, now),
+            )
+            evicted = self._evict(conn, now)
+            self._bump(conn, "evictions", evicted)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> int:
+        evicted = 0
+        if self.ttl_seconds > 0:
+            evicted += conn.execute("DELETE FROM scores WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+        if self.max_entries > 0:
+            (count,) = conn.execute("SELECT COUNT(*) FROM scores").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                evicted += conn.execute(
+                    "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,),
+                ).rowcount
+        return evicted
+
+    def invalidate(self, key: str = None, api_version: str = None) -> int:
+        """Delete one entry, every entry of an API version, or everything. Returns rows removed."""
+        conn = self._connect()
+        if key:
+            return conn.execute("DELETE FROM scores WHERE key = ?", (key,)).rowcount
+        if api_version:
+            return conn.execute("DELETE FROM scores WHERE api_version = ?", (api_version,)).rowcount
+        return conn.execute("DELETE FROM scores").rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connect()
+        counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        (entries,) = conn.execute("SELECT COUNT(*) FROM scores").fetchone()
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_ratio": (hits / lookups) if lookups else None,
+        }
+
+_caches: Dict[str, ScoreCache] = {}
+_caches_lock = threading.Lock()
+
+def score_cache_from_config(ecoconfig: Dict[str, Any], config_root: str) -> Optional[ScoreCache]:
+    """Return the process-wide ScoreCache described by ``ecobalyse.yaml`` (or None if disabled).
+
+    Relative paths are resolved against the project root (the parent of ``config_root``).
+    ``ECOBALYSE_CACHE_PATH`` overrides the configured location.
+    """
+    cache_cfg = (ecoconfig or {}).get("cache", {}) or {}
+    if cache_cfg.get("enabled", True) is False:
+        return None
+    path = os.environ.get("ECOBALYSE_CACHE_PATH") or cache_cfg.get("path", DEFAULT_CACHE_PATH)
+    if not os.path.isabs(path):
+        project_root = os.path.dirname(os.path.abspath(config_root))
+        path = os.path.join(project_root, path)
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            try:
+                cache = ScoreCache(
+                    path,
+                    ttl_seconds=cache_cfg.get("ttl_seconds", DEFAULT_TTL_SECONDS),
+                    max_entries=cache_cfg.get("max_entries", DEFAULT_MAX_ENTRIES),
+                )
+            except Exception as e:
+                print(f"Score cache unavailable ({path}): {e}")
+                return None
+            _caches[path] = cache
+        return cache
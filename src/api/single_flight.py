@@ -0,0 +1,128 @@
+"""
+Single-flight coalescing of identical simulator calls.
+
+Concurrent callers asking for the same key (the payload fingerprint) share one
+upstream call. Within a process the first caller runs it and the others wait on
+its result. With a ``path``, the leader of each process also takes a lease on
+the key in a SQLite file shared by every gunicorn worker. Workers that find the
+lease held poll the row until the holder writes its result, then return it.
+
+A lease outlives a crashed holder by at most ``lease_seconds``; the next caller
+then runs the call itself. Finished rows are only reused by callers that were
+already waiting. Later callers go through the score cache, not through here.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional, Dict, Any, Callable
+from ..utils.metrics import Counter
+
+DEFAULT_LEASE_SECONDS = 60
+DEFAULT_POLL_INTERVAL_SECONDS = 0.05
+RESULT_TTL_SECONDS = 60  # finished rows older than this are purged
+
+SINGLE_FLIGHT_CALLS = Counter("ecobalyse_single_flight_total",
+                              "Simulator calls by single-flight role (leader runs the call, others share it).",
+                              ["result"])
+
+class _Call:
+    __slots__ = ("done", "result")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+class SingleFlight:
+    def __init__(self, path: str = None, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 poll_interval_seconds: float = DEFAULT_POLL_INTERVAL_SECONDS):
+        self.path = path
+        self.lease_seconds = float(lease_seconds)
+        self.poll_interval_seconds = float(poll_interval_seconds)
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._connect().execute(
+                "CREATE TABLE IF NOT EXISTS flights ("
+                " key TEXT PRIMARY KEY,"
+                " token TEXT NOT NULL,"  # identifies one leader's call
+                " lease_until REAL NOT NULL,"
+                " finished_at REAL,"  # NULL while the call is in flight
+                " result TEXT)"  # JSON; "null" for a failed call
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """``fn()``, unless an identical call is already in flight; then its result."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            SINGLE_FLIGHT_CALLS.inc(result="coalesced")
+            call.done.wait()
+            return call.result
+        try:
+            call.result = self._across_workers(key, fn) if self.path else self._lead(fn)
+            return call.result
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    @staticmethod
+    def _lead(fn: Callable[[], Any]) -> Any:
+        SINGLE_FLIGHT_CALLS.inc(result="leader")
+        return fn()
+
+    def _claim(self, key: str, token: str, now: float, waiting_since: float = None) -> bool:
+        """Take the lease on ``key`` unless another worker's call is in flight or finished
+        after ``waiting_since`` (its result is then ours)."""
+        return self._connect().execute(
+            "INSERT INTO flights(key, token, lease_until, finished_at, result) VALUES (?, ?, ?, NULL, NULL)"
+            " ON CONFLICT(key) DO UPDATE SET token = excluded.token, lease_until = excluded.lease_until,"
+            " finished_at = NULL, result = NULL"
+            " WHERE flights.finished_at < ? OR (flights.finished_at IS NULL AND flights.lease_until < ?)",
+            (key, token, now + self.lease_seconds, now if waiting_since is None else waiting_since, now),
+        ).rowcount == 1
+
+    def _across_workers(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run or wait for ``fn`` across workers; results must be JSON-serializable."""
+        conn = self._connect()
+        token = uuid.uuid4().hex
+        waiting_since = time.time()
+        while True:
+            now = time.time()
+            if self._claim(key, token, now, waiting_since):
+                break
+            row = conn.execute("SELECT lease_until, finished_at, result FROM flights WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] is not None and row[1] >= waiting_since:
+                # Another worker finished the call we were waiting on
+                SINGLE_FLIGHT_CALLS.inc(result="coalesced_remote")
+                return json.loads(row[2]) if row[2] is not None else None
+            time.sleep(self.poll_interval_seconds)
+        result = None
+        try:
+            result = self._lead(fn)
+            return result
+        finally:
+            now = time.time()
+            conn.execute("UPDATE flights SET finished_at = ?, result = ? WHERE key = ? AND token = ?",
+                         (now, json.dumps(result), key, token))
+            conn.execute("DELETE FROM flights WHERE finished_at < ?", (now - RESULT_TTL_SECONDS,))
+
+def single_flight_stats() -> Dict[str, int]:
+    return {name: int(SINGLE_FLIGHT_CALLS.value(result=name)) for name in ("leader", "coalesced", "coalesced_remote")}
@@ -0,0 +1,344 @@
+"""
+Bulk supplier import from CSV, XLSX or YAML, and catalog export.
+
+Files are parsed row by row. Each row is normalized like a form submission
+(``normalize_supplier``) and validated; problems are reported per row. Valid rows
+are inserted in a single transaction: by default nothing is written if any row
+fails, with ``partial`` the valid rows are kept.
+
+CSV/XLSX sheets use one column per field. ``certifications`` is a ``;``-separated
+list, and ``material_origin`` is either a JSON list or numbered columns
+(``material_1_id``, ``material_1_share``, ``material_1_country``,
+``material_1_spinning``, ``material_2_id``, ...).
+
+    python -m src.interface.bulk import catalog.xlsx [--dry-run] [--partial]
+    python -m src.interface.bulk export out/catalog.csv
+"""
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple, Callable, Sequence
+import argparse
+import csv
+import io
+import itertools
+import json
+import math
+import os
+import re
+import yaml
+from ..storage.repository import SupplierRepository, ScoreState, _to_plain
+from .export import IMPACT_PREFIX, iter_csv, iter_yaml, write_xlsx
+
+FORMATS = ("csv", "xlsx", "yaml")
+NUMERIC_FIELDS = ("price_eur_per_m", "lead_time_weeks", "fabric_lead_time_weeks", "moq_m",
+                  "price", "weight_gm2", "gross_width", "numberOfReferences")
+EXPORT_SCORE_COLUMNS = ("ecobalyse_score", "score_pending")
+# Columns of our own exports that are not supplier fields
+IGNORED_COLUMNS = ("id",) + EXPORT_SCORE_COLUMNS
+_MATERIAL_COLUMN = re.compile(r"^material_(\d+)_(id|share|country|spinning)$")
+_LIST_SPLIT = re.compile(r"\s*[;|]\s*")
+
+class BulkImportError(ValueError):
+    """The uploaded file cannot be read at all (unknown format, not a supplier list, ...)."""
+
+@dataclass
+class RowError:
+    row: int  # line (CSV), sheet row (XLSX) or list position (YAML), 1-based
+    supplier: Optional[str]
+    errors: List[str]
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    valid: int = 0
+    imported_ids: List[int] = field(default_factory=list)
+    errors: List[RowError] = field(default_factory=list)
+    dry_run: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "valid": self.valid,
+            "imported": len(self.imported_ids),
+            "ids": self.imported_ids,
+            "dry_run": self.dry_run,
+            "errors": [{"row": e.row, "supplier": e.supplier, "errors": e.errors} for e in self.errors],
+        }
+
+def detect_format(filename: Optional[str] = None, content_type: Optional[str] = None) -> str:
+    ext = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if ext in ("yml", "yaml"):
+        return "yaml"
+    if ext in ("csv", "xlsx"):
+        return ext
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-yaml", "application/yaml", "text/yaml"):
+        return "yaml"
+    if content_type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet":
+        return "xlsx"
+    raise BulkImportError(f"Cannot tell the file format of {filename or content_type or 'the upload'} (use {', '.join(FORMATS)})")
+
+# --------- Parsing ---------
+
+def _blank(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+def record_from_columns(columns: Dict[str, Any]) -> Dict[str, Any]:
+    """Supplier record from one flat CSV/XLSX row (blank cells are left out)."""
+    record: Dict[str, Any] = {}
+    materials: Dict[int, Dict[str, Any]] = {}
+    for key, value in columns.items():
+        key = str(key or "").strip()
+        if not key or _blank(value):
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        match = _MATERIAL_COLUMN.match(key)
+        if match:
+            materials.setdefault(int(match.group(1)), {})[match.group(2)] = value
+        elif key == "certifications" and isinstance(value, str):
+            record[key] = [c for c in _LIST_SPLIT.split(value) if c]
+        elif key == "material_origin" and isinstance(value, str):
+            try:
+                record[key] = json.loads(value)
+            except ValueError:
+                record[key] = value  # reported by validate_supplier
+        else:
+            record[key] = value
+    if materials and "material_origin" not in record:
+        record["material_origin"] = [materials[n] for n in sorted(materials) if materials[n].get("id")]
+    return record
+
+def iter_csv_rows(stream) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """``(line, record)`` pairs from a CSV text stream (comma, semicolon or tab delimited)."""
+    sample = stream.read(4096) + stream.readline()  # sniff on whole lines
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(itertools.chain(io.StringIO(sample), stream), dialect=dialect)
+    for columns in reader:
+        if any(not _blank(v) for v in columns.values()):
+            yield reader.line_num, record_from_columns(columns)
+
+def iter_xlsx_rows(fileobj) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """``(sheet row, record)`` pairs from the first sheet of a workbook (requires openpyxl)."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise BulkImportError("XLSX import requires openpyxl (pip install openpyxl)")
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise BulkImportError(f"Not a readable XLSX workbook: {e}")
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        for number, values in enumerate(rows, start=2):
+            if any(not _blank(v) for v in values):
+                yield number, record_from_columns(dict(zip(header, values)))
+    finally:
+        workbook.close()
+
+def iter_yaml_rows(stream) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """``(position, record)`` pairs from a YAML list, composed one item at a time."""
+    loader = yaml.SafeLoader(stream)
+    try:
+        loader.get_event()  # StreamStart
+        if loader.check_event(yaml.StreamEndEvent):
+            return
+        loader.get_event()  # DocumentStart
+        if not loader.check_event(yaml.SequenceStartEvent):
+            # A mapping with a ``suppliers`` key (the other accepted layout) is loaded whole
+            data = loader.construct_document(loader.compose_node(None, None))
+            rows = data.get("suppliers") if isinstance(data, dict) else None
+            if not isinstance(rows, list):
+                raise BulkImportError("YAML file must be a list of suppliers or have a 'suppliers' list")
+            yield from ((n, row) for n, row in enumerate(rows, start=1))
+            return
+        loader.get_event()
+        number = 0
+        while not loader.check_event(yaml.SequenceEndEvent):
+            number += 1
+            yield number, loader.construct_document(loader.compose_node(None, None))
+    except yaml.YAMLError as e:
+        raise BulkImportError(f"Invalid YAML: {e}")
+    finally:
+        loader.dispose()
+
+def iter_rows(fileobj, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Rows of a binary file object in ``fmt``."""
+    if fmt == "xlsx":
+        if not fileobj.seekable():
+            fileobj = io.BytesIO(fileobj.read())
+        return iter_xlsx_rows(fileobj)
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="" if fmt == "csv" else None)
+    if fmt == "csv":
+        return iter_csv_rows(text)
+    if fmt == "yaml":
+        return iter_yaml_rows(text)
+    raise BulkImportError(f"Unsupported format: {fmt}")
+
+# --------- Validation and import ---------
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+def validate_supplier(record: Dict[str, Any], products: Sequence[str] = ()) -> List[str]:
+    """Problems with a normalized record (empty list if it can be stored)."""
+    errors = []
+    if _blank(record.get("supplier")):
+        errors.append("supplier is required")
+    for key in NUMERIC_FIELDS:
+        value = record.get(key)
+        if value is not None and (not _is_number(value) or value < 0):
+            errors.append(f"{key} must be a non-negative number (got {value!r})")
+    product = record.get("product")
+    if product and products and product not in products:
+        errors.append(f"unknown product {product!r} (expected one of {', '.join(products)})")
+    materials = record.get("material_origin")
+    if materials is not None:
+        if not isinstance(materials, list):
+            errors.append("material_origin must be a list of {id, share, ...}")
+        else:
+            shares = []
+            for n, material in enumerate(materials, start=1):
+                if not isinstance(material, dict) or not material.get("id"):
+                    errors.append(f"material {n} has no id")
+                elif not _is_number(material.get("share")) or not 0 < material["share"] <= 1:
+                    errors.append(f"material {n} share must be between 0 and 100%")
+                else:
+                    shares.append(material["share"])
+            if shares and len(shares) == len(materials) and abs(sum(shares) - 1.0) > 0.01:
+                errors.append(f"material shares add up to {sum(shares):.0%}, not 100%")
+    certifications = record.get("certifications")
+    if certifications is not None and not isinstance(certifications, list):
+        errors.append("certifications must be a list")
+    return errors
+
+class _Abort(Exception):
+    pass
+
+def bulk_import(repository: SupplierRepository, rows: Iterable[Tuple[int, Any]],
+                normalize: Callable[[Dict[str, Any]], Dict[str, Any]], products: Sequence[str] = (),
+                partial: bool = False, dry_run: bool = False) -> ImportReport:
+    """Normalize, validate and store ``(row number, raw record)`` pairs in one transaction."""
+    report = ImportReport(dry_run=dry_run)
+
+    def valid_records():
+        for number, raw in rows:
+            report.rows += 1
+            if not isinstance(raw, dict):
+                report.errors.append(RowError(number, None, ["row is not a mapping of fields"]))
+                continue
+            try:
+                record = normalize({k: v for k, v in raw.items()
+                                    if k not in IGNORED_COLUMNS and not k.startswith(IMPACT_PREFIX)})
+            except Exception as e:
+                report.errors.append(RowError(number, raw.get("supplier"), [f"cannot normalize row: {e}"]))
+                continue
+            errors = validate_supplier(record, products)
+            if errors:
+                report.errors.append(RowError(number, record.get("supplier"), errors))
+            else:
+                report.valid += 1
+                yield record
+        if report.errors and not partial:
+            raise _Abort()  # rolls back the rows already inserted
+
+    try:
+        if dry_run:
+            for _ in valid_records():
+                pass
+        else:
+            # add_many consumes the generator inside its transaction
+            report.imported_ids = repository.add_many(valid_records())
+    except _Abort:
+        pass
+    return report
+
+# --------- Export ---------
+
+def iter_scored_records(repository: SupplierRepository, score_version: str, page_size: int = 200,
+                        **filters) -> Iterator[Dict[str, Any]]:
+    """Stored records with their materialized Ecobalyse score, read page by page.
+
+    ``ecobalyse_score`` is None and ``score_pending`` True for records whose stored
+    score is missing or out of date under ``score_version``.
+    """
+    page: List[Dict[str, Any]] = []
+
+    def flush():
+        states = repository.score_states([r["id"] for r in page])
+        for record in page:
+            state: Optional[ScoreState] = states.get(record["id"])
+            current = state is not None and state.is_current(score_version)
+            record["ecobalyse_score"] = state.ecobalyse_score if current else None
+            record["score_pending"] = not current
+            yield record
+
+    for record in repository.iter_records(page_size=page_size, **filters):
+        page.append(record)
+        if len(page) >= page_size:
+            yield from flush()
+            page = []
+    if page:
+        yield from flush()
+
+def export_catalog(records: Iterable[Dict[str, Any]], fmt: str, columns: Sequence[str], fileobj):
+    """Write records to a binary file object as CSV, XLSX or YAML."""
+    if fmt == "xlsx":
+        write_xlsx(records, columns, fileobj)
+        return
+    chunks = iter_csv(records, columns) if fmt == "csv" else iter_yaml(map(_to_plain, records)) if fmt == "yaml" else None
+    if chunks is None:
+        raise BulkImportError(f"Unsupported format: {fmt}")
+    for chunk in chunks:
+        fileobj.write(chunk.encode("utf-8"))
+
+def main(argv=None):
+    from ..storage.sqlite_repository import SQLiteSupplierRepository, DEFAULT_DB_PATH
+    parser = argparse.ArgumentParser(prog="python -m src.interface.bulk", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite supplier store (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="validate and add the rows of a CSV, XLSX or YAML file")
+    imp.add_argument("path")
+    imp.add_argument("--dry-run", action="store_true", help="only validate, write nothing")
+    imp.add_argument("--partial", action="store_true", help="import the valid rows even if some rows fail")
+    exp = sub.add_parser("export", help="write the store with stored scores as CSV, XLSX or YAML")
+    exp.add_argument("path")
+    args = parser.parse_args(argv)
+
+    # The web module holds the form normalization and the configured garment types
+    from .supplier_entry_ui import CONFIG_ROOT, BOURRIENNE_DEFAULTS, PREFERRED_FIELD_ORDER, normalize_supplier
+    repo = SQLiteSupplierRepository(args.db)
+    fmt = detect_format(args.path)
+    if args.command == "import":
+        with open(args.path, "rb") as f:
+            report = bulk_import(repo, iter_rows(f, fmt), normalize_supplier,
+                                 products=BOURRIENNE_DEFAULTS.get("garment_types") or (),
+                                 partial=args.partial, dry_run=args.dry_run)
+        for error in report.errors:
+            print(f"row {error.row} ({error.supplier or 'no supplier'}): {'; '.join(error.errors)}")
+        if args.dry_run:
+            print(f"{report.valid} of {report.rows} rows are valid")
+        else:
+            print(f"Imported {len(report.imported_ids)} of {report.rows} rows into {args.db}")
+        raise SystemExit(0 if report.ok or args.partial else 1)
+    from ..scoring.context import get_scoring_context
+    score_version = get_scoring_context(CONFIG_ROOT).payload_version
+    with open(args.path, "wb") as f:
+        records = iter_scored_records(repo, score_version)
+        columns = ["id"] + list(PREFERRED_FIELD_ORDER) + list(EXPORT_SCORE_COLUMNS)
+        export_catalog(records, fmt, columns, f)
+    print(f"Exported {repo.count()} suppliers to {args.path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,19 @@
 """
-Utilities to export scored results for notebooks.
+Utilities to export scored results for notebooks, and streaming catalog exports.
+
+``iter_csv``/``iter_yaml`` yield the file chunk by chunk and ``write_xlsx`` uses
+openpyxl's write-only mode, so exporting never holds the whole catalog (or a
+DataFrame of it) in memory.
 """
+import csv
+import io
 import os
 import json
+import itertools
+import math
+import yaml
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Sequence
 
 def export_results(records: List[Dict], export_dir: str):
     os.makedirs(export_dir, exist_ok=True)
@@ -12,3 +21,74 @@ def export_results(records: List[Dict], export_dir: str):
     df.to_csv(os.path.join(export_dir, "scored_suppliers.csv"), index=False)
     with open(os.path.join(export_dir, "scored_suppliers.json"), "w", encoding="utf-8") as f:
         json.dump(records, f, ensure_ascii=False, indent=2)
+
+LIST_SEPARATOR = "; "
+# Export columns holding stored Ecobalyse impacts (``impact.cch``, ``impact.lifecycle.Confection.ecs``, ...)
+IMPACT_PREFIX = "impact."
+
+def impact_column_names(columns: Sequence[str]) -> List[str]:
+    return [IMPACT_PREFIX + name for name in columns]
+
+def with_impacts(records: Iterable[Dict[str, Any]], columns: Sequence[str],
+                 lookup: Callable[[List[Dict[str, Any]], Sequence[str]], Dict[str, Any]],
+                 chunk_size: int = 500) -> Iterator[Dict[str, Any]]:
+    """Add ``impact.<column>`` fields to records, looked up ``chunk_size`` records at a time.
+
+    ``lookup(records, columns)`` returns one array per column aligned with the records
+    (see ``scoring.ecobalyse_score.impacts_for_records``); missing values become None.
+    """
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        values = lookup(chunk, columns)
+        for i, record in enumerate(chunk):
+            for name in columns:
+                value = float(values[name][i])
+                record[IMPACT_PREFIX + name] = None if math.isnan(value) else value
+            yield record
+
+def flat_cell(key: str, value: Any):
+    """Spreadsheet cell for a record value (see bulk.record_from_columns for the reverse)."""
+    if value is None:
+        return ""
+    if key == "certifications" and isinstance(value, list):
+        return LIST_SEPARATOR.join(str(v) for v in value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+def iter_csv(records: Iterable[Dict[str, Any]], columns: Sequence[str]) -> Iterator[str]:
+    """CSV text (header first), one chunk per record; keys outside ``columns`` are dropped."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for record in records:
+        writer.writerow([flat_cell(key, record.get(key)) for key in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def iter_yaml(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """A YAML list in the suppliers_min.yaml layout, one item per chunk."""
+    empty = True
+    for record in records:
+        empty = False
+        yield yaml.safe_dump([record], allow_unicode=True, sort_keys=False, default_flow_style=False)
+    if empty:
+        yield "[]\n"
+
+def write_xlsx(records: Iterable[Dict[str, Any]], columns: Sequence[str], fileobj, sheet_title: str = "suppliers"):
+    """Write an XLSX workbook row by row (requires openpyxl)."""
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError("XLSX export requires openpyxl (pip install openpyxl)")
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_title)
+    sheet.append(list(columns))
+    for record in records:
+        sheet.append([flat_cell(key, record.get(key)) for key in columns])
+    workbook.save(fileobj)
@@ -403,15 +403,21 @@ getRecommendationBtn.onclick = async () => {
   
   setRecommendationLoading(true);
   
-  // Fetch suppliers based on selected chart
+  // Rankings are computed server-side per material group
   try {
-    const response = await fetch('/api/suppliers/for-radar');
-    let suppliers = await response.json();
-    suppliers = suppliers.filter(s => !s.error);
+    const weightsParam = Object.entries(weights).map(([axis, value]) => `${axis}:${value}`).join(',');
+    const response = await fetch(`/api/rankings?weights=${encodeURIComponent(weightsParam)}`);
+    const rankings = await response.json();
+    const groups = {};
+    (rankings.groups || []).forEach(group => {
+      groups[group.category] = group.ranking.map(item => ({
+        ...item,
+        originalSupplier: { material_origin: item.material_origin } // for composite check
+      }));
+    });
     
     // If "all charts" is selected, generate recommendations per chart
     if (selectedChart === 'all') {
-      const groups = groupSuppliersByMaterial(suppliers);
       const categories = Object.keys(groups);
       
       if (categories.length === 0) {
@@ -423,10 +429,9 @@ getRecommendationBtn.onclick = async () => {
       // Generate recommendations for each chart
       let html = '';
       categories.forEach(category => {
-        const chartSuppliers = groups[category];
-        if (chartSuppliers.length === 0) return;
+        const recommendedSuppliers = groups[category];
+        if (recommendedSuppliers.length === 0) return;
         
-        const recommendedSuppliers = getRecommendedSuppliers(chartSuppliers, weights);
         const recommendation = generateRecommendationSummary(recommendedSuppliers, weights);
         
         // Add chart title
@@ -463,13 +468,12 @@ getRecommendationBtn.onclick = async () => {
       return;
     }
     
-    // Single chart selected - filter suppliers by chart
-    const groups = groupSuppliersByMaterial(suppliers);
+    // Single chart selected - pick that chart's ranking
     const categoryKey = selectedChart.toLowerCase();
-    let chartSuppliers = null;
+    let recommendedSuppliers = null;
     
     if (groups[categoryKey]) {
-      chartSuppliers = groups[categoryKey];
+      recommendedSuppliers = groups[categoryKey];
     } else {
       // Try to find by matching chart title
       const allCategories = Object.keys(groups);
@@ -477,18 +481,17 @@ getRecommendationBtn.onclick = async () => {
         categoryToTitle(cat).toLowerCase() === selectedChart.toLowerCase()
       );
       if (matchingCategory) {
-        chartSuppliers = groups[matchingCategory];
+        recommendedSuppliers = groups[matchingCategory];
       }
     }
     
-    if (!chartSuppliers || chartSuppliers.length === 0) {
+    if (!recommendedSuppliers || recommendedSuppliers.length === 0) {
       recommendationContent.innerHTML = '<p>No suppliers available for the selected chart.</p>';
       recommendationResults.style.display = 'block';
       return;
     }
     
     // Get recommendations for single chart
-    const recommendedSuppliers = getRecommendedSuppliers(chartSuppliers, weights);
     const recommendation = generateRecommendationSummary(recommendedSuppliers, weights);
     
     // Display results
@@ -621,6 +624,31 @@ function displayRecommendation(recommendedSuppliers, recommendation) {
   initializeCompositeTooltips();
 }
 
+/**
+ * Poll again while some Ecobalyse scores are still computed in the background,
+ * waiting twice as long after each poll that still finds pending scores
+ */
+const pendingRefreshTimers = new Map();
+const pendingRefreshDelays = new Map();
+const PENDING_REFRESH_MS = 3000;
+const PENDING_REFRESH_MAX_MS = 60000;
+
+function schedulePendingRefresh(suppliers, refresh) {
+  if (!suppliers.some(s => s.pending)) {
+    pendingRefreshDelays.delete(refresh);
+    return;
+  }
+  if (pendingRefreshTimers.has(refresh)) {
+    return;
+  }
+  const delay = pendingRefreshDelays.get(refresh) || PENDING_REFRESH_MS;
+  pendingRefreshDelays.set(refresh, Math.min(delay * 2, PENDING_REFRESH_MAX_MS));
+  pendingRefreshTimers.set(refresh, setTimeout(() => {
+    pendingRefreshTimers.delete(refresh);
+    refresh();
+  }, delay));
+}
+
 function loadSuppliers() {
   suppliersList.innerHTML = '<div class="suppliers-loading">Loading suppliers...</div>';
   // Use for-radar endpoint to get suppliers with Ecobalyse scores
@@ -632,6 +660,7 @@ function loadSuppliers() {
     // Filter out suppliers with errors
     const validSuppliers = suppliers.filter(s => !s.error);
     renderSuppliers(validSuppliers);
+    schedulePendingRefresh(validSuppliers, loadSuppliers);
   }).catch(err => {
     suppliersList.innerHTML = '<div class="suppliers-empty">Error loading suppliers: ' + err + '</div>';
   });
@@ -796,7 +825,7 @@ function buildFabricCard(supplier, actualIndex) {
     : [];
   const certificationsDisplay = certificationsList.length > 0 ? certificationsList.join(', ') : 'None provided';
   const highlightFields = [
-    { label: `Ecobalyse Score (${getProductTypeDisplay(supplier.product)})`, value: supplier.ecobalyse_score != null ? supplier.ecobalyse_score.toFixed(2) : 'N/A', infoTooltip: 'Ecobalyse score for the specific garment type. This is the basis for the Ecobalyse score on the radar charts. The higher the score, the worse the environmental impact.' },
+    { label: `Ecobalyse Score (${getProductTypeDisplay(supplier.product)})`, value: supplier.ecobalyse_score != null ? supplier.ecobalyse_score.toFixed(2) : (supplier.pending ? 'Pending…' : (supplier.score_error ? 'Unavailable' : 'N/A')), infoTooltip: 'Ecobalyse score for the specific garment type. This is the basis for the Ecobalyse score on the radar charts. The higher the score, the worse the environmental impact.' },
     { label: 'Traceability Fields', value: `${traceabilityCount}/5`, isHighlight: true, infoTooltip: 'One point is awarded for each traceable step, and summed across the five steps. This is the basis for the traceability score on the radar charts.' },
     { label: 'Certifications', value: certificationsDisplay, isHighlight: true, infoTooltip: 'One point is awarded for each certification. The certification score does not appear on the charts, but you can prioritise it in the weighted comparison to evaluate suppliers.' }
   ];
@@ -934,16 +963,18 @@ function buildFabricCard(supplier, actualIndex) {
   
   detailsWrapper.appendChild(details);
   
+  // Stable store id; fall back to the list position for older API responses
+  const supplierId = supplier.id != null ? supplier.id : actualIndex;
   const actions = document.createElement('div');
   actions.className = 'supplier-actions';
   const editBtn = document.createElement('button');
   editBtn.className = 'supplier-btn supplier-btn-edit';
   editBtn.textContent = 'Edit';
-  editBtn.onclick = () => editSupplier(actualIndex, supplier);
+  editBtn.onclick = () => editSupplier(supplierId, supplier);
   const deleteBtn = document.createElement('button');
   deleteBtn.className = 'supplier-btn supplier-btn-delete';
   deleteBtn.textContent = 'Delete';
-  deleteBtn.onclick = () => deleteSupplier(actualIndex, supplier.supplier);
+  deleteBtn.onclick = () => deleteSupplier(supplierId, supplier.supplier);
   actions.appendChild(editBtn);
   actions.appendChild(deleteBtn);
   detailsWrapper.appendChild(actions);
@@ -477,76 +477,146 @@ function updateChartLegend(canvasId, datasets) {
 }
 
 /**
- * Load and render all radar charts
+ * Read /api/suppliers/for-radar/stream (NDJSON), calling onUpdate with every record
+ * received so far each time a chunk arrives
  */
-async function loadAndRenderRadarCharts() {
-  try {
-    const response = await fetch('/api/suppliers/for-radar');
-    const suppliers = await response.json();
-    
-    // Filter out suppliers with errors
-    const validSuppliers = suppliers.filter(s => !s.error);
-    
-    const chartsSection = document.querySelector('.charts-section');
-    
-    if (validSuppliers.length === 0) {
-      // Hide charts section if no suppliers
-      if (chartsSection) {
-        chartsSection.style.display = 'none';
-      }
-      return;
+async function streamRadarSuppliers(onUpdate) {
+  const response = await fetch('/api/suppliers/for-radar/stream');
+  if (!response.ok) {
+    throw new Error(`HTTP ${response.status}`);
+  }
+  const suppliers = [];
+  const addLine = line => {
+    if (line.trim()) {
+      suppliers.push(JSON.parse(line));
     }
-    
-    // Show charts section when suppliers exist
-    if (chartsSection) {
-      chartsSection.style.display = '';
+  };
+  if (!response.body || typeof TextDecoder === 'undefined') {
+    (await response.text()).split('\n').forEach(addLine);
+    onUpdate(suppliers);
+    return suppliers;
+  }
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) {
+      break;
     }
-    
-    // Group suppliers by material (dynamic categories)
-    const groups = groupSuppliersByMaterial(validSuppliers);
-    
-    // Get list of all known chart containers from HTML (for hiding)
-    const knownChartIds = ['cottonChart', 'woolChart', 'compositeChart', 'silkChart', 'syntheticChart'];
-    
-    // Hide all known containers initially
-    knownChartIds.forEach(chartId => {
-      const canvas = document.getElementById(chartId);
-      const container = canvas?.closest('.chart-container');
-      if (container) {
-        container.style.display = 'none';
-      }
-    });
-    
-    // Hide any dynamically created containers from previous renders
-    const allContainers = chartsSection.querySelectorAll('.chart-container');
-    allContainers.forEach(container => {
-      const canvas = container.querySelector('canvas');
-      if (canvas && !knownChartIds.includes(canvas.id)) {
-        container.style.display = 'none';
-      }
-    });
-    
-    // Create charts for each category that has suppliers
-    Object.keys(groups).forEach(category => {
-      const suppliers = groups[category];
-      if (suppliers && suppliers.length > 0) {
-        const chartId = categoryToChartId(category);
-        // Ensure container exists (create if needed)
-        getOrCreateChartContainer(category);
-        createRadarChart(chartId, suppliers);
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    if (lines.length > 0) {
+      lines.forEach(addLine);
+      onUpdate(suppliers);
+    }
+  }
+  addLine(buffer + decoder.decode());
+  onUpdate(suppliers);
+  return suppliers;
+}
+
+const RADAR_RENDER_INTERVAL_MS = 300;
+
+/**
+ * Load and render all radar charts, redrawing as streamed scores arrive
+ */
+async function loadAndRenderRadarCharts() {
+  let lastRender = 0;
+  let renderTimer = null;
+  let latest = [];
+  const renderLatest = () => {
+    renderTimer = null;
+    lastRender = Date.now();
+    renderRadarCharts(latest);
+  };
+  try {
+    const suppliers = await streamRadarSuppliers(received => {
+      latest = received;
+      // Redraw at most every RADAR_RENDER_INTERVAL_MS while records keep arriving
+      if (!renderTimer) {
+        renderTimer = setTimeout(renderLatest, Math.max(0, lastRender + RADAR_RENDER_INTERVAL_MS - Date.now()));
       }
     });
+    if (renderTimer) {
+      clearTimeout(renderTimer);
+    }
+    latest = suppliers;
+    renderLatest();
     
     // Update chart selector in weighted comparison panel if it exists
     if (typeof updateChartSelector === 'function') {
       updateChartSelector();
     }
-    
   } catch (error) {
+    if (renderTimer) {
+      clearTimeout(renderTimer);
+    }
     console.error('Error loading radar charts:', error);
   }
 }
 
+/**
+ * Render one chart per material group from the suppliers received so far
+ */
+function renderRadarCharts(suppliers) {
+  // Filter out suppliers with errors; keep id order so colours stay put while streaming
+  const validSuppliers = suppliers
+    .filter(s => !s.error)
+    .sort((a, b) => (a.id ?? 0) - (b.id ?? 0));
+  
+  const chartsSection = document.querySelector('.charts-section');
+  
+  if (validSuppliers.length === 0) {
+    // Hide charts section if no suppliers
+    if (chartsSection) {
+      chartsSection.style.display = 'none';
+    }
+    return;
+  }
+  
+  // Show charts section when suppliers exist
+  if (chartsSection) {
+    chartsSection.style.display = '';
+  }
+  
+  // Group suppliers by material (dynamic categories)
+  const groups = groupSuppliersByMaterial(validSuppliers);
+  
+  // Get list of all known chart containers from HTML (for hiding)
+  const knownChartIds = ['cottonChart', 'woolChart', 'compositeChart', 'silkChart', 'syntheticChart'];
+  
+  // Hide all known containers initially
+  knownChartIds.forEach(chartId => {
+    const canvas = document.getElementById(chartId);
+    const container = canvas?.closest('.chart-container');
+    if (container) {
+      container.style.display = 'none';
+    }
+  });
+  
+  // Hide any dynamically created containers from previous renders
+  const allContainers = chartsSection.querySelectorAll('.chart-container');
+  allContainers.forEach(container => {
+    const canvas = container.querySelector('canvas');
+    if (canvas && !knownChartIds.includes(canvas.id)) {
+      container.style.display = 'none';
+    }
+  });
+  
+  // Create charts for each category that has suppliers
+  Object.keys(groups).forEach(category => {
+    const suppliers = groups[category];
+    if (suppliers && suppliers.length > 0) {
+      const chartId = categoryToChartId(category);
+      // Ensure container exists (create if needed)
+      getOrCreateChartContainer(category);
+      createRadarChart(chartId, suppliers);
+    }
+  });
+}
+
 /**
  * Refresh charts when suppliers are updated
  */
@@ -1,16 +1,40 @@
-from flask import Flask, jsonify, request, render_template, send_from_directory
-from src.api.ecobalyse_client import EcobalyseClient
+from flask import Flask, Response, g, jsonify, request, render_template, send_from_directory, stream_with_context
+from src.api.ecobalyse_client import EcobalyseClient, http_metrics
+from src.api.enum_cache import EnumCache, enum_cache_from_config
 from src.utils.yaml_loader import load_yaml
-from src.scoring.final_score import final_csr_score
-from src.models.supplier import Supplier
-import yaml
+from src.scoring.incremental import retries_due, score_rows, iter_score_rows
+from src.scoring.rankings import parse_weights, rank_by_category
+from src.scoring.pareto import PARETO_AXES, pareto_by_product
+from src.scoring.scenarios import run_scenarios
+from src.models.supplier import Supplier, supplier_from_row
+from src.scoring.context import get_scoring_context
+from src.scoring.ecobalyse_score import impacts_for_records
+from src.storage.repository import SupplierRepository, SupplierQuery, yaml_row
+from src.interface.bulk import (EXPORT_SCORE_COLUMNS, BulkImportError, bulk_import, detect_format, export_catalog,
+                                iter_rows, iter_scored_records)
+from src.interface.export import impact_column_names, iter_csv, iter_yaml, with_impacts
+from src.storage.sqlite_repository import SQLiteSupplierRepository, DEFAULT_DB_PATH
+from src.jobs.queue import JobQueue
+from src.utils.metrics import REGISTRY, Histogram, RequestTimings, current_timings, stage
+from src.jobs.worker import DEFAULT_QUEUE_PATH, enqueue_scoring, jobs_config, start_worker_threads
+import csv
+import dataclasses
+import functools
+import hashlib
+import hmac
+import io
+import json
+import math
 import os
-from collections import OrderedDict
+import tempfile
+import threading
 import time
 
 app = Flask(__name__)
 # Configure where to save suppliers
 SUPPLIERS_YAML = os.path.join(os.path.dirname(__file__), '../../data/examples/suppliers_min.yaml')
+# SQLite supplier store (SUPPLIERS_DB env); seeded from SUPPLIERS_YAML on first start
+SUPPLIERS_DB = DEFAULT_DB_PATH
 BASE_API_URL = os.environ.get('ECOBALYSE_API_URL', 'https://ecobalyse.beta.gouv.fr/versions/v7.0.0/api')
 
 # Paths
@@ -18,6 +42,16 @@ THIS_DIR = os.path.dirname(__file__)
 CONFIG_ROOT = os.path.join(os.path.dirname(os.path.dirname(THIS_DIR)), 'config')
 BOURRIENNE_CONFIG_PATH = os.path.join(CONFIG_ROOT, 'bourrienne.yaml')
 CERTIFICATIONS_CONFIG_PATH = os.path.join(CONFIG_ROOT, 'certifications.yaml')
+# Shared secret for /api/admin/* (unset = admin endpoints are disabled)
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+APP_CONFIG = load_yaml(os.path.join(CONFIG_ROOT, 'app.yaml')) or {}
+# Send X-Debug-Timing on every response, not only when the request asks for it
+DEBUG_TIMING = bool((APP_CONFIG.get('metrics', {}) or {}).get('debug_timing', False))
+# Browsers may reuse enum lists this long without asking again
+ENUM_MAX_AGE_SECONDS = int((APP_CONFIG.get('http_cache', {}) or {}).get('enum_max_age_seconds', 3600))
+# Upper bound for the ``limit`` query parameter of the supplier listings
+MAX_PAGE_SIZE = 1000
+HTTP_SECONDS = Histogram('supplier_tool_http_request_seconds', 'Request latency per endpoint.', ['endpoint', 'method', 'status'])
 
 def _load_bourrienne_defaults():
     cfg = load_yaml(BOURRIENNE_CONFIG_PATH) if os.path.exists(BOURRIENNE_CONFIG_PATH) else {}
@@ -44,23 +78,6 @@ def _determine_spinning_type(material_id):
         return synthetic_spin
     return natural_spin
 
-# Simple in-memory cache for enums
-_ENUM_CACHE = {}
-_ENUM_TTL_SECONDS = int(os.environ.get('ENUM_CACHE_TTL_SECONDS', 6 * 60 * 60))  # 6h default
-
-def _cache_get(key):
-    item = _ENUM_CACHE.get(key)
-    if not item:
-        return None
-    data, ts = item
-    if (time.time() - ts) > _ENUM_TTL_SECONDS:
-        _ENUM_CACHE.pop(key, None)
-        return None
-    return data
-
-def _cache_set(key, data):
-    _ENUM_CACHE[key] = (data, time.time())
-
 PREFERRED_FIELD_ORDER = [
     'supplier',
     'fabricName',
@@ -115,7 +132,7 @@ def _to_bool(value):
         return value.strip().lower() in {'1','true','yes','y'}
     return bool(value)
 
-def normalize_supplier(raw: dict) -> OrderedDict:
+def normalize_supplier(raw: dict) -> dict:
     s = dict(raw or {})
     for k in ['price_eur_per_m', 'moq_m', 'weight_gm2', 'price', 'gross_width', 'lead_time_weeks', 'fabric_lead_time_weeks']:
         if k in s:
@@ -151,44 +168,115 @@ def normalize_supplier(raw: dict) -> OrderedDict:
             s['businessSize'] = BOURRIENNE_DEFAULTS.get('business_size', s.get('businessSize'))
         if not s.get('dyeingProcess'):
             s['dyeingProcess'] = BOURRIENNE_DEFAULTS.get('dyeing_process', s.get('dyeingProcess'))
-    ordered_items = []
-    for key in PREFERRED_FIELD_ORDER:
-        if key in s:
-            ordered_items.append((key, s[key]))
-    for key in s.keys():
-        if key not in dict(ordered_items):
-            ordered_items.append((key, s[key]))
-    return OrderedDict(ordered_items)
-
-def _to_plain(obj):
-    if isinstance(obj, OrderedDict):
-        return {k: _to_plain(v) for k, v in obj.items()}
-    if isinstance(obj, dict):
-        return {k: _to_plain(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_to_plain(v) for v in obj]
-    return obj
+    # Known fields first, in form order; update() appends the remaining keys in input order
+    ordered = {key: s[key] for key in PREFERRED_FIELD_ORDER if key in s}
+    ordered.update(s)
+    return ordered
+
+# Lists served from the shared on-disk cache; the others are static
+CACHED_ENUMS = {
+    'products': EcobalyseClient.fetch_products,
+    'materials': EcobalyseClient.fetch_materials,
+    'countries': EcobalyseClient.fetch_countries,
+    'trims': EcobalyseClient.fetch_trims,
+}
+STATIC_ENUMS = {
+    'fabricProcess': EcobalyseClient.fetch_fabric_processes,
+    'makingComplexity': EcobalyseClient.fetch_making_complexities,
+    'materialSpinning': EcobalyseClient.fetch_material_spinning_types,
+    'businessSize': EcobalyseClient.fetch_business_size,
+    'dyeingProcess': EcobalyseClient.fetch_dyeing_process_types,
+}
+_enum_cache = None
+_enum_cache_lock = threading.Lock()
+
+def get_enum_cache() -> EnumCache:
+    """Shared enum cache, warmed from the bundled snapshots when first created."""
+    global _enum_cache
+    with _enum_cache_lock:
+        if _enum_cache is None:
+            cache = enum_cache_from_config(get_scoring_context(CONFIG_ROOT).ecoconfig, CONFIG_ROOT)
+            cache.warm(list(CACHED_ENUMS), BASE_API_URL)
+            _enum_cache = cache
+    return _enum_cache
 
 def get_enum_response(enum):
-    # Serve from cache if present
-    cached = _cache_get(enum)
-    if cached is not None:
-        return cached
-    fetch_map = {
-        'products': EcobalyseClient.fetch_products,
-        'materials': EcobalyseClient.fetch_materials,
-        'countries': EcobalyseClient.fetch_countries,
-        'trims': EcobalyseClient.fetch_trims,
-        'fabricProcess': EcobalyseClient.fetch_fabric_processes,
-        'makingComplexity': EcobalyseClient.fetch_making_complexities,
-        'materialSpinning': EcobalyseClient.fetch_material_spinning_types,
-        'businessSize': EcobalyseClient.fetch_business_size,
-        'dyeingProcess': EcobalyseClient.fetch_dyeing_process_types,
-    }
-    fn = fetch_map.get(enum)
-    data = fn(BASE_API_URL) or [] if fn else []
-    _cache_set(enum, data)
-    return data
+    if enum in STATIC_ENUMS:
+        return STATIC_ENUMS[enum](BASE_API_URL)
+    fn = CACHED_ENUMS.get(enum)
+    if fn is None:
+        return []
+    return get_enum_cache().get(enum, BASE_API_URL, lambda: fn(BASE_API_URL))
+
+# --------- Request timing ---------
+
+@app.before_request
+def _start_request_timing():
+    g.timings = RequestTimings()
+    current_timings.set(g.timings)
+
+@app.after_request
+def _record_request_timing(response):
+    # Streamed bodies are still being produced here: their time is not included
+    timings = g.get('timings')
+    if timings is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_SECONDS.observe(time.perf_counter() - timings.started, endpoint=endpoint,
+                             method=request.method, status=response.status_code)
+        if DEBUG_TIMING or request.headers.get('X-Debug-Timing'):
+            response.headers['X-Debug-Timing'] = timings.header()
+    return response
+
+@app.teardown_request
+def _end_request_timing(exc):
+    current_timings.set(None)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+# --------- Conditional requests ---------
+
+def _read_etag():
+    """Strong ETag of a read: request URL, store version, config files, API version and app version.
+
+    Also the number of failed scores due for a retry: a backoff running out changes
+    no stored value, but the next read must queue the retry rather than get a 304.
+    """
+    context = get_scoring_context(CONFIG_ROOT)
+    repository = get_repository()
+    key = '\n'.join([
+        request.full_path,
+        str(repository.version()),
+        context.version,
+        context.payload_version,
+        str(APP_CONFIG.get('version', '')),
+        str(retries_due(repository, CONFIG_ROOT, context=context)),
+    ])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+def conditional_read(view):
+    """Answer ``If-None-Match`` with 304 before doing any work, and tag complete responses.
+
+    Responses that still have pending scores (``X-Scoring-Job``) are not tagged, so
+    the next request re-checks them instead of being served from the browser cache.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = _read_etag()
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        response = app.make_response(view(*args, **kwargs))
+        if response.status_code == 200 and 'X-Scoring-Job' not in response.headers:
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+        else:
+            response.headers['Cache-Control'] = 'no-store'
+        return response
+    return wrapper
 
 # --------- Pages ---------
 @app.route('/')
@@ -204,6 +292,13 @@ def static_files(filename):
 # --------- Enum API ---------
 @app.route('/api/enums/<enum_name>')
 def get_enum(enum_name):
+    # Enums are small and already cached: tag them by content
+    response = _enum_response(enum_name)
+    response.headers['Cache-Control'] = f'public, max-age={ENUM_MAX_AGE_SECONDS}'
+    response.add_etag()
+    return response.make_conditional(request)
+
+def _enum_response(enum_name):
     # For products, return only the garment_types from bourrienne.yaml
     # This ensures we have exactly what's configured, not what the API returns
     if enum_name == 'products':
@@ -223,230 +318,561 @@ def get_enum(enum_name):
     return jsonify(data)
 
 # --------- Suppliers API ---------
+_repository = None
+
+def get_repository() -> SupplierRepository:
+    """Process-wide supplier store; seeded from SUPPLIERS_YAML the first time it is created."""
+    global _repository
+    if _repository is None:
+        repo = SQLiteSupplierRepository(SUPPLIERS_DB)
+        seeded = repo.seed_from_yaml(SUPPLIERS_YAML)
+        if seeded:
+            print(f"Imported {seeded} suppliers from {SUPPLIERS_YAML} into {SUPPLIERS_DB}")
+        _repository = repo
+    return _repository
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    """Process-wide job queue; starts in-process worker threads unless jobs.mode is 'external'."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            cfg = jobs_config(CONFIG_ROOT)
+            queue = JobQueue(DEFAULT_QUEUE_PATH, lease_seconds=float(cfg.get('lease_seconds', 600)),
+                             max_attempts=int(cfg.get('max_attempts', 3)))
+            if cfg.get('mode', 'thread') == 'thread':
+                start_worker_threads(queue, get_repository(), CONFIG_ROOT,
+                                     count=int(cfg.get('workers', 2)),
+                                     poll_interval=float(cfg.get('poll_interval_seconds', 1.0)))
+            _job_queue = queue
+    return _job_queue
+
+def _list_rows(**filters):
+    with stage('store_read'):
+        return get_repository().list(**filters)
+
+def _supplier_query():
+    """SupplierQuery from the query string; raises ValueError on bad parameters.
+
+    ``product``, ``supplier``, ``fabricName``, ``certification`` (repeatable or
+    comma-separated, all required), ``material`` (material id substring),
+    ``sort`` (``-`` prefix for descending), ``limit`` and ``cursor``.
+    """
+    args = request.args
+    sort = args.get('sort') or 'id'
+    limit = args.get('limit')
+    if limit is not None:
+        try:
+            limit = min(int(limit), MAX_PAGE_SIZE)
+        except ValueError:
+            raise ValueError('limit must be an integer')
+    certifications = tuple(c.strip() for value in args.getlist('certification') for c in value.split(',') if c.strip())
+    return SupplierQuery(
+        product=args.get('product') or None,
+        supplier=args.get('supplier') or None,
+        fabric_name=args.get('fabricName') or None,
+        certifications=certifications,
+        material=args.get('material') or None,
+        sort=sort.lstrip('-'),
+        descending=sort.startswith('-'),
+        limit=limit,
+        cursor=args.get('cursor') or None,
+    )
+
+def _query_rows():
+    """``(rows, next_cursor)`` for the request's filters and page."""
+    query = _supplier_query()
+    with stage('store_read'):
+        return get_repository().query(query)
+
+def _iter_query_rows(query, page_size=200):
+    """Every row matching ``query``'s filters from its cursor on, read a page at a time."""
+    query = dataclasses.replace(query, limit=page_size)
+    while True:
+        rows, next_cursor = get_repository().query(query)
+        yield from rows
+        if next_cursor is None:
+            return
+        query = dataclasses.replace(query, cursor=next_cursor)
+
+# Status keys a projection never drops: without them a trimmed record would read as scored
+_ALWAYS_PROJECTED = {'id', 'error', 'pending', 'score_error'}
+
+def _projection():
+    """Keys to keep from ``fields=``, or None when every key is kept."""
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    return _ALWAYS_PROJECTED | {f.strip() for f in fields.split(',') if f.strip()}
+
+def _project(records):
+    """Keep only the ``fields=`` of each record (plus ``id`` and the pending/error status)."""
+    keep = _projection()
+    if keep is None:
+        return records
+    return [{k: v for k, v in record.items() if k in keep} for record in records]
+
+def _page_response(records, next_cursor):
+    response = jsonify(_project(records))
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
 @app.route('/api/suppliers', methods=['POST'])
 def save_supplier():
     supplier = request.get_json()
     supplier = normalize_supplier(supplier)
-    if os.path.exists(SUPPLIERS_YAML):
-        with open(SUPPLIERS_YAML) as yf:
-            existing = yaml.safe_load(yf) or []
-    else:
-        existing = []
-    if isinstance(existing, dict) and 'suppliers' in existing:
-        existing['suppliers'].append(supplier)
-        to_dump = existing
-    elif isinstance(existing, list):
-        existing.append(supplier)
-        to_dump = existing
-    else:
-        to_dump = [supplier]
-    to_dump_plain = _to_plain(to_dump)
-    with open(SUPPLIERS_YAML, 'w', encoding='utf-8') as yf:
-        yaml.safe_dump(to_dump_plain, yf, allow_unicode=True, sort_keys=False, default_flow_style=False)
-    return jsonify({'status': 'ok'})
+    supplier_id = get_repository().add(supplier)
+    job_id = enqueue_scoring(get_job_queue(), [supplier_id])
+    return jsonify({'status': 'ok', 'id': supplier_id, 'job_id': job_id})
 
 @app.route('/api/suppliers/all')
+@conditional_read
 def list_suppliers():
-    if os.path.exists(SUPPLIERS_YAML):
-        data = load_yaml(SUPPLIERS_YAML) or []
-    else:
-        data = []
-    return jsonify(data)
+    """Stored records; see ``_supplier_query`` for filters and paging, ``fields=`` for projection."""
+    try:
+        rows, next_cursor = _query_rows()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return _page_response(rows, next_cursor)
 
-@app.route('/api/suppliers/<int:index>', methods=['DELETE'])
-def delete_supplier(index):
-    if os.path.exists(SUPPLIERS_YAML):
-        with open(SUPPLIERS_YAML) as yf:
-            existing = yaml.safe_load(yf) or []
-    else:
-        return jsonify({'error': 'No suppliers file'}), 404
-    
-    if isinstance(existing, dict) and 'suppliers' in existing:
-        suppliers_list = existing['suppliers']
-    elif isinstance(existing, list):
-        suppliers_list = existing
-    else:
-        suppliers_list = []
-    
-    if index < 0 or index >= len(suppliers_list):
-        return jsonify({'error': 'Invalid index'}), 404
-    
-    suppliers_list.pop(index)
-    
-    if isinstance(existing, dict):
-        to_dump = existing
-    else:
-        to_dump = suppliers_list
-    
-    to_dump_plain = _to_plain(to_dump)
-    with open(SUPPLIERS_YAML, 'w', encoding='utf-8') as yf:
-        yaml.safe_dump(to_dump_plain, yf, allow_unicode=True, sort_keys=False, default_flow_style=False)
+@app.route('/api/suppliers/bulk', methods=['POST'])
+def bulk_import_suppliers():
+    """Add many suppliers from a CSV, XLSX or YAML file in one transaction.
+
+    Send the file as multipart ``file`` or as the request body (format from the file
+    name, ``?format=`` or Content-Type). ``?dry_run=1`` only validates;
+    ``?partial=1`` imports the valid rows even when others fail.
+    """
+    upload = request.files.get('file')
+    fileobj = upload.stream if upload is not None else io.BufferedReader(request.stream)
+    try:
+        fmt = request.args.get('format') or detect_format(upload.filename if upload is not None else None,
+                                                          upload.mimetype if upload is not None else request.content_type)
+        rows = iter_rows(fileobj, fmt)
+        with stage('bulk_import'):
+            report = bulk_import(get_repository(), rows, normalize_supplier,
+                                 products=BOURRIENNE_DEFAULTS.get('garment_types') or (),
+                                 partial=_to_bool(request.args.get('partial', '')),
+                                 dry_run=_to_bool(request.args.get('dry_run', '')))
+    except (ValueError, csv.Error) as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+    result = report.to_dict()
+    result['job_id'] = enqueue_scoring(get_job_queue(), report.imported_ids) if report.imported_ids else None
+    result['status'] = 'ok' if report.ok else 'partial' if report.imported_ids else 'error'
+    return jsonify(result), (200 if report.ok or report.imported_ids or report.dry_run else 422)
+
+EXPORT_COLUMNS = ['id'] + PREFERRED_FIELD_ORDER + list(EXPORT_SCORE_COLUMNS)
+
+def _impact_columns():
+    """Stored impact columns asked for with ``impacts=cch,wtu`` (``impacts=all`` for every one)."""
+    raw = request.args.get('impacts')
+    if not raw:
+        return []
+    if raw == 'all':
+        store = get_scoring_context(CONFIG_ROOT).impact_store
+        return store.columns() if store is not None else []
+    return [name.strip() for name in raw.split(',') if name.strip()]
+
+def _lookup_impacts(records, columns):
+    with stage('impact_read'):
+        return impacts_for_records(records, get_scoring_context(CONFIG_ROOT), columns)
+
+def _export_records():
+    """``(records, columns)`` for the export endpoints, with any requested impact columns."""
+    score_version = get_scoring_context(CONFIG_ROOT).payload_version
+    records = iter_scored_records(get_repository(), score_version, product=request.args.get('product') or None)
+    impacts = _impact_columns()
+    if not impacts:
+        return records, EXPORT_COLUMNS
+    return with_impacts(records, impacts, _lookup_impacts), EXPORT_COLUMNS + impact_column_names(impacts)
+
+@app.route('/api/suppliers/export.yaml')
+def export_suppliers_yaml():
+    """Download the store in the suppliers_min.yaml format (streamed, IDs and scores left out)."""
+    rows = get_repository().iter_records(product=request.args.get('product') or None)
+    chunks = iter_yaml(yaml_row(row) for row in rows)
+    return Response(stream_with_context(chunks), mimetype='application/x-yaml',
+                    headers={'Content-Disposition': 'attachment; filename=suppliers.yaml'})
+
+@app.route('/api/suppliers/export.csv')
+def export_suppliers_csv():
+    """Download the store with stored Ecobalyse scores as CSV (streamed).
+
+    ``impacts=cch,wtu`` (or ``all``) adds stored impact columns, see ``_impact_columns``.
+    """
+    records, columns = _export_records()
+    chunks = iter_csv(records, columns)
+    return Response(stream_with_context(chunks), mimetype='text/csv',
+                    headers={'Content-Disposition': 'attachment; filename=suppliers.csv'})
+
+@app.route('/api/suppliers/export.xlsx')
+def export_suppliers_xlsx():
+    """Download the store with stored Ecobalyse scores as an XLSX workbook.
+
+    Rows are written to a temporary file in openpyxl's write-only mode, then sent.
+    """
+    spool = tempfile.TemporaryFile()
+    try:
+        records, columns = _export_records()
+        export_catalog(records, 'xlsx', columns, spool)
+    except RuntimeError as e:
+        spool.close()
+        return jsonify({'error': str(e)}), 501
+    size = spool.tell()
+    spool.seek(0)
+
+    def generate():
+        with spool:
+            while True:
+                chunk = spool.read(64 * 1024)
+                if not chunk:
+                    return
+                yield chunk
+
+    return Response(generate(), mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                    headers={'Content-Disposition': 'attachment; filename=suppliers.xlsx',
+                             'Content-Length': str(size)})
+
+@app.route('/api/suppliers/<int:supplier_id>', methods=['DELETE'])
+def delete_supplier(supplier_id):
+    if not get_repository().delete(supplier_id):
+        return jsonify({'error': 'Invalid supplier id'}), 404
     return jsonify({'status': 'ok'})
 
-@app.route('/api/suppliers/<int:index>', methods=['PUT'])
-def update_supplier(index):
+@app.route('/api/suppliers/<int:supplier_id>', methods=['PUT'])
+def update_supplier(supplier_id):
     supplier = request.get_json()
     supplier = normalize_supplier(supplier)
-    
-    if os.path.exists(SUPPLIERS_YAML):
-        with open(SUPPLIERS_YAML) as yf:
-            existing = yaml.safe_load(yf) or []
-    else:
-        return jsonify({'error': 'No suppliers file'}), 404
-    
-    if isinstance(existing, dict) and 'suppliers' in existing:
-        suppliers_list = existing['suppliers']
-    elif isinstance(existing, list):
-        suppliers_list = existing
-    else:
-        suppliers_list = []
-    
-    if index < 0 or index >= len(suppliers_list):
-        return jsonify({'error': 'Invalid index'}), 404
-    
-    suppliers_list[index] = supplier
-    
-    if isinstance(existing, dict):
-        to_dump = existing
-    else:
-        to_dump = suppliers_list
-    
-    to_dump_plain = _to_plain(to_dump)
-    with open(SUPPLIERS_YAML, 'w', encoding='utf-8') as yf:
-        yaml.safe_dump(to_dump_plain, yf, allow_unicode=True, sort_keys=False, default_flow_style=False)
-    return jsonify({'status': 'ok'})
+    if not get_repository().update(supplier_id, supplier):
+        return jsonify({'error': 'Invalid supplier id'}), 404
+    # Only rescored if a payload-relevant field changed
+    job_id = None
+    state = get_repository().score_states([supplier_id]).get(supplier_id)
+    if state is None or state.dirty:
+        job_id = enqueue_scoring(get_job_queue(), [supplier_id])
+    return jsonify({'status': 'ok', 'job_id': job_id})
 
 # --------- Scoring API ---------
 
-def _row_to_supplier(row: dict) -> Supplier:
-    certs = row.get('certifications') or []
-    if isinstance(certs, str):
-        certs = [c.strip() for c in certs.split(';') if c.strip()]
-    return Supplier(
-        supplier=row.get('supplier', ''),
-        fabricName=row.get('fabricName'),
-        price_eur_per_m=float(row.get('price_eur_per_m', 0.0)),
-        lead_time_weeks=float(row.get('lead_time_weeks', 0.0)),
-        fabric_lead_time_weeks=float(row.get('fabric_lead_time_weeks', 0.0)) if row.get('fabric_lead_time_weeks') is not None else None,
-        moq_m=float(row.get('moq_m', 0.0)),
-        stock_service=bool(row.get('stock_service', False)),
-        fibre_origin=row.get('fibre_origin'),
-        yarn_origin=row.get('yarn_origin'),
-        fabric_origin=row.get('fabric_origin'),
-        dye_origin=row.get('dye_origin'),
-        sewing_origin=row.get('sewing_origin'),
-        certifications=certs,
-        documentation_level=str(row.get('documentation_level','none')),
-        material_origin=row.get('material_origin'),
-        countrySpinning=row.get('countrySpinning'),
-        countryFabric=row.get('countryFabric'),
-        countryDyeing=row.get('countryDyeing'),
-        countryMaking=row.get('countryMaking'),
-        fabricProcess=row.get('fabricProcess'),
-        makingComplexity=row.get('makingComplexity'),
-        dyeingProcess=row.get('dyeingProcess'),
-        businessSize=row.get('businessSize'),
-        numberOfReferences=row.get('numberOfReferences'),
-        price=row.get('price'),
-        weight_gm2=row.get('weight_gm2'),
-        gross_width=row.get('gross_width'),
-        product=row.get('product')
-    )
+def _score_rows(rows):
+    """Answer rows from materialized scores without calling the simulator.
+
+    Rows without a current score are flagged ``stale`` and queued for background
+    scoring, except those whose last attempt failed and whose retry backoff has not
+    passed (reported as unavailable). Returns ``(results, job_id)``; ``job_id`` is
+    None when nothing is pending.
+    """
+    results = score_rows(rows, get_repository(), CONFIG_ROOT, rescore=False)
+    pending_ids = [item.row['id'] for item in results if item.pending and item.row.get('id') is not None]
+    job_id = enqueue_scoring(get_job_queue(), pending_ids) if pending_ids else None
+    return results, job_id
+
+def _with_job_header(response, job_id):
+    if job_id is not None:
+        response.headers['X-Scoring-Job'] = str(job_id)
+    return response
 
 @app.route('/api/scores')
+@conditional_read
 def compute_scores():
-    if not os.path.exists(SUPPLIERS_YAML):
-        return jsonify([])
-    data = load_yaml(SUPPLIERS_YAML) or []
+    rows = _list_rows()
     results = []
-    for row in (data if isinstance(data, list) else data.get('suppliers', [])):
-        try:
-            s = _row_to_supplier(row)
-            score_result = final_csr_score(s, CONFIG_ROOT)
-            if score_result is None:
-                results.append({
-                    'supplier': s.supplier,
-                    'ecobalyse_score': None,
-                    'final_csr_score': None,
-                    'error': 'Ecobalyse score unavailable'
-                })
-            else:
-                eco, final_score = score_result
-                results.append({
-                    'supplier': s.supplier,
-                    'ecobalyse_score': eco,
-                    'final_csr_score': final_score
-                })
-        except Exception as e:
-            results.append({ 'supplier': row.get('supplier','(unknown)'), 'error': str(e) })
-    return jsonify(results)
+    scored, job_id = _score_rows(rows)
+    for item in scored:
+        if item.supplier is None or item.error is not None:
+            results.append({ 'supplier': item.row.get('supplier','(unknown)'), 'error': item.error })
+            continue
+        s = item.supplier
+        if item.pending:
+            results.append({
+                'supplier': s.supplier,
+                'ecobalyse_score': None,
+                'final_csr_score': None,
+                'pending': True,
+                'error': 'Ecobalyse score pending'
+            })
+        elif item.stale:
+            results.append({
+                'supplier': s.supplier,
+                'ecobalyse_score': None,
+                'final_csr_score': None,
+                'error': 'Ecobalyse score unavailable'
+            })
+        else:
+            results.append({
+                'supplier': s.supplier,
+                'ecobalyse_score': item.ecobalyse_score,
+                'final_csr_score': item.final_score
+            })
+    return _with_job_header(jsonify(results), job_id)
+
+def _radar_records(rows):
+    """Build radar records from stored scores (rows that fail carry an 'error' key).
+
+    Returns ``(records, job_id)``; records whose score is still being computed have
+    ``pending: True`` and ``ecobalyse_score: None``, those whose scoring failed
+    ``pending: False`` and a ``score_error``.
+    """
+    scored, job_id = _score_rows(rows)
+    with stage('radar_build'):
+        return [_radar_item(item) for item in scored], job_id
+
+def _radar_item(item):
+    """Radar record for one scored row, or an error record naming the supplier."""
+    row = item.row
+    if item.supplier is not None and item.error is None:
+        record = _radar_record(row.get('id'), item.supplier, item.ecobalyse_score)
+        record['pending'] = item.pending
+        if item.stale and not item.pending:
+            record['score_error'] = item.failure or 'Ecobalyse score unavailable'
+        return record
+    # Include supplier name even if scoring fails
+    print(f"Error processing supplier {row.get('supplier', '(unknown)')}: {item.error}")
+    return {
+        'id': row.get('id'),
+        'supplier': row.get('supplier', '(unknown)'),
+        'error': item.error,
+        'ecobalyse_score': None
+    }
+
+def _attach_impacts(records, rows):
+    """Add ``impacts: {name: value}`` from the impact store when ``impacts=`` is given (no simulator calls)."""
+    columns = _impact_columns()
+    if not columns:
+        return
+    values = _lookup_impacts(rows, columns)
+    for i, record in enumerate(records):
+        record['impacts'] = {name: (None if math.isnan(values[name][i]) else float(values[name][i])) for name in columns}
 
 @app.route('/api/suppliers/for-radar')
+@conditional_read
 def suppliers_for_radar():
-    """Return suppliers with all data needed for radar chart scoring"""
-    if not os.path.exists(SUPPLIERS_YAML):
-        print(f"Suppliers file not found at: {SUPPLIERS_YAML}")
-        return jsonify([])
-    data = load_yaml(SUPPLIERS_YAML) or []
-    if not data:
-        print(f"Suppliers file is empty or failed to load: {SUPPLIERS_YAML}")
-        return jsonify([])
-    suppliers_list = data if isinstance(data, list) else data.get('suppliers', [])
+    """Return suppliers with all data needed for radar chart scoring
+
+    Accepts the same filters, paging and ``fields=`` as /api/suppliers/all; only the
+    requested page is scored. ``impacts=cch,wtu`` adds stored impacts for extra axes.
+    """
+    try:
+        suppliers_list, next_cursor = _query_rows()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     if not suppliers_list:
-        print(f"No suppliers found in data. Data type: {type(data)}, Data: {data}")
+        print(f"No suppliers found in store: {SUPPLIERS_DB}")
         return jsonify([])
-    results = []
-    
-    for row in suppliers_list:
+    records, job_id = _radar_records(suppliers_list)
+    _attach_impacts(records, suppliers_list)
+    return _with_job_header(_page_response(records, next_cursor), job_id)
+
+@app.route('/api/suppliers/for-radar/stream')
+def suppliers_for_radar_stream():
+    """NDJSON variant of for-radar: one record per line, sent as soon as its score is known.
+
+    Accepts the same filters, paging and ``fields=`` as /api/suppliers/for-radar; without
+    ``limit`` every match is sent. Stored scores are sent first; stale suppliers are
+    scored inline and sent as the simulator answers, so lines do not follow sort order.
+    """
+    try:
+        query = _supplier_query()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    if query.limit is not None:
+        # One page: read it up front so the next cursor can go in the headers
+        with stage('store_read'):
+            rows, next_cursor = get_repository().query(query)
+        if next_cursor is not None:
+            headers['X-Next-Cursor'] = next_cursor
+    else:
+        rows = _iter_query_rows(query)
+    keep = _projection()
+
+    def generate():
+        for item in iter_score_rows(rows, get_repository(), CONFIG_ROOT):
+            record = _radar_item(item)
+            if keep is not None:
+                record = {k: v for k, v in record.items() if k in keep}
+            yield json.dumps(record, ensure_ascii=False) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson', headers=headers)
+
+@app.route('/api/rankings')
+def supplier_rankings():
+    """Weighted recommendations per material group, ranked server-side.
+
+    Query: ``product`` (garment type), ``category`` (material group, e.g. cotton) and
+    ``weights`` as ``ecobalyse:30,transparency:20,price:20,leadTime:10,moq:10,certifications:10``.
+    """
+    try:
+        weights = parse_weights(request.args.get('weights'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    rows = _list_rows(product=request.args.get('product') or None)
+    records, job_id = _radar_records(rows)
+    with stage('ranking'):
+        groups = rank_by_category(records, weights, category=request.args.get('category') or None)
+    return _with_job_header(jsonify({
+        'weights': weights,
+        'pending': any(r.get('pending') for r in records),
+        'groups': [{'category': name, 'ranking': ranking} for name, ranking in groups.items()],
+    }), job_id)
+
+@app.route('/api/pareto')
+def supplier_pareto():
+    """Non-dominated suppliers per garment type, as dominance layers (best first).
+
+    Query: ``product`` (garment type) and ``layers`` (keep only the first N layers).
+    Layer 1 holds the suppliers no other beats on every radar axis; see ``src.scoring.pareto``.
+    """
+    max_layers = request.args.get('layers')
+    if max_layers is not None:
         try:
-            s = _row_to_supplier(row)
-            # Get Ecobalyse score
-            score_result = final_csr_score(s, CONFIG_ROOT)
-            ecobalyse_score = score_result[0] if score_result else None
-            
-            # Get product type from supplier or assumptions
-            assumptions = BOURRIENNE_DEFAULTS or {}
-            product_type = s.product or assumptions.get("default_product", "tshirt")
-            
-            # Build supplier data with all fields needed for radar chart and supplier list
-            supplier_data = {
-                'supplier': s.supplier,
-                'fabricName': s.fabricName,
-                'price_eur_per_m': s.price_eur_per_m,
-                'lead_time_weeks': s.lead_time_weeks,
-                'fabric_lead_time_weeks': s.fabric_lead_time_weeks,
-                'moq_m': s.moq_m,
-                'ecobalyse_score': ecobalyse_score,
-                'product': product_type,
-                'material_origin': s.material_origin,
-                'countrySpinning': s.countrySpinning,
-                'countryFabric': s.countryFabric,
-                'countryDyeing': s.countryDyeing,
-                'countryMaking': s.countryMaking,
-                'fabricProcess': s.fabricProcess,
-                'dyeingProcess': s.dyeingProcess,
-                'certifications': s.certifications or [],
-                # Additional fields for supplier list display
-                'weight_gm2': s.weight_gm2,
-                'gross_width': s.gross_width,
-                'price': s.price,
-                'numberOfReferences': s.numberOfReferences,
-                'businessSize': s.businessSize,
-                'makingComplexity': s.makingComplexity
-            }
-            results.append(supplier_data)
-        except Exception as e:
-            # Include supplier name even if scoring fails
-            print(f"Error processing supplier {row.get('supplier', '(unknown)')}: {e}")
-            import traceback
-            traceback.print_exc()
-            results.append({
-                'supplier': row.get('supplier', '(unknown)'),
-                'error': str(e),
-                'ecobalyse_score': None
-            })
-    
-    return jsonify(results)
+            max_layers = int(max_layers)
+        except ValueError:
+            return jsonify({'error': 'layers must be an integer'}), 400
+        if max_layers < 1:
+            return jsonify({'error': 'layers must be at least 1'}), 400
+    product = request.args.get('product') or None
+    rows = _list_rows(product=product)
+    records, job_id = _radar_records(rows)
+    with stage('pareto'):
+        groups = pareto_by_product(records, product=product, max_layers=max_layers)
+    return _with_job_header(jsonify({
+        'axes': list(PARETO_AXES),
+        'pending': any(r.get('pending') for r in records),
+        'groups': [{'product': name, 'layers': layers} for name, layers in groups.items()],
+    }), job_id)
+
+@app.route('/api/scenarios', methods=['POST'])
+def supplier_scenarios():
+    """What-if comparison for one supplier under a grid of Ecobalyse overrides.
+
+    Body: ``{"supplier_id": 3}`` or ``{"supplier": {...form fields...}}``, plus
+    ``overrides`` such as ``{"countryMaking": ["Portugal", "Chine"], "dyeingProcess": ["continuous"]}``.
+    Rows are sorted lowest impact first; see ``src.scoring.scenarios``.
+    """
+    body = request.get_json(silent=True) or {}
+    if body.get('supplier_id') is not None:
+        row = get_repository().get(body['supplier_id'])
+        if row is None:
+            return jsonify({'error': 'Invalid supplier id'}), 404
+    elif isinstance(body.get('supplier'), dict):
+        row = normalize_supplier(body['supplier'])
+    else:
+        return jsonify({'error': 'supplier_id or supplier is required'}), 400
+    overrides = body.get('overrides') or {}
+    if not isinstance(overrides, dict):
+        return jsonify({'error': 'overrides must be an object'}), 400
+    try:
+        supplier = supplier_from_row(row)
+        with stage('scenarios'):
+            results = run_scenarios(supplier, overrides, CONFIG_ROOT)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'supplier': supplier.supplier,
+        'scenarios': [result.to_dict() for result in results],
+    })
+
+def _radar_record(supplier_id, s: Supplier, ecobalyse_score):
+    """Build supplier data with all fields needed for radar chart and supplier list"""
+    # Get product type from supplier or assumptions
+    assumptions = BOURRIENNE_DEFAULTS or {}
+    product_type = s.product or assumptions.get("default_product", "tshirt")
+    return {
+        'id': supplier_id,
+        'supplier': s.supplier,
+        'fabricName': s.fabricName,
+        'price_eur_per_m': s.price_eur_per_m,
+        'lead_time_weeks': s.lead_time_weeks,
+        'fabric_lead_time_weeks': s.fabric_lead_time_weeks,
+        'moq_m': s.moq_m,
+        'ecobalyse_score': ecobalyse_score,
+        'product': product_type,
+        'material_origin': s.material_origin,
+        'countrySpinning': s.countrySpinning,
+        'countryFabric': s.countryFabric,
+        'countryDyeing': s.countryDyeing,
+        'countryMaking': s.countryMaking,
+        'fabricProcess': s.fabricProcess,
+        'dyeingProcess': s.dyeingProcess,
+        'certifications': s.certifications or [],
+        # Additional fields for supplier list display
+        'weight_gm2': s.weight_gm2,
+        'gross_width': s.gross_width,
+        'price': s.price,
+        'numberOfReferences': s.numberOfReferences,
+        'businessSize': s.businessSize,
+        'makingComplexity': s.makingComplexity
+    }
+
+# --------- Jobs API ---------
+
+@app.route('/api/jobs/<int:job_id>')
+def job_status(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    fields = ['id', 'kind', 'status', 'progress', 'total', 'result', 'error', 'created_at', 'started_at', 'finished_at']
+    return jsonify({k: job.get(k) for k in fields})
+
+# --------- Admin API ---------
+
+def admin_only(view):
+    """Require ``X-Admin-Token: $ADMIN_TOKEN``; without a configured token the route is disabled."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({'error': 'Admin API disabled (set ADMIN_TOKEN)'}), 404
+        token = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+            return jsonify({'error': 'Forbidden'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/api/admin/ecobalyse', methods=['GET'])
+@admin_only
+def ecobalyse_http_metrics():
+    """Simulator call counters (requests, retries, failures) and circuit breaker state."""
+    return jsonify(http_metrics())
+
+@app.route('/api/admin/enums', methods=['GET'])
+@admin_only
+def enum_cache_stats():
+    """Cached reference lists: last successful fetch, expiry and consecutive failures."""
+    return jsonify(get_enum_cache().stats())
+
+@app.route('/api/admin/impacts', methods=['GET'])
+@admin_only
+def impact_store_stats():
+    """Columnar impact store: compacted rows and columns, rows staged since."""
+    store = get_scoring_context(CONFIG_ROOT).impact_store
+    if store is None:
+        return jsonify({'error': 'Impact store disabled'}), 404
+    return jsonify(dict(store.stats(), column_names=store.columns()))
+
+def _score_cache():
+    return get_scoring_context(CONFIG_ROOT).score_cache
+
+@app.route('/api/admin/cache', methods=['GET'])
+@admin_only
+def score_cache_stats():
+    cache = _score_cache()
+    if cache is None:
+        return jsonify({'error': 'Score cache disabled'}), 404
+    return jsonify(cache.stats())
+
+@app.route('/api/admin/cache', methods=['DELETE'])
+@admin_only
+def invalidate_score_cache():
+    """Drop cached simulator scores: ?key=<fingerprint>, ?api_version=<v7.0.0>, or everything."""
+    cache = _score_cache()
+    if cache is None:
+        return jsonify({'error': 'Score cache disabled'}), 404
+    removed = cache.invalidate(key=request.args.get('key'), api_version=request.args.get('api_version'))
+    return jsonify({'status': 'ok', 'removed': removed})
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,168 @@
+"""
+Local SQLite-backed job queue shared by every gunicorn worker and by the
+standalone worker process (``python -m src.jobs.worker``).
+"""
+from contextlib import contextmanager
+from typing import Optional, Dict, Any
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+ACTIVE_STATUSES = ("queued", "running")
+DEFAULT_LEASE_SECONDS = 600  # a running job without progress for this long is handed to another worker
+DEFAULT_MAX_ATTEMPTS = 3  # claims before a job whose worker keeps dying is marked failed
+
+class JobQueue:
+    """Jobs are claimed by one worker at a time; ``update_progress``, ``finish`` and ``fail``
+    given the claiming ``worker`` only apply while that worker still holds the job."""
+
+    def __init__(self, path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = float(lease_seconds)
+        self.max_attempts = max(1, int(max_attempts))
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " kind TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " dedupe_key TEXT,"
+                " status TEXT NOT NULL,"
+                " progress INTEGER NOT NULL DEFAULT 0,"
+                " total INTEGER,"
+                " result TEXT,"
+                " error TEXT,"
+                " worker TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " started_at REAL,"
+                " updated_at REAL NOT NULL,"
+                " finished_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs(dedupe_key, status)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], total: int = None, dedupe_key: str = None) -> int:
+        """Queue a job; if an active job with the same ``dedupe_key`` exists, return its id instead."""
+        now = time.time()
+        with self._transaction() as conn:
+            if dedupe_key:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running') ORDER BY id LIMIT 1",
+                    (dedupe_key,),
+                ).fetchone()
+                if row:
+                    return row[0]
+            cur = conn.execute(
+                "INSERT INTO jobs(kind, payload, dedupe_key, status, total, created_at, updated_at)"
+                " VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (kind, json.dumps(payload), dedupe_key, total, now, now),
+            )
+            return cur.lastrowid
+
+    def claim(self, worker: str = None) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest queued job (or one whose running lease expired).
+
+        A job whose lease expired ``max_attempts`` times is marked failed instead.
+        """
+        worker = worker or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ?, finished_at = ?"
+                " WHERE status = 'running' AND updated_at < ? AND attempts >= ?",
+                (f"Gave up after {self.max_attempts} attempts: the worker stopped reporting progress",
+                 now, now, now - self.lease_seconds, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' OR (status = 'running' AND updated_at < ?)"
+                " ORDER BY id LIMIT 1",
+                (now - self.lease_seconds,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1,"
+                " started_at = COALESCE(started_at, ?), updated_at = ? WHERE id = ?",
+                (worker, now, now, row[0]),
+            )
+        return self.get(row[0])
+
+    @staticmethod
+    def _held_by(job_id: int, worker: Optional[str]):
+        """WHERE clause and parameters matching the job, only while ``worker`` holds it."""
+        if worker is None:
+            return "id = ?", [job_id]
+        return "id = ? AND status = 'running' AND worker = ?", [job_id, worker]
+
+    def update_progress(self, job_id: int, progress: int, total: int = None, worker: str = None) -> bool:
+        """Record progress (renewing the lease); False when ``worker`` no longer holds the job."""
+        where, params = self._held_by(job_id, worker)
+        return self._connect().execute(
+            f"UPDATE jobs SET progress = ?, total = COALESCE(?, total), updated_at = ? WHERE {where}",
+            [progress, total, time.time()] + params,
+        ).rowcount > 0
+
+    def finish(self, job_id: int, result: Any = None, worker: str = None) -> bool:
+        now = time.time()
+        where, params = self._held_by(job_id, worker)
+        return self._connect().execute(
+            "UPDATE jobs SET status = 'done', result = ?, progress = COALESCE(total, progress),"
+            f" updated_at = ?, finished_at = ? WHERE {where}",
+            [json.dumps(result), now, now] + params,
+        ).rowcount > 0
+
+    def fail(self, job_id: int, error: str, worker: str = None) -> bool:
+        now = time.time()
+        where, params = self._held_by(job_id, worker)
+        return self._connect().execute(
+            f"UPDATE jobs SET status = 'failed', error = ?, updated_at = ?, finished_at = ? WHERE {where}",
+            [error, now, now] + params,
+        ).rowcount > 0
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.row_factory = None
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def purge(self, older_than_seconds: float) -> int:
+        """Delete finished jobs older than the given age."""
+        cutoff = time.time() - older_than_seconds
+        return self._connect().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,)
+        ).rowcount
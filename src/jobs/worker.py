@@ -0,0 +1,129 @@
+"""
+Background job execution, either as daemon threads inside each web worker
+(``jobs.mode: thread`` in app.yaml) or as a separate process:
+
+    python -m src.jobs.worker [--workers 2]
+"""
+from typing import Dict, Any, List, Callable
+import argparse
+import hashlib
+import os
+import threading
+import time
+import traceback
+from ..utils.yaml_loader import load_yaml
+from ..api.rate_limit import BACKGROUND, priority
+from ..storage.repository import SupplierRepository
+from ..storage.sqlite_repository import SQLiteSupplierRepository, DEFAULT_DB_PATH
+from ..scoring.context import get_scoring_context
+from ..scoring.incremental import score_rows
+from .queue import JobQueue
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONFIG_ROOT = os.path.join(PROJECT_ROOT, "config")
+DEFAULT_QUEUE_PATH = os.environ.get("JOBS_DB") or os.path.join(PROJECT_ROOT, "data", "cache", "jobs.sqlite")
+
+def jobs_config(config_root: str = CONFIG_ROOT) -> Dict[str, Any]:
+    app_cfg = load_yaml(os.path.join(config_root, "app.yaml")) or {}
+    return app_cfg.get("jobs", {}) or {}
+
+def enqueue_scoring(queue: JobQueue, ids: List[int]) -> int:
+    """Queue a scoring job for the given supplier ids (reuses an identical active job)."""
+    ids = sorted(set(ids))
+    dedupe_key = "score_suppliers:" + hashlib.sha1(",".join(map(str, ids)).encode()).hexdigest()
+    return queue.enqueue("score_suppliers", {"ids": ids}, total=len(ids), dedupe_key=dedupe_key)
+
+def score_suppliers_job(job: Dict[str, Any], queue: JobQueue, repository: SupplierRepository, config_root: str):
+    """Score the job's suppliers chunk by chunk, materializing scores and reporting progress.
+
+    Simulator calls run in the background rate-limit lane, behind dashboard requests.
+    """
+    with priority(BACKGROUND):
+        return _score_suppliers(job, queue, repository, config_root)
+
+def _score_suppliers(job: Dict[str, Any], queue: JobQueue, repository: SupplierRepository, config_root: str):
+    ids = job["payload"].get("ids", [])
+    context = get_scoring_context(config_root)
+    chunk_size = max(1, int((context.ecoconfig.get("batch", {}) or {}).get("max_in_flight", 8)))
+    scored = failed = 0
+    for start in range(0, len(ids), chunk_size):
+        rows = repository.get_many(ids[start:start + chunk_size])
+        for item in score_rows(rows, repository, config_root, context=context):
+            if item.ecobalyse_score is not None:
+                scored += 1
+            else:
+                failed += 1
+        if not queue.update_progress(job["id"], min(start + chunk_size, len(ids)), len(ids), worker=job["worker"]):
+            break  # lease lost: another worker took the job over (scores saved so far are kept)
+    return {"scored": scored, "failed": failed}
+
+HANDLERS: Dict[str, Callable] = {
+    "score_suppliers": score_suppliers_job,
+}
+
+class JobWorker:
+    def __init__(self, queue: JobQueue, repository: SupplierRepository, config_root: str = CONFIG_ROOT,
+                 poll_interval: float = 1.0):
+        self.queue = queue
+        self.repository = repository
+        self.config_root = config_root
+        self.poll_interval = poll_interval
+
+    def run_once(self) -> bool:
+        """Run one job if available; returns False when the queue was empty."""
+        job = self.queue.claim()
+        if job is None:
+            return False
+        handler = HANDLERS.get(job["kind"])
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown job kind: {job['kind']}")
+            self.queue.finish(job["id"], handler(job, self.queue, self.repository, self.config_root),
+                              worker=job["worker"])
+        except Exception as e:
+            traceback.print_exc()
+            self.queue.fail(job["id"], str(e), worker=job["worker"])
+        return True
+
+    def run_forever(self, stop_event: threading.Event = None):
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            try:
+                if not self.run_once():
+                    stop_event.wait(self.poll_interval)
+            except Exception:
+                # Keep the worker alive through transient errors (e.g. a locked database)
+                traceback.print_exc()
+                stop_event.wait(self.poll_interval)
+
+def start_worker_threads(queue: JobQueue, repository: SupplierRepository, config_root: str = CONFIG_ROOT,
+                         count: int = 2, poll_interval: float = 1.0) -> List[threading.Thread]:
+    threads = []
+    for i in range(max(0, count)):
+        worker = JobWorker(queue, repository, config_root, poll_interval)
+        thread = threading.Thread(target=worker.run_forever, name=f"job-worker-{i}", daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
+
+def main(argv=None):
+    cfg = jobs_config()
+    parser = argparse.ArgumentParser(prog="python -m src.jobs.worker", description="Run background scoring jobs.")
+    parser.add_argument("--workers", type=int, default=int(cfg.get("workers", 2)))
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite supplier store")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="SQLite job queue")
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(args.queue, lease_seconds=float(cfg.get("lease_seconds", 600)),
+                     max_attempts=int(cfg.get("max_attempts", 3)))
+    repository = SQLiteSupplierRepository(args.db)
+    threads = start_worker_threads(queue, repository, CONFIG_ROOT, args.workers, float(cfg.get("poll_interval_seconds", 1.0)))
+    print(f"Job worker running with {len(threads)} threads (queue: {args.queue})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
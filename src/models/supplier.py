@@ -1,7 +1,30 @@
 from dataclasses import dataclass
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Dict, Iterable, Sequence
+import math
+import numpy as np
 
-@dataclass
+# Record fields that feed the Ecobalyse simulator payload (see scoring.ecobalyse_score._build_payload).
+# Edits to any other field (price_eur_per_m, lead_time_weeks, moq_m, ...) never change the score.
+PAYLOAD_FIELDS = (
+    'product',
+    'material_origin',
+    'fibre_origin',
+    'countrySpinning',
+    'countryFabric',
+    'countryDyeing',
+    'countryMaking',
+    'fabricProcess',
+    'makingComplexity',
+    'dyeingProcess',
+    'businessSize',
+    'numberOfReferences',
+    'price',
+    'weight_gm2',
+    'gross_width',
+)
+
+# slots: no per-instance __dict__, which roughly halves the memory of a loaded catalog
+@dataclass(slots=True)
 class Supplier:
     supplier: str
     fabricName: Optional[str]
@@ -36,3 +59,98 @@ class Supplier:
     gross_width: Optional[float] = None
     product: Optional[str] = None
     fabric_lead_time_weeks: Optional[float] = None
+
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Supplier":
+        """Build a Supplier from a stored/YAML record.
+
+        Raises ValueError naming the field when a commercial value is not a number.
+        """
+        get = row.get
+        certs = get('certifications') or []
+        if isinstance(certs, str):
+            certs = [c.strip() for c in certs.split(';') if c.strip()]
+        fabric_lead_time = get('fabric_lead_time_weeks')
+        return cls(
+            get('supplier', ''),
+            get('fabricName'),
+            _number(row, 'price_eur_per_m'),
+            _number(row, 'lead_time_weeks'),
+            _number(row, 'moq_m'),
+            bool(get('stock_service', False)),
+            get('fibre_origin'),
+            get('yarn_origin'),
+            get('fabric_origin'),
+            get('dye_origin'),
+            get('sewing_origin'),
+            certs,
+            str(get('documentation_level', 'none')),
+            get('material_origin'),
+            get('countrySpinning'),
+            get('countryFabric'),
+            get('countryDyeing'),
+            get('countryMaking'),
+            get('fabricProcess'),
+            get('makingComplexity'),
+            get('dyeingProcess'),
+            get('businessSize'),
+            get('numberOfReferences'),
+            get('price'),
+            get('weight_gm2'),
+            get('gross_width'),
+            get('product'),
+            _number(row, 'fabric_lead_time_weeks') if fabric_lead_time is not None else None,
+        )
+
+def _number(row: Dict[str, Any], field: str) -> float:
+    value = row.get(field, 0.0)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field}: expected a number, got {value!r}")
+
+def supplier_from_row(row: dict) -> Supplier:
+    """Build a Supplier from a stored/YAML record (see ``Supplier.from_row``)."""
+    return Supplier.from_row(row)
+
+def _float_or_nan(value) -> float:
+    if value is None or isinstance(value, bool):
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+class SupplierColumns:
+    """Column-oriented view of a catalog: one float array per numeric field.
+
+    Built in a single pass over the records; missing or non-numeric values are NaN.
+    Used where a whole group is scored at once (``scoring.rankings``) instead of
+    re-reading every record once per field.
+    """
+    NUMERIC_FIELDS = ('price_eur_per_m', 'lead_time_weeks', 'fabric_lead_time_weeks', 'moq_m', 'ecobalyse_score')
+
+    __slots__ = ('ids', 'numeric')
+
+    def __init__(self, ids: List[Any], numeric: Dict[str, np.ndarray]):
+        self.ids = ids
+        self.numeric = numeric
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]], fields: Iterable[str] = NUMERIC_FIELDS) -> "SupplierColumns":
+        fields = tuple(fields)
+        columns = [[] for _ in fields]
+        ids = []
+        for record in records:
+            get = record.get
+            ids.append(get('id'))
+            for column, field in zip(columns, fields):
+                column.append(_float_or_nan(get(field)))
+        return cls(ids, {field: np.array(column, dtype=float) for field, column in zip(fields, columns)})
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.numeric[field]
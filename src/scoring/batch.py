@@ -0,0 +1,114 @@
+"""
+Concurrent batch scoring: scores a list of suppliers through a bounded thread
+pool on the shared pooled Ecobalyse session, so a whole catalog takes roughly
+as long as its slowest simulator call. ``iter_score_suppliers`` streams outcomes
+as they complete for callers that forward them progressively.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from typing import Optional, List, Tuple, Iterable, Iterator
+import contextvars
+import itertools
+import time
+from ..models.supplier import Supplier
+from .context import ScoringContext, get_scoring_context
+from .final_score import final_csr_score
+
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_DEADLINE_SECONDS = 60.0
+
+@dataclass
+class BatchOutcome:
+    """Scoring result for one input supplier, in input order."""
+    supplier: Supplier
+    result: Optional[Tuple[float, float]] = None  # (ecobalyse, final_csr) as from final_csr_score
+    error: Optional[str] = None  # set when scoring raised
+    timed_out: bool = False  # set when the per-request deadline elapsed
+
+def _batch_settings(context: ScoringContext, max_in_flight: int = None, deadline_seconds: float = None):
+    batch_cfg = context.ecoconfig.get("batch", {}) or {}
+    if max_in_flight is None:
+        max_in_flight = int(batch_cfg.get("max_in_flight", DEFAULT_MAX_IN_FLIGHT))
+    if deadline_seconds is None:
+        deadline_seconds = float(batch_cfg.get("deadline_seconds", DEFAULT_DEADLINE_SECONDS))
+    return max(1, int(max_in_flight)), float(deadline_seconds)
+
+def iter_score_suppliers(suppliers: Iterable[Supplier], config_root: str, max_in_flight: int = None,
+                         deadline_seconds: float = None, context: ScoringContext = None) -> Iterator[Tuple[int, BatchOutcome]]:
+    """Score ``suppliers`` concurrently, yielding ``(index, BatchOutcome)`` as each one completes.
+
+    ``suppliers`` is consumed lazily: at most ``max_in_flight`` suppliers are held at once,
+    so memory stays flat however long the input is. ``deadline_seconds`` bounds the
+    wall-clock time of each supplier from the moment its scoring starts. Both default to
+    the ``batch`` section of ``ecobalyse.yaml``.
+    """
+    if context is None:
+        context = get_scoring_context(config_root)
+    max_in_flight, deadline_seconds = _batch_settings(context, max_in_flight, deadline_seconds)
+    source = enumerate(suppliers)
+    first = next(source, None)
+    if first is None:
+        return
+
+    # A single HTTP call never outlives the supplier's deadline
+    timeout = min(float(context.ecoconfig.get("timeout_seconds", 20)), deadline_seconds)
+    client = context.make_client(timeout_seconds=timeout)
+    started = {}
+
+    def _run(i: int, supplier: Supplier):
+        started[i] = time.monotonic()
+        return final_csr_score(supplier, config_root, client=client, context=context)
+
+    executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="ecobalyse-batch")
+    futures = {}
+
+    def _submit(item):
+        i, supplier = item
+        # Carry the request's context (stage timings) into the worker thread
+        fut = executor.submit(contextvars.copy_context().run, _run, i, supplier)
+        futures[fut] = (i, BatchOutcome(supplier=supplier))
+        return fut
+
+    try:
+        _submit(first)
+        for item in itertools.islice(source, max_in_flight - 1):
+            _submit(item)
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+            finished = []
+            for fut in done:
+                i, outcome = futures.pop(fut)
+                try:
+                    outcome.result = fut.result()
+                except Exception as e:
+                    outcome.error = str(e)
+                finished.append((i, outcome))
+            now = time.monotonic()
+            for fut in list(pending):
+                i, outcome = futures[fut]
+                if i in started and now - started[i] > deadline_seconds:
+                    # Stop waiting; the worker thread finishes on its own
+                    outcome.timed_out = True
+                    pending.discard(fut)
+                    del futures[fut]
+                    finished.append((i, outcome))
+            # Refill the freed slots before handing results back to the caller
+            for item in itertools.islice(source, len(finished)):
+                pending.add(_submit(item))
+            yield from finished
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def score_suppliers(suppliers: List[Supplier], config_root: str, max_in_flight: int = None,
+                    deadline_seconds: float = None, context: ScoringContext = None) -> List[BatchOutcome]:
+    """Score ``suppliers`` concurrently and return one BatchOutcome per input, in order.
+
+    ``max_in_flight`` bounds simultaneous simulator calls; ``deadline_seconds`` bounds the
+    wall-clock time of each supplier from the moment its scoring starts. Both default to
+    the ``batch`` section of ``ecobalyse.yaml``.
+    """
+    outcomes = [BatchOutcome(supplier=s) for s in suppliers]
+    for i, outcome in iter_score_suppliers(suppliers, config_root, max_in_flight, deadline_seconds, context):
+        outcomes[i] = outcome
+    return outcomes
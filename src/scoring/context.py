@@ -0,0 +1,164 @@
+"""
+Per-process scoring context: configs and Ecobalyse reference data loaded once
+and shared by every supplier scored, instead of being re-read per supplier.
+
+Config files are re-read when their mtime changes; the countries/trims lists are
+fetched once per base_url (failed fetches are retried after a short delay).
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, List
+from ..utils.yaml_loader import load_yaml
+from ..utils.country_lookup import set_country_cache
+from ..api.ecobalyse_client import (EcobalyseClient, configure_http, configure_recording, configure_single_flight,
+                                   configure_rate_limit)
+from ..api.score_cache import ScoreCache, score_cache_from_config, api_version_from_url, canonical_payload
+from ..storage.impact_store import ImpactStore, impact_store_from_config
+from .payload_template import PayloadTemplates, compile_payload_templates
+
+CONFIG_FILES = ("bourrienne.yaml", "ecobalyse.yaml", "scoring.yaml")
+REFERENCE_RETRY_SECONDS = 60
+
+class ScoringContext:
+    def __init__(self, config_root: str):
+        self.config_root = config_root
+        self._lock = threading.RLock()
+        self._mtimes: Dict[str, Optional[float]] = {}
+        self.assumptions: Dict[str, Any] = {}
+        self.ecoconfig: Dict[str, Any] = {}
+        self.scoring: Dict[str, Any] = {}
+        self.countries_data: Optional[List] = None
+        self.trims_data: Optional[List] = None
+        self._reference_url: Optional[str] = None
+        self._reference_loaded_at = 0.0
+        self._payload_version = ""
+        # Resolved simulator payloads (see ecobalyse_score.resolved_payload) and the
+        # per-product templates they are built from; both reset when inputs change
+        self.payload_memo: Dict[str, Any] = {}
+        self._payload_templates: Optional[PayloadTemplates] = None
+        self.refresh()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.config_root, name)
+
+    def _current_mtimes(self) -> Dict[str, Optional[float]]:
+        mtimes = {}
+        for name in CONFIG_FILES:
+            try:
+                mtimes[name] = os.stat(self._path(name)).st_mtime
+            except OSError:
+                mtimes[name] = None
+        return mtimes
+
+    def refresh(self) -> "ScoringContext":
+        """Reload configs whose files changed and (re)fetch reference data if needed."""
+        with self._lock:
+            mtimes = self._current_mtimes()
+            if mtimes != self._mtimes:
+                self.assumptions = load_yaml(self._path("bourrienne.yaml")) or {}
+                self.ecoconfig = load_yaml(self._path("ecobalyse.yaml")) or {}
+                self.scoring = load_yaml(self._path("scoring.yaml")) or {}
+                self._mtimes = mtimes
+                configure_http(self.ecoconfig)
+                configure_recording(self.ecoconfig, os.path.dirname(os.path.abspath(self.config_root)))
+                configure_single_flight(self.ecoconfig, os.path.dirname(os.path.abspath(self.config_root)))
+                configure_rate_limit(self.ecoconfig, os.path.dirname(os.path.abspath(self.config_root)))
+                self._reset_payloads()
+                digest = hashlib.sha256(f"{self.api_version}\n{canonical_payload(self.assumptions)}".encode("utf-8"))
+                self._payload_version = f"{self.api_version}:{digest.hexdigest()[:12]}"
+            self._load_reference_data()
+        return self
+
+    def _load_reference_data(self):
+        base_url = self.base_url
+        if not base_url:
+            return
+        complete = self.countries_data is not None and self.trims_data is not None
+        if base_url == self._reference_url and (complete or time.time() - self._reference_loaded_at < REFERENCE_RETRY_SECONDS):
+            return
+        if base_url != self._reference_url:
+            self.countries_data = None
+            self.trims_data = None
+        if self.countries_data is None:
+            self.countries_data = EcobalyseClient.fetch_countries(base_url)
+            if self.countries_data:
+                set_country_cache(self.countries_data)
+        if self.trims_data is None:
+            self.trims_data = EcobalyseClient.fetch_trims(base_url)
+        self._reference_url = base_url
+        self._reference_loaded_at = time.time()
+        self._reset_payloads()
+
+    def _reset_payloads(self):
+        self.payload_memo = {}
+        self._payload_templates = None
+
+    @property
+    def payload_templates(self) -> PayloadTemplates:
+        """Product payload templates for the current assumptions and trims list."""
+        templates = self._payload_templates
+        if templates is None:
+            with self._lock:
+                if self._payload_templates is None:
+                    self._payload_templates = compile_payload_templates(self.assumptions, self.trims_data)
+                templates = self._payload_templates
+        return templates
+
+    @property
+    def base_url(self) -> Optional[str]:
+        # ECOBALYSE_API_URL points the whole app elsewhere, e.g. at src.api.mock_server
+        return os.environ.get("ECOBALYSE_API_URL") or self.ecoconfig.get("base_url")
+
+    @property
+    def api_version(self) -> str:
+        return api_version_from_url(self.base_url)
+
+    @property
+    def payload_version(self) -> str:
+        """Identifies everything besides the supplier that shapes a score: API version and payload assumptions."""
+        return self._payload_version
+
+    @property
+    def version(self) -> str:
+        """Changes whenever a config file is edited; usable as a cache/ETag component."""
+        return "-".join(f"{self._mtimes.get(name) or 0:.6f}" for name in CONFIG_FILES)
+
+    @property
+    def score_cache(self) -> Optional[ScoreCache]:
+        return score_cache_from_config(self.ecoconfig, self.config_root)
+
+    @property
+    def impact_store(self) -> Optional[ImpactStore]:
+        return impact_store_from_config(self.ecoconfig, self.config_root)
+
+    @property
+    def max_score(self) -> float:
+        caps = self.scoring.get("caps", {}) if isinstance(self.scoring, dict) else {}
+        return float(caps.get("final_csr_score", 10.0))
+
+    def make_client(self, timeout_seconds: float = None, session=None) -> EcobalyseClient:
+        if timeout_seconds is None:
+            timeout_seconds = self.ecoconfig.get("timeout_seconds", 20)
+        return EcobalyseClient(
+            base_url=self.base_url or "",
+            timeout_seconds=timeout_seconds,
+            api_key_env=self.ecoconfig.get("auth", {}).get("api_key_env"),
+            session=session,
+            simulator_path=(self.ecoconfig.get("endpoints", {}) or {}).get("score"),
+        )
+
+_contexts: Dict[str, ScoringContext] = {}
+_contexts_lock = threading.Lock()
+
+def get_scoring_context(config_root: str) -> ScoringContext:
+    """Return the process-wide context for ``config_root``, refreshed if configs changed."""
+    key = os.path.abspath(config_root)
+    with _contexts_lock:
+        ctx = _contexts.get(key)
+        if ctx is None:
+            ctx = ScoringContext(config_root)
+            _contexts[key] = ctx
+            return ctx
+    return ctx.refresh()
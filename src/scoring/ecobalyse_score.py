@@ -2,12 +2,19 @@
 Adapter that prepares the Ecobalyse payload from a Supplier + assumptions,
 then asks EcobalyseClient for a score.
 """
-from typing import Optional, Dict, Any, List
-import os
-from ..models.supplier import Supplier
-from ..utils.yaml_loader import load_yaml
-from ..utils.country_lookup import get_country_code, set_country_cache
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+import json
+import numpy as np
+from ..models.supplier import Supplier, PAYLOAD_FIELDS, supplier_from_row
+from ..utils.country_lookup import get_country_code
 from ..api.ecobalyse_client import EcobalyseClient
+from ..api.score_cache import payload_fingerprint
+from ..utils.metrics import Counter, stage
+from .context import ScoringContext, get_scoring_context
+from .payload_template import PayloadTemplates, compile_payload_templates
+
+PAYLOAD_MEMO_SIZE = 10000
+SCORE_CACHE_REQUESTS = Counter("ecobalyse_score_cache_requests_total", "Simulator score cache lookups.", ["result"])
 
 def _estimate_mass_kg(weight_gm2: float = None, gross_width_cm: float = None, length_m: float = 1.0) -> Optional[float]:
     # If fabric weight (g/m^2) and width are known, estimate mass for a given length
@@ -18,16 +25,15 @@ def _estimate_mass_kg(weight_gm2: float = None, gross_width_cm: float = None, le
         return float(weight_gm2) * area_m2 / 1000.0
     return None
 
-def _build_payload(s: Supplier, assumptions: Dict[str, Any], countries_data: List = None, trims_data: List = None, default_product: str = "tshirt") -> Dict[str, Any]:
-    # Get product-specific assumptions
-    product_type = s.product or assumptions.get("default_product", default_product)
-    products_config = assumptions.get("products", {})
-    product_assumptions = products_config.get(product_type, {})
-    
-    # Fallback to default assumptions if product-specific not found
-    if not product_assumptions:
-        product_assumptions = products_config.get(assumptions.get("default_product", "tshirt"), {})
-    
+def _build_payload(s: Supplier, assumptions: Dict[str, Any], countries_data: List = None, trims_data: List = None,
+                   default_product: str = "tshirt", templates: PayloadTemplates = None) -> Dict[str, Any]:
+    # Product-level parts come precompiled (ScoringContext.payload_templates); compile
+    # them here only for one-off calls
+    if templates is None:
+        templates = compile_payload_templates(assumptions, trims_data, default_product)
+    product_type = s.product or templates.default_product
+    template = templates.for_product(product_type)
+
     materials = []
     if s.material_origin:
         for m in s.material_origin:
@@ -49,112 +55,100 @@ def _build_payload(s: Supplier, assumptions: Dict[str, Any], countries_data: Lis
             "share": 1.0,
             "country": country_code
         }]
-    
+
     # Use product-specific default mass, fallback to estimate or generic default
-    default_mass = product_assumptions.get("default_mass", assumptions.get("default_mass", 0.17))
-    mass = _estimate_mass_kg(s.weight_gm2, s.gross_width) or default_mass
-    
-    # Translate country names to codes
-    country_spinning = get_country_code(s.countrySpinning, countries_data) if s.countrySpinning else None
-    country_fabric = get_country_code(s.countryFabric, countries_data) if s.countryFabric else None
-    country_dyeing = get_country_code(s.countryDyeing, countries_data) if s.countryDyeing else None
-    country_making = get_country_code(s.countryMaking, countries_data) if s.countryMaking else None
-    
-    # Get product-specific trims
-    trims = product_assumptions.get("trims", [])
-    # If trims_data is provided, resolve trim names to UUIDs
-    trim_list = []
-    if trims_data and trims:
-        # Build a lookup map from trim name to UUID
-        trim_lookup = {}
-        for trim in trims_data:
-            if isinstance(trim, dict):
-                trim_id = trim.get("id")
-                trim_name = trim.get("name", "").lower()
-                if trim_id:
-                    trim_lookup[trim_name] = trim_id
-            elif isinstance(trim, str):
-                # If trims_data contains strings, use them directly
-                trim_lookup[trim] = trim
-        
-        for trim_config in trims:
-            if isinstance(trim_config, dict):
-                trim_id = trim_config.get("id")
-                trim_name = trim_config.get("name", "").lower()
-                quantity = trim_config.get("quantity", 0)
-                # Try to find UUID by name or use provided ID
-                resolved_id = trim_lookup.get(trim_name) or trim_id
-                if resolved_id and quantity > 0:
-                    trim_list.append({"id": resolved_id, "quantity": int(quantity)})
-            elif isinstance(trim_config, str):
-                # If it's just a string (trim name), try to find it
-                resolved_id = trim_lookup.get(trim_config.lower())
-                if resolved_id:
-                    trim_list.append({"id": resolved_id, "quantity": 1})  # Default quantity
-    elif trims:
-        # If no trims_data, use trims as-is (assuming they're already UUIDs)
-        for trim_config in trims:
-            if isinstance(trim_config, dict):
-                trim_list.append(trim_config)
-    
+    mass = _estimate_mass_kg(s.weight_gm2, s.gross_width) or template.default_mass
+
     payload = {
         "mass": max(0.01, float(mass)),
         "product": product_type,
         "materials": materials,
-        "fabricProcess": s.fabricProcess or assumptions.get("default_fabric_process", "weaving"),
-        "makingComplexity": s.makingComplexity or assumptions.get("default_making_complexity", "medium"),
-        "numberOfReferences": int(s.numberOfReferences or assumptions.get("default_number_of_references", 100)),
-        "price": float(s.price or assumptions.get("default_price", 100.0)),
-        "upcycled": product_assumptions.get("upcycled", False),
-        "airTransportRatio": product_assumptions.get("airTransportRatio", 0.0),
+        "fabricProcess": s.fabricProcess or templates.fabric_process,
+        "makingComplexity": s.makingComplexity or templates.making_complexity,
+        "numberOfReferences": int(s.numberOfReferences or templates.number_of_references),
+        "price": float(s.price or templates.price),
     }
-    
-    # Add trims if present
-    if trim_list:
-        payload["trims"] = trim_list
-    
-    # Only add country fields if they have values
-    if country_spinning:
-        payload["countrySpinning"] = country_spinning
-    if country_fabric:
-        payload["countryFabric"] = country_fabric
-    if country_dyeing:
-        payload["countryDyeing"] = country_dyeing
-    if country_making:
-        payload["countryMaking"] = country_making
+    payload.update(template.static)
+
+    # Translate country names to codes; only add country fields if they have values
+    for field in ("countrySpinning", "countryFabric", "countryDyeing", "countryMaking"):
+        name = getattr(s, field)
+        code = get_country_code(name, countries_data) if name else None
+        if code:
+            payload[field] = code
     if s.dyeingProcess:
         payload["dyeingProcess"] = s.dyeingProcess
     if s.businessSize:
         payload["business"] = s.businessSize
     return payload
 
-def _load_assumptions(config_root: str) -> Dict[str, Any]:
-    bourrienne_path = os.path.join(config_root, "bourrienne.yaml")
-    if os.path.exists(bourrienne_path):
-        data = load_yaml(bourrienne_path) or {}
-        if data:
-            return data
-    return {}
+def resolved_payload(supplier: Supplier, context: ScoringContext) -> Tuple[Dict[str, Any], str]:
+    """``(payload, cache key)`` for a supplier, memoized on its payload-relevant fields.
+
+    The memo lives on the context and is dropped whenever configs or reference data
+    change. The returned payload is shared: treat it as read-only.
+    """
+    key = json.dumps([getattr(supplier, field, None) for field in PAYLOAD_FIELDS], sort_keys=True, default=str)
+    memo = context.payload_memo
+    hit = memo.get(key)
+    if hit is None:
+        with stage("payload_build"):
+            payload = _build_payload(supplier, context.assumptions, context.countries_data, context.trims_data,
+                                     templates=context.payload_templates)
+            hit = (payload, payload_fingerprint(payload, context.api_version))
+        if len(memo) >= PAYLOAD_MEMO_SIZE:
+            memo.clear()
+        memo[key] = hit
+    return hit
 
-def ecobalyse_score_for_supplier(supplier: Supplier, config_root: str) -> Optional[float]:
-    assumptions = _load_assumptions(config_root)
-    ecoconfig = load_yaml(f"{config_root}/ecobalyse.yaml") or {}
+def ecobalyse_score_for_supplier(supplier: Supplier, config_root: str, client: EcobalyseClient = None,
+                                 context: ScoringContext = None) -> Optional[float]:
+    # Configs, countries and trims come from the shared context; only the payload
+    # and the simulator call are per supplier
+    if context is None:
+        context = get_scoring_context(config_root)
 
-    # Fetch countries list to build translation mapping
-    base_url = ecoconfig.get("base_url")
-    countries_data = EcobalyseClient.fetch_countries(base_url) if base_url else None
-    if countries_data:
-        set_country_cache(countries_data)
-    
-    # Fetch trims list to resolve trim names to UUIDs
-    trims_data = EcobalyseClient.fetch_trims(base_url) if base_url else None
+    payload, cache_key = resolved_payload(supplier, context)
 
-    payload = _build_payload(supplier, assumptions, countries_data, trims_data)
+    # Identical payloads under the same API version always yield the same score
+    cache = context.score_cache
+    impacts = context.impact_store
+    api_version = context.api_version
+    if cache is not None:
+        with stage("score_cache"):
+            cached = cache.get(cache_key)
+            # Scores cached before impacts were kept are fetched once more to fill the impact store
+            if cached is not None and impacts is not None and not impacts.has(cache_key):
+                cached = None
+        SCORE_CACHE_REQUESTS.inc(result="hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached
 
-    client = EcobalyseClient(
-        base_url=base_url,
-        timeout_seconds=ecoconfig.get("timeout_seconds", 20),
-        api_key_env=ecoconfig.get("auth", {}).get("api_key_env")
-    )
-    score = client.get_score(payload)
+    if client is None:
+        client = context.make_client()
+    simulation = client.simulate(payload)
+    score = client.score_from(simulation)
+    if score is not None:
+        if cache is not None:
+            cache.set(cache_key, score, api_version)
+        if impacts is not None:
+            impacts.put(cache_key, simulation, api_version)
     return score  # may be None
+
+def impacts_for_records(records: Sequence[Dict[str, Any]], context: ScoringContext,
+                        columns: Sequence[str] = None) -> Dict[str, np.ndarray]:
+    """Stored impact columns aligned with supplier ``records`` (NaN where unknown).
+
+    Each record's key is the fingerprint of its current payload, so an edited
+    supplier has no impacts until it is scored again. No simulator call is made.
+    """
+    store = context.impact_store
+    keys = []
+    for record in records:
+        try:
+            keys.append(resolved_payload(supplier_from_row(record), context)[1])
+        except Exception:
+            keys.append("")  # a record that cannot be converted has no payload
+    if store is None:
+        return {name: np.full(len(keys), np.nan) for name in columns or ()}
+    return store.lookup(keys, columns)
@@ -1,19 +1,26 @@
 from typing import Tuple
 from ..models.supplier import Supplier
+from ..api.ecobalyse_client import EcobalyseClient
+from .context import ScoringContext, get_scoring_context
 from .ecobalyse_score import ecobalyse_score_for_supplier
 from .transparency import transparency_weight
-from ..utils.yaml_loader import load_yaml
 
-def final_csr_score(supplier: Supplier, config_root: str) -> Tuple[float, float]:
-    caps = load_yaml(f"{config_root}/scoring.yaml") or {}
-    caps_dict = caps.get("caps", {}) if isinstance(caps, dict) else {}
-    max_score = float(caps_dict.get("final_csr_score", 10.0))
+def csr_from_ecobalyse(eco: float, supplier: Supplier, config_root: str, context: ScoringContext = None) -> Tuple[float, float]:
+    """Combine an (already known) Ecobalyse score with the supplier's transparency weight."""
+    if context is None:
+        context = get_scoring_context(config_root)
+    t_weight = transparency_weight(supplier, config_root, context=context)
 
-    eco = ecobalyse_score_for_supplier(supplier, config_root)
+    raw = eco * t_weight
+    return eco, min(raw, context.max_score)
+
+def final_csr_score(supplier: Supplier, config_root: str, client: EcobalyseClient = None,
+                    context: ScoringContext = None) -> Tuple[float, float]:
+    if context is None:
+        context = get_scoring_context(config_root)
+
+    eco = ecobalyse_score_for_supplier(supplier, config_root, client=client, context=context)
     if eco is None:
         return None  # cannot compute without Ecobalyse Score
 
-    t_weight = transparency_weight(supplier, config_root)
-
-    raw = eco * t_weight
-    return eco, min(raw, max_score)
+    return csr_from_ecobalyse(eco, supplier, config_root, context=context)
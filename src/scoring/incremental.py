@@ -0,0 +1,169 @@
+"""
+Incremental scoring against the supplier store.
+
+Each record's last Ecobalyse score is materialized in the repository. Only
+records whose payload-relevant fields changed (dirty), that were scored under
+another API version / payload configuration, or whose last attempt failed go to
+the simulator; every other record reuses its stored score.
+
+Failed attempts are stored too (``save_failures``). Such a record is reported as
+unavailable rather than pending, and is only sent again once its backoff
+(``failed_scores`` in ecobalyse.yaml, doubling per failed attempt) has passed.
+"""
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple
+import itertools
+import time
+from ..models.supplier import Supplier, supplier_from_row
+from ..storage.repository import SupplierRepository, payload_inputs_hash
+from ..utils.metrics import Counter
+from .batch import score_suppliers, iter_score_suppliers
+from .context import ScoringContext, get_scoring_context
+from .final_score import csr_from_ecobalyse
+
+@dataclass
+class RowScore:
+    row: Dict[str, Any]
+    supplier: Optional[Supplier] = None
+    ecobalyse_score: Optional[float] = None
+    final_score: Optional[float] = None
+    error: Optional[str] = None  # conversion error (the row cannot be scored at all)
+    timed_out: bool = False
+    stale: bool = False  # no current stored score was available for this row
+    failure: Optional[str] = None  # the last attempt under the current version failed
+    retry_due: bool = True  # a stale row may be sent to the simulator now
+
+    @property
+    def pending(self) -> bool:
+        """No current score yet, but one is being (or is about to be) computed."""
+        return self.stale and self.retry_due
+
+DEFAULT_RETRY_FAILED_SECONDS = 300
+DEFAULT_MAX_RETRY_FAILED_SECONDS = 86400
+
+MATERIALIZED_SCORES = Counter("supplier_materialized_scores_total", "Stored score lookups (current or stale).", ["result"])
+
+def retry_settings(context: ScoringContext) -> Tuple[float, float]:
+    """``(first backoff, longest backoff)`` in seconds before a failed supplier is scored again."""
+    cfg = context.ecoconfig.get("failed_scores", {}) or {}
+    return (float(cfg.get("retry_after_seconds", DEFAULT_RETRY_FAILED_SECONDS)),
+            float(cfg.get("max_retry_after_seconds", DEFAULT_MAX_RETRY_FAILED_SECONDS)))
+
+def retries_due(repository: SupplierRepository, config_root: str = "config",
+                context: Optional[ScoringContext] = None) -> int:
+    """Number of failed records whose backoff has passed (they are queued on their next read)."""
+    context = context or get_scoring_context(config_root)
+    retry = retry_settings(context)
+    now = time.time()
+    return sum(now >= state.retry_at(*retry) for state in repository.failure_states(context.payload_version).values())
+
+def _lookup_stored(rows: List[Dict[str, Any]], repository: SupplierRepository, version: str,
+                   retry: Tuple[float, float]):
+    """Build a RowScore per row from the store; returns ``(results, stale)``."""
+    states = repository.score_states([r["id"] for r in rows if r.get("id") is not None])
+    now = time.time()
+    results, stale = [], []
+    for row in rows:
+        item = RowScore(row=row)
+        results.append(item)
+        try:
+            item.supplier = supplier_from_row(row)
+        except Exception as e:
+            item.error = str(e)
+            continue
+        state = states.get(row.get("id"))
+        if state is not None and state.is_current(version):
+            item.ecobalyse_score = state.ecobalyse_score
+        else:
+            item.stale = True
+            if state is not None:
+                item.failure = state.failure(version)
+                item.retry_due = item.failure is None or now >= state.retry_at(*retry)
+            stale.append(item)
+    MATERIALIZED_SCORES.inc(len(results) - len(stale), result="current")
+    MATERIALIZED_SCORES.inc(len(stale), result="stale")
+    return results, stale
+
+def _apply_outcome(item: RowScore, outcome, version: str) -> Tuple[Optional[tuple], Optional[tuple]]:
+    """Copy a batch outcome onto ``item``; returns the ``(score, failure)`` entries to save."""
+    item.timed_out = outcome.timed_out
+    if outcome.result is None:
+        if outcome.timed_out:
+            item.failure = "Ecobalyse request timed out"
+        else:
+            item.failure = outcome.error or "Ecobalyse score unavailable"
+        item.retry_due = False
+    else:
+        item.ecobalyse_score = outcome.result[0]
+        item.stale = False
+        item.failure = None
+    if item.row.get("id") is None:
+        return None, None
+    # Saved only if the stored record still has the fields we just scored
+    payload_hash = payload_inputs_hash(item.row)
+    if item.failure is not None:
+        return None, (item.row["id"], payload_hash, item.failure, version)
+    return (item.row["id"], payload_hash, item.ecobalyse_score, version), None
+
+def _save_outcomes(repository: SupplierRepository, entries: List[Tuple[Optional[tuple], Optional[tuple]]]):
+    scores = [score for score, _ in entries if score is not None]
+    failures = [failure for _, failure in entries if failure is not None]
+    if scores:
+        repository.save_scores(scores)
+    if failures:
+        repository.save_failures(failures)
+
+def _finalize(item: RowScore, config_root: str, context: ScoringContext) -> RowScore:
+    if item.ecobalyse_score is not None and item.error is None:
+        _, item.final_score = csr_from_ecobalyse(item.ecobalyse_score, item.supplier, config_root, context=context)
+    return item
+
+def score_rows(rows: List[Dict[str, Any]], repository: SupplierRepository, config_root: str,
+               context: ScoringContext = None, rescore: bool = True, max_in_flight: int = None) -> List[RowScore]:
+    """Score stored records (rows carrying an ``id``), in input order.
+
+    Rows with a current materialized score are answered from the store. When ``rescore``
+    is set, stale rows (failed ones too, whatever their backoff) are scored
+    concurrently (at most ``max_in_flight`` at once) and their new scores or
+    failures written back.
+    """
+    if context is None:
+        context = get_scoring_context(config_root)
+    version = context.payload_version
+    results, stale = _lookup_stored(rows, repository, version, retry_settings(context))
+
+    if rescore and stale:
+        outcomes = score_suppliers([item.supplier for item in stale], config_root, max_in_flight=max_in_flight,
+                                   context=context)
+        _save_outcomes(repository, [_apply_outcome(item, outcome, version) for item, outcome in zip(stale, outcomes)])
+
+    for item in results:
+        _finalize(item, config_root, context)
+    return results
+
+def iter_score_rows(rows: Iterable[Dict[str, Any]], repository: SupplierRepository, config_root: str,
+                    context: ScoringContext = None, page_size: int = 200) -> Iterator[RowScore]:
+    """Yield a RowScore per row as soon as its score is known (not in input order).
+
+    Rows are read ``page_size`` at a time: stored scores (and failures still in their
+    backoff) of a page are yielded at once, then its stale rows as the simulator
+    answers them, each saved as it arrives.
+    """
+    if context is None:
+        context = get_scoring_context(config_root)
+    version = context.payload_version
+    retry = retry_settings(context)
+    rows = iter(rows)
+    while True:
+        page = list(itertools.islice(rows, page_size))
+        if not page:
+            return
+        results, stale = _lookup_stored(page, repository, version, retry)
+        stale = [item for item in stale if item.retry_due]
+        for item in results:
+            if not item.pending:
+                yield _finalize(item, config_root, context)
+        for i, outcome in iter_score_suppliers((item.supplier for item in stale), config_root, context=context):
+            item = stale[i]
+            _save_outcomes(repository, [_apply_outcome(item, outcome, version)])
+            yield _finalize(item, config_root, context)
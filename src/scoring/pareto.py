@@ -0,0 +1,181 @@
+"""
+Pareto front and dominance layers of a supplier group over the radar axes.
+
+A supplier dominates another when it is at least as good on every axis
+(ecobalyse, price, lead time, MOQ, traceability, certifications) and better on
+one. Layer 1 is the skyline (no one dominates it), layer 2 what is left once
+layer 1 is removed, and so on.
+
+Dominance is decided on the values behind the radar axes: the relative axes
+are monotone in the raw score, price, lead time and MOQ (lower is better), but
+rounded to 2 decimals, which would let close values tie. A missing value ranks
+below any known one (the radar chart centres it instead).
+
+Layers are found in one pass (efficient non-dominated sort with binary search):
+suppliers are visited in descending lexicographic order, so any dominator is
+placed before the suppliers it dominates. A supplier goes to the first layer
+holding none of its dominators. If a layer holds one, so does every layer
+before it, hence the binary search. That is O(n log L) layer checks instead of
+comparing all pairs. Suppliers are placed ``BLOCK_SIZE`` at a time: the search
+runs for the whole block at once, each check comparing packed axis ranks (see
+``_pack``) against a whole layer, and dominators inside the block are resolved
+afterwards.
+"""
+from typing import Optional, Dict, Any, List, Iterable
+import numpy as np
+from ..models.supplier import SupplierColumns
+from .rankings import normalize_certifications, radar_scores, traceability_steps
+
+PARETO_AXES = ("ecobalyse", "price", "leadTime", "moq", "traceability", "certifications")
+# Radar axis -> record field for the axes where a lower value is better
+_LOWER_IS_BETTER = (("ecobalyse", "ecobalyse_score"), ("price", "price_eur_per_m"),
+                    ("leadTime", "lead_time_weeks"), ("moq", "moq_m"))
+
+def criteria_matrix(records: List[Dict[str, Any]]) -> np.ndarray:
+    """``(n, len(PARETO_AXES))`` array where higher is better on every column."""
+    n = len(records)
+    columns = SupplierColumns.from_records(records, [field for _, field in _LOWER_IS_BETTER])
+    matrix = np.empty((n, len(PARETO_AXES)))
+    for j, (_, field) in enumerate(_LOWER_IS_BETTER):
+        values = -columns[field]
+        matrix[:, j] = np.where(np.isnan(values), -np.inf, values)
+    matrix[:, 4] = np.fromiter((traceability_steps(r) for r in records), dtype=float, count=n)
+    matrix[:, 5] = np.fromiter((len(normalize_certifications(r.get("certifications"))) for r in records),
+                               dtype=float, count=n)
+    return matrix
+
+BLOCK_SIZE = 256  # suppliers placed per vectorized step
+
+def _dense_ranks(matrix: np.ndarray) -> np.ndarray:
+    """Per column, the rank of each value among the column's distinct values (0 = worst)."""
+    return np.column_stack([np.unique(matrix[:, j], return_inverse=True)[1].reshape(-1)
+                            for j in range(matrix.shape[1])])
+
+def _pack(ranks: np.ndarray):
+    """Pack rank columns into uint64 words, each field topped with a guard bit.
+
+    For packed ``q`` and ``p``, ``((q | guard) - p) & guard == guard`` exactly when
+    ``q >= p`` in every field: each field keeps its guard bit unless it borrows, and
+    a field with its guard set never borrows from the next. One subtraction thus
+    compares all the fields of a word. Returns ``(words, guards)``.
+    """
+    words, guards = [], []
+    word, guard, shift = np.zeros(len(ranks), dtype=np.uint64), 0, 0
+    for j in range(ranks.shape[1]):
+        width = int(ranks[:, j].max(initial=0)).bit_length() + 1
+        if shift + width > 64:
+            words.append(word)
+            guards.append(guard)
+            word, guard, shift = np.zeros(len(ranks), dtype=np.uint64), 0, 0
+        word |= ranks[:, j].astype(np.uint64) << np.uint64(shift)
+        guard |= 1 << (shift + width - 1)
+        shift += width
+    words.append(word)
+    guards.append(guard)
+    return np.column_stack(words), np.array(guards, dtype=np.uint64)
+
+def _covers(members: np.ndarray, points: np.ndarray, guards: np.ndarray) -> np.ndarray:
+    """``(len(points), members' width)`` mask: member (guards set, one column each) >= point on every axis."""
+    covered = ((members[0][None, :] - points[:, 0][:, None]) & guards[0]) == guards[0]
+    for w in range(1, len(guards)):
+        covered &= ((members[w][None, :] - points[:, w][:, None]) & guards[w]) == guards[w]
+    return covered
+
+def dominance_layers(matrix: np.ndarray, max_layers: Optional[int] = None) -> np.ndarray:
+    """1-based layer of each row of ``matrix`` (higher is better on every column).
+
+    With ``max_layers`` rows beyond that layer get 0.
+    """
+    n = len(matrix)
+    if n == 0:
+        return np.zeros(0, dtype=int)
+    # Identical rows share a layer; once they are merged, "at least as good on every
+    # axis" between two distinct rows is dominance
+    unique, inverse = np.unique(matrix, axis=0, return_inverse=True)
+    ranks = _dense_ranks(unique)
+    # Descending lexicographic order: a dominator always comes first, so the first
+    # column needs no comparison
+    order = np.lexsort(tuple(-ranks[:, j] for j in reversed(range(ranks.shape[1]))))
+    points, guards = _pack(ranks[order][:, 1:])
+    placed = np.zeros(len(points), dtype=int)
+    layers: List[np.ndarray] = []  # per layer: packed members with guards set, one column each
+    for start in range(0, len(points), BLOCK_SIZE):
+        block = points[start:start + BLOCK_SIZE]
+        size = len(block)
+        # Binary search of the first layer without a dominator, for the whole block at once
+        low, high = np.zeros(size, dtype=int), np.full(size, len(layers))
+        active = low < high
+        while active.any():
+            middle = (low + high) // 2
+            dominated = np.zeros(size, dtype=bool)
+            for layer in np.unique(middle[active]):
+                rows = np.nonzero(active & (middle == layer))[0]
+                dominated[rows] = _covers(layers[layer], block[rows], guards).any(axis=1)
+            low = np.where(active & dominated, middle + 1, low)
+            high = np.where(active & ~dominated, middle, high)
+            active = low < high
+        # Dominators within the block come earlier in it: a layer below each of them
+        guarded = block | guards
+        within = np.triu(_covers(guarded.T, block, guards).T, k=1)
+        while within.any():
+            deeper = np.maximum(low, np.where(within, low[:, None] + 1, 0).max(axis=0))
+            if (deeper == low).all():
+                break
+            low = deeper
+        placed[start:start + size] = low + 1
+        for layer in np.unique(low):
+            if max_layers is not None and layer >= max_layers:
+                break  # whatever it dominates is beyond max_layers too
+            members = guarded[low == layer].T
+            if layer == len(layers):
+                layers.append(members)
+            else:
+                layers[layer] = np.concatenate([layers[layer], members], axis=1)
+    if max_layers is not None:
+        placed[placed > max_layers] = 0
+    result = np.empty(len(points), dtype=int)
+    result[order] = placed
+    return result[inverse.reshape(-1)]
+
+def pareto_group(records: List[Dict[str, Any]], max_layers: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+    """Dominance layers of one group, best first; each entry carries its radar axis values."""
+    if not records:
+        return []
+    layer_of = dominance_layers(criteria_matrix(records), max_layers)
+    axes = radar_scores(records)
+    layers: List[List[Dict[str, Any]]] = [[] for _ in range(int(layer_of.max()))]
+    for i, layer in enumerate(layer_of):
+        if not layer:
+            continue
+        record = records[i]
+        layers[layer - 1].append({
+            "id": record.get("id"),
+            "supplier": record.get("supplier") or "Unknown",
+            "fabricName": record.get("fabricName") or "",
+            "layer": int(layer),
+            "scores": {
+                "ecobalyse": float(axes["ecobalyse"][i]),
+                "price": float(axes["price"][i]),
+                "leadTime": float(axes["leadTime"][i]),
+                "moq": float(axes["moq"][i]),
+                "traceability": float(axes["traceability"][i]),
+                "certifications": int(axes["certificationsScore"][i]),
+            },
+            "ecobalyse_score": record.get("ecobalyse_score"),
+            "price_eur_per_m": record.get("price_eur_per_m"),
+            "lead_time_weeks": record.get("lead_time_weeks"),
+            "moq_m": record.get("moq_m"),
+        })
+    return layers
+
+def pareto_by_product(records: Iterable[Dict[str, Any]], product: Optional[str] = None,
+                      max_layers: Optional[int] = None) -> Dict[str, List[List[Dict[str, Any]]]]:
+    """Group records by garment type (``product``) and compute each group's dominance layers."""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        if record.get("error"):
+            continue
+        groups.setdefault(record.get("product") or "", []).append(record)
+    if product is not None:
+        groups = {product: groups.get(product, [])}
+    return {name: pareto_group(rows, max_layers) for name, rows in groups.items()}
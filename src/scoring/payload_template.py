@@ -0,0 +1,99 @@
+"""
+Per-product parts of the Ecobalyse simulator payload, compiled once per config.
+
+Everything in a payload that depends only on the garment type and on
+``bourrienne.yaml`` (default mass, trims resolved to Ecobalyse UUIDs, upcycled,
+airTransportRatio) and the generic defaults (fabric process, making complexity,
+number of references, price) is resolved here. ``_build_payload`` then only
+overlays the supplier's own fields on the template.
+"""
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
+
+@dataclass(frozen=True)
+class PayloadTemplate:
+    default_mass: float
+    # Payload entries copied as-is (upcycled, airTransportRatio, trims); shared, read-only
+    static: Dict[str, Any]
+
+@dataclass(frozen=True)
+class PayloadTemplates:
+    default_product: str
+    fabric_process: str
+    making_complexity: str
+    number_of_references: Any
+    price: Any
+    by_product: Dict[str, PayloadTemplate]
+    fallback: PayloadTemplate  # for product types without their own assumptions
+
+    def for_product(self, product_type: str) -> PayloadTemplate:
+        return self.by_product.get(product_type, self.fallback)
+
+def _trim_lookup(trims_data: List) -> Dict[str, str]:
+    """Trim name (lowercased) -> Ecobalyse UUID."""
+    lookup = {}
+    for trim in trims_data:
+        if isinstance(trim, dict):
+            trim_id = trim.get("id")
+            if trim_id:
+                lookup[trim.get("name", "").lower()] = trim_id
+        elif isinstance(trim, str):
+            # If trims_data contains strings, use them directly
+            lookup[trim] = trim
+    return lookup
+
+def resolve_trims(trims: List, trim_lookup: Optional[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """Configured trims as ``[{id, quantity}]``; names are resolved through ``trim_lookup``."""
+    trim_list = []
+    if trim_lookup and trims:
+        for trim_config in trims:
+            if isinstance(trim_config, dict):
+                quantity = trim_config.get("quantity", 0)
+                # Try to find UUID by name or use provided ID
+                resolved_id = trim_lookup.get(trim_config.get("name", "").lower()) or trim_config.get("id")
+                if resolved_id and quantity > 0:
+                    trim_list.append({"id": resolved_id, "quantity": int(quantity)})
+            elif isinstance(trim_config, str):
+                resolved_id = trim_lookup.get(trim_config.lower())
+                if resolved_id:
+                    trim_list.append({"id": resolved_id, "quantity": 1})  # Default quantity
+    elif trims:
+        # Without reference trims, configured entries are assumed to carry UUIDs already
+        trim_list = [trim_config for trim_config in trims if isinstance(trim_config, dict)]
+    return trim_list
+
+def _template(product_assumptions: Dict[str, Any], assumptions: Dict[str, Any],
+              trim_lookup: Optional[Dict[str, str]]) -> PayloadTemplate:
+    static = {
+        "upcycled": product_assumptions.get("upcycled", False),
+        "airTransportRatio": product_assumptions.get("airTransportRatio", 0.0),
+    }
+    trims = resolve_trims(product_assumptions.get("trims", []), trim_lookup)
+    if trims:
+        static["trims"] = trims
+    return PayloadTemplate(
+        default_mass=product_assumptions.get("default_mass", assumptions.get("default_mass", 0.17)),
+        static=static,
+    )
+
+def compile_payload_templates(assumptions: Dict[str, Any], trims_data: List = None,
+                              default_product: str = "tshirt") -> PayloadTemplates:
+    assumptions = assumptions or {}
+    products_config = assumptions.get("products", {}) or {}
+    trim_lookup = _trim_lookup(trims_data) if trims_data else None
+    by_product = {
+        name: _template(product_assumptions, assumptions, trim_lookup)
+        for name, product_assumptions in products_config.items() if product_assumptions
+    }
+    configured_default = assumptions.get("default_product", default_product)
+    fallback_name = assumptions.get("default_product", "tshirt")
+    fallback = by_product.get(fallback_name) or _template({}, assumptions, trim_lookup)
+    return PayloadTemplates(
+        default_product=configured_default,
+        fabric_process=assumptions.get("default_fabric_process", "weaving"),
+        making_complexity=assumptions.get("default_making_complexity", "medium"),
+        number_of_references=assumptions.get("default_number_of_references", 100),
+        price=assumptions.get("default_price", 100.0),
+        by_product=by_product,
+        fallback=fallback,
+    )
@@ -0,0 +1,197 @@
+"""
+Vectorized radar-axis scoring and weighted ranking for a group of suppliers.
+
+Server-side port of ``calculateRadarScores`` (static/js/radar-scoring.js) and
+``getRecommendedSuppliers`` (static/js/weighted-scoring.js): every axis is
+computed for the whole group at once with NumPy arrays and produces the same
+numbers as the browser code, including its round-half-up to 2 decimals.
+"""
+from typing import Optional, Dict, Any, List, Iterable
+import math
+import numpy as np
+from ..models.supplier import SupplierColumns
+
+WEIGHT_KEYS = ("ecobalyse", "transparency", "price", "leadTime", "moq", "certifications")
+PERCENT_DIFF_MAX = 300.0  # % difference mapped to score 0
+TRACEABILITY_STEPS = 5
+_UNKNOWN_VALUES = {"pays inconnu", "---"}
+
+def _round2(values: np.ndarray) -> np.ndarray:
+    # JS Math.round(x * 100) / 100 rounds half up, unlike np.round (half to even)
+    return np.floor(values * 100 + 0.5) / 100
+
+def _is_unknown_country(value) -> bool:
+    if not value:
+        return True
+    normalized = str(value).strip().lower()
+    return normalized == "" or "pays inconnu" in normalized or normalized in _UNKNOWN_VALUES
+
+def traceability_steps(record: Dict[str, Any]) -> int:
+    """Number of traceable production steps (fibre, spinning, fabric, dyeing, making)."""
+    steps = 1 if record.get("material_origin") else 0
+    for key in ("countrySpinning", "countryFabric", "countryDyeing", "countryMaking"):
+        if not _is_unknown_country(record.get(key)):
+            steps += 1
+    return steps
+
+def normalize_certifications(certifications) -> List:
+    if not isinstance(certifications, list):
+        return []
+    cleaned = (c.strip() if isinstance(c, str) else c for c in certifications)
+    return [c for c in cleaned if c]
+
+def material_category(record: Dict[str, Any]) -> str:
+    """Chart group of a supplier, as ``getMaterialCategory`` in radar-charts.js."""
+    materials = record.get("material_origin") or []
+    if not materials:
+        return "other"
+    primary, max_share = None, 0
+    for mat in materials:
+        share = (mat or {}).get("share") or 0
+        if share > max_share:
+            max_share = share
+            primary = mat.get("id") or ""
+    if not primary:
+        return "other"
+    mat_id = primary.lower()
+    if len(materials) > 1 and not max_share > 0.5:
+        return "composite"
+    if "coton" in mat_id or "cotton" in mat_id:
+        return "cotton"
+    if "laine" in mat_id or "wool" in mat_id:
+        return "wool"
+    if any(k in mat_id for k in ("polyester", "nylon", "acrylique", "acrylic", "viscose", "cupro")):
+        return "synthetic"
+    return mat_id
+
+def percent_diff_from_best(values: np.ndarray):
+    """Score each value by its % difference from the group minimum (NaN = missing).
+
+    Returns ``(scores, diff_percents)``; the best value scores 5 and a 300% gap scores 0.
+    Missing values, or a group whose best value is 0, score 5 with a 0% difference.
+    """
+    scores = np.full(values.shape, 5.0)
+    diffs = np.zeros(values.shape)
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return scores, diffs
+    best = values[valid].min()
+    if best == 0:
+        return scores, diffs
+    diff = (values[valid] - best) / best * 100
+    score = 5 * (1 - np.sqrt(np.maximum(0, diff) / PERCENT_DIFF_MAX))
+    scores[valid] = _round2(np.clip(score, 0, 10))
+    diffs[valid] = _round2(diff)
+    return scores, diffs
+
+def radar_scores(records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Compute every radar axis for one group of supplier records at once.
+
+    Records are rows as returned by ``/api/suppliers/for-radar``. The result maps each
+    axis name of the JS score objects to an array aligned with ``records``.
+    """
+    n = len(records)
+    columns = SupplierColumns.from_records(records, ("ecobalyse_score", "price_eur_per_m", "lead_time_weeks", "moq_m"))
+    steps = np.fromiter((traceability_steps(r) for r in records), dtype=float, count=n)
+    traceability_raw = steps / TRACEABILITY_STEPS * 10
+    traceability = 1 + traceability_raw / 10 * 8  # scale 0-10 to 1-9
+    cert_counts = np.fromiter((len(normalize_certifications(r.get("certifications"))) for r in records), dtype=float, count=n)
+    axes = {
+        "traceability": traceability if n == 1 else _round2(traceability),
+        "traceabilitySteps": np.floor(traceability_raw / 10 * TRACEABILITY_STEPS + 0.5),
+        "certificationsScore": cert_counts,
+        "certificationsCount": cert_counts,
+    }
+    for axis, key in (("ecobalyse", "ecobalyse_score"), ("price", "price_eur_per_m"),
+                      ("leadTime", "lead_time_weeks"), ("moq", "moq_m")):
+        if n == 1:
+            # A lone supplier is its own best: every relative axis sits at the centre
+            scores, diffs = np.full(1, 5.0), np.zeros(1)
+        else:
+            scores, diffs = percent_diff_from_best(columns[key])
+        axes[axis] = scores
+        axes[f"{axis}DiffPercent"] = diffs
+    return axes
+
+def parse_weights(raw) -> Dict[str, float]:
+    """Accept a mapping or a ``"ecobalyse:30,price:20"`` string; unknown keys are ignored.
+
+    Raises ValueError naming the key when a weight is not a finite, non-negative number.
+    """
+    weights = {k: 0.0 for k in WEIGHT_KEYS}
+    if not raw:
+        return weights
+    items = raw.items() if isinstance(raw, dict) else (part.split(":", 1) for part in str(raw).split(",") if ":" in part)
+    for key, value in items:
+        key = key.strip()
+        if key in weights:
+            try:
+                weight = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"weight for {key} must be a number")
+            if not math.isfinite(weight) or weight < 0:
+                raise ValueError(f"weight for {key} must be a finite, non-negative number")
+            weights[key] = weight
+    return weights
+
+def weighted_scores(axes: Dict[str, np.ndarray], weights: Dict[str, float]) -> np.ndarray:
+    """Weighted sum of radar axes, summed in the same order as ``calculateWeightedScore``."""
+    total = 0.0
+    for key in WEIGHT_KEYS:
+        total += weights.get(key, 0.0)
+    n = len(axes["ecobalyse"])
+    if total == 0:
+        return np.zeros(n)
+    columns = (
+        ("ecobalyse", "ecobalyse", 5.0),
+        ("transparency", "traceability", 5.0),
+        ("price", "price", 5.0),
+        ("leadTime", "leadTime", 5.0),
+        ("moq", "moq", 5.0),
+        ("certifications", "certificationsScore", 0.0),
+    )
+    result = np.zeros(n)
+    for weight_key, axis, fallback in columns:
+        normalized_weight = weights.get(weight_key, 0.0) / total * 100
+        values = np.where(np.isnan(axes[axis]), fallback, axes[axis])
+        result = result + values * normalized_weight / 100
+    return _round2(result)
+
+def rank_group(records: List[Dict[str, Any]], weights: Dict[str, float]) -> List[Dict[str, Any]]:
+    """Rank one group best-first (ties keep input order), like ``getRecommendedSuppliers``."""
+    if not records:
+        return []
+    axes = radar_scores(records)
+    scores = weighted_scores(axes, weights)
+    order = np.argsort(-scores, kind="stable")
+    ranked = []
+    for i in order:
+        record = records[i]
+        axis_values = {name: float(values[i]) for name, values in axes.items()}
+        axis_values["traceabilitySteps"] = int(axis_values["traceabilitySteps"])
+        axis_values["certificationsCount"] = int(axis_values["certificationsCount"])
+        axis_values["certificationsScore"] = int(axis_values["certificationsScore"])
+        axis_values["certifications"] = normalize_certifications(record.get("certifications"))
+        axis_values["supplier"] = record.get("supplier") or "Unknown"
+        axis_values["fabricName"] = record.get("fabricName") or ""
+        ranked.append({
+            "id": record.get("id"),
+            "supplier": axis_values["supplier"],
+            "fabricName": axis_values["fabricName"],
+            "weightedScore": float(scores[i]),
+            "scores": axis_values,
+            "material_origin": record.get("material_origin") or [],
+        })
+    return ranked
+
+def rank_by_category(records: Iterable[Dict[str, Any]], weights: Dict[str, float],
+                     category: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Group records by material category (the dashboard's chart groups) and rank each group."""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        if record.get("error"):
+            continue
+        groups.setdefault(material_category(record), []).append(record)
+    if category is not None:
+        groups = {category: groups.get(category, [])}
+    return {name: rank_group(rows, weights) for name, rows in groups.items()}
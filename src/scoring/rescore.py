@@ -0,0 +1,297 @@
+"""
+Resumable bulk rescoring, e.g. after moving ``base_url`` to a new Ecobalyse version:
+
+    python -m src.scoring.rescore [--max-in-flight 8] [--report out/rescore.csv]
+
+The catalog is streamed in id order, a page at a time, and scored through the
+bounded batch pool in the background rate-limit lane. New scores are written to
+the supplier store like any other scoring. After each page the run's checkpoint
+(last id done) is committed to a ledger file, so an interrupted run picks up
+after the last finished page. Suppliers that failed are retried once the whole
+catalog is done; the run only counts as finished when none are left.
+
+The ledger also keeps one row per supplier and score version, with the score the
+supplier had before (and the version it was computed under) next to the new one.
+Previous scores come from the store's per-version history, so suppliers already
+rescored by dashboard reads keep theirs.
+``diff_report`` ranks each garment type by ecobalyse score under both versions
+and lists the suppliers whose rank changed.
+"""
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Iterable
+import argparse
+import csv
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from ..api.rate_limit import BACKGROUND, priority
+from ..storage.repository import SupplierRepository
+from .context import ScoringContext, get_scoring_context
+from .incremental import score_rows
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONFIG_ROOT = os.path.join(PROJECT_ROOT, "config")
+DEFAULT_LEDGER_PATH = os.path.join(PROJECT_ROOT, "data", "cache", "rescore.sqlite")
+DEFAULT_PAGE_SIZE = 100
+REPORT_COLUMNS = ("id", "supplier", "fabricName", "product", "previous_version", "previous_score", "ecobalyse_score",
+                  "delta_percent", "previous_rank", "rank")
+
+@dataclass
+class RescoreRun:
+    score_version: str
+    checkpoint_id: int = 0  # suppliers with id <= checkpoint_id are done
+    scored: int = 0
+    failed: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+class RescoreLedger:
+    """Checkpoints and per-version score history of rescoring runs (SQLite)."""
+
+    def __init__(self, path: str = DEFAULT_LEDGER_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " score_version TEXT PRIMARY KEY,"
+            " checkpoint_id INTEGER NOT NULL DEFAULT 0,"
+            " scored INTEGER NOT NULL DEFAULT 0,"
+            " failed INTEGER NOT NULL DEFAULT 0,"
+            " started_at REAL,"
+            " finished_at REAL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS score_history ("
+            " supplier_id INTEGER NOT NULL,"
+            " score_version TEXT NOT NULL,"
+            " ecobalyse_score REAL,"  # NULL if scoring failed
+            " final_score REAL,"
+            " previous_version TEXT,"
+            " previous_score REAL,"
+            " supplier TEXT,"
+            " fabricName TEXT,"
+            " product TEXT,"
+            " recorded_at REAL NOT NULL,"
+            " PRIMARY KEY (supplier_id, score_version))"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def run(self, score_version: str) -> Optional[RescoreRun]:
+        row = self._connect().execute(
+            "SELECT score_version, checkpoint_id, scored, failed, started_at, finished_at FROM runs WHERE score_version = ?",
+            (score_version,),
+        ).fetchone()
+        return RescoreRun(*row) if row else None
+
+    def start(self, score_version: str, restart: bool = False) -> RescoreRun:
+        """The run for ``score_version``, created (or reset with ``restart``) as needed."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if restart:
+                conn.execute("DELETE FROM runs WHERE score_version = ?", (score_version,))
+            conn.execute("INSERT OR IGNORE INTO runs(score_version, started_at) VALUES (?, ?)", (score_version, time.time()))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.run(score_version)
+
+    def record_page(self, run: RescoreRun, entries: List[tuple], checkpoint_id: int, scored: int, failed: int):
+        """Store a page's history rows and advance the checkpoint in one transaction."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO score_history(supplier_id, score_version, ecobalyse_score, final_score,"
+                " previous_version, previous_score, supplier, fabricName, product, recorded_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                entries,
+            )
+            conn.execute(
+                "UPDATE runs SET checkpoint_id = ?, scored = scored + ?, failed = failed + ? WHERE score_version = ?",
+                (checkpoint_id, scored, failed, run.score_version),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        run.checkpoint_id = checkpoint_id
+        run.scored += scored
+        run.failed += failed
+
+    def finish(self, run: RescoreRun):
+        run.finished_at = time.time()
+        self._connect().execute("UPDATE runs SET finished_at = ? WHERE score_version = ?",
+                                (run.finished_at, run.score_version))
+
+    def forget(self, run: RescoreRun, failed_ids: Iterable[int]):
+        """Drop failed entries of suppliers that no longer exist."""
+        failed_ids = list(failed_ids)
+        if not failed_ids:
+            return
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = conn.executemany(
+                "DELETE FROM score_history WHERE supplier_id = ? AND score_version = ? AND ecobalyse_score IS NULL",
+                [(supplier_id, run.score_version) for supplier_id in failed_ids],
+            ).rowcount
+            conn.execute("UPDATE runs SET failed = failed - ? WHERE score_version = ?", (removed, run.score_version))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        run.failed -= removed
+
+    def failed_ids(self, score_version: str) -> List[int]:
+        return [row[0] for row in self._connect().execute(
+            "SELECT supplier_id FROM score_history WHERE score_version = ? AND ecobalyse_score IS NULL"
+            " ORDER BY supplier_id", (score_version,))]
+
+    def history(self, score_version: str) -> List[Dict[str, Any]]:
+        cursor = self._connect().execute(
+            "SELECT supplier_id, supplier, fabricName, product, previous_version, previous_score, ecobalyse_score"
+            " FROM score_history WHERE score_version = ? ORDER BY supplier_id",
+            (score_version,),
+        )
+        names = ["id"] + [d[0] for d in cursor.description[1:]]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+def _history_entry(item, score_version: str, previous: Optional[tuple], now: float) -> tuple:
+    row = item.row
+    previous_version, previous_score = previous or (None, None)
+    return (row["id"], score_version, item.ecobalyse_score, item.final_score, previous_version, previous_score,
+            row.get("supplier"), row.get("fabricName"), row.get("product"), now)
+
+def _score_page(page: List[Dict[str, Any]], repository: SupplierRepository, config_root: str, context: ScoringContext,
+                score_version: str, max_in_flight: Optional[int]):
+    """Score ``page``; returns ``(history entries, number scored)``."""
+    # Scores under earlier versions, kept next to the new ones
+    previous = repository.previous_scores([row["id"] for row in page], score_version)
+    results = score_rows(page, repository, config_root, context=context, max_in_flight=max_in_flight)
+    now = time.time()
+    entries = [_history_entry(item, score_version, previous.get(item.row["id"]), now) for item in results]
+    return entries, sum(1 for item in results if item.ecobalyse_score is not None)
+
+def rescore_catalog(repository: SupplierRepository, config_root: str = CONFIG_ROOT, ledger: RescoreLedger = None,
+                    context: ScoringContext = None, page_size: int = DEFAULT_PAGE_SIZE, max_in_flight: int = None,
+                    restart: bool = False, progress=None) -> RescoreRun:
+    """Rescore every stored supplier under the configured Ecobalyse version, resuming a previous run.
+
+    ``progress(run)`` is called after each committed page. Suppliers that failed
+    are retried at the end; while some still fail the run stays unfinished, and
+    the next call retries them again.
+    """
+    if context is None:
+        context = get_scoring_context(config_root)
+    ledger = ledger or RescoreLedger()
+    run = ledger.start(context.payload_version, restart=restart)
+    if run.finished_at is not None:
+        return run
+    rows = repository.iter_records(after_id=run.checkpoint_id, page_size=page_size)
+    with priority(BACKGROUND):
+        while True:
+            page = list(itertools.islice(rows, page_size))
+            if not page:
+                break
+            entries, scored = _score_page(page, repository, config_root, context, run.score_version, max_in_flight)
+            ledger.record_page(run, entries, page[-1]["id"], scored, len(entries) - scored)
+            if progress is not None:
+                progress(run)
+        failed = ledger.failed_ids(run.score_version)
+        for start in range(0, len(failed), page_size):
+            ids = failed[start:start + page_size]
+            page = repository.get_many(ids)
+            ledger.forget(run, set(ids) - {row["id"] for row in page})  # deleted since
+            entries, scored = _score_page(page, repository, config_root, context, run.score_version, max_in_flight)
+            ledger.record_page(run, entries, run.checkpoint_id, scored, -scored)
+    if run.failed:
+        return run  # retried by the next call
+    impacts = context.impact_store
+    if impacts is not None:
+        impacts.compact()  # the whole catalog's impacts in one generation
+    ledger.finish(run)
+    return run
+
+def _ranks(rows: List[Dict[str, Any]], key: str) -> Dict[int, int]:
+    """1-based rank by ascending ``key`` (lower impact first) within each product."""
+    ranks = {}
+    by_product = sorted((r for r in rows if r[key] is not None), key=lambda r: (r["product"] or "", r[key], r["id"]))
+    for _, group in itertools.groupby(by_product, key=lambda r: r["product"] or ""):
+        for rank, row in enumerate(group, start=1):
+            ranks[row["id"]] = rank
+    return ranks
+
+def diff_report(ledger: RescoreLedger, score_version: str) -> List[Dict[str, Any]]:
+    """Suppliers whose rank within their garment type changed between their previous and new score."""
+    rows = [r for r in ledger.history(score_version) if r["previous_score"] is not None and r["ecobalyse_score"] is not None]
+    previous, current = _ranks(rows, "previous_score"), _ranks(rows, "ecobalyse_score")
+    changed = []
+    for row in rows:
+        if previous[row["id"]] == current[row["id"]]:
+            continue
+        delta = None
+        if row["previous_score"]:
+            delta = round((row["ecobalyse_score"] - row["previous_score"]) / row["previous_score"] * 100, 2)
+        changed.append(dict(row, delta_percent=delta, previous_rank=previous[row["id"]], rank=current[row["id"]]))
+    changed.sort(key=lambda r: (r["product"] or "", r["rank"]))
+    return changed
+
+def write_report(rows: List[Dict[str, Any]], path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, REPORT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+def main(argv=None):
+    from ..storage.sqlite_repository import SQLiteSupplierRepository, DEFAULT_DB_PATH
+    parser = argparse.ArgumentParser(prog="python -m src.scoring.rescore",
+                                     description="Rescore the whole catalog under the configured Ecobalyse version.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite supplier store (default: %(default)s)")
+    parser.add_argument("--ledger", default=DEFAULT_LEDGER_PATH, help="checkpoints and score history (default: %(default)s)")
+    parser.add_argument("--config", default=CONFIG_ROOT, help="config directory (default: %(default)s)")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="simultaneous simulator calls (default: batch.max_in_flight)")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="suppliers per checkpoint")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint of a previous run")
+    parser.add_argument("--report", help="write the ranking changes as CSV to this file")
+    parser.add_argument("--report-only", action="store_true", help="only write the report of the last run")
+    args = parser.parse_args(argv)
+
+    repository = SQLiteSupplierRepository(args.db)
+    ledger = RescoreLedger(args.ledger)
+    context = get_scoring_context(args.config)
+    total = repository.count()
+    if not args.report_only:
+        print(f"Rescoring {total} suppliers under {context.payload_version}")
+        run = rescore_catalog(repository, args.config, ledger, context=context, page_size=args.page_size,
+                              max_in_flight=args.max_in_flight, restart=args.restart,
+                              progress=lambda run: print(f"  up to id {run.checkpoint_id}: {run.scored} scored, {run.failed} failed"))
+        if run.finished_at is None:
+            print(f"Stopped: {run.scored} scored, {run.failed} still failing (run again to retry them)")
+        else:
+            print(f"Done: {run.scored} scored")
+    changed = diff_report(ledger, context.payload_version)
+    print(f"{len(changed)} suppliers changed rank")
+    if args.report:
+        write_report(changed, args.report)
+        print(f"Report written to {args.report}")
+    else:
+        for row in changed:
+            print(f"  {row['product']}: {row['supplier']} / {row['fabricName']}: rank {row['previous_rank']} -> {row['rank']}"
+                  f" ({row['previous_score']} -> {row['ecobalyse_score']})")
+
+if __name__ == "__main__":
+    main()
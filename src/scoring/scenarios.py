@@ -0,0 +1,147 @@
+"""
+What-if sweeps: score one supplier under a grid of Ecobalyse parameter overrides.
+
+``overrides`` maps a payload field to the alternatives to try, e.g.
+``{"countryMaking": ["Portugal", "Chine"], "dyeingProcess": ["continuous", "discontinuous"]}``.
+Every combination (plus the supplier as stored) becomes a variant. Each variant
+is turned into a payload by ``_build_payload`` through the context's payload
+templates. Variants that yield the same payload (e.g. an override equal to the
+stored value) are scored once. Unique payloads are then scored concurrently
+through ``batch`` and the persistent score cache.
+
+``material_origin`` alternatives are either a full material list or a
+``{material id: share}`` mapping, so its grid is a list of those. A mapping
+keeps the supplier's spinning and country for the materials it already has.
+"""
+from dataclasses import dataclass, field, replace
+from typing import Optional, Dict, Any, List
+import itertools
+from ..models.supplier import Supplier
+from .batch import score_suppliers
+from .context import ScoringContext, get_scoring_context
+from .ecobalyse_score import resolved_payload
+
+SCENARIO_FIELDS = (
+    "countrySpinning",
+    "countryFabric",
+    "countryDyeing",
+    "countryMaking",
+    "dyeingProcess",
+    "fabricProcess",
+    "makingComplexity",
+    "material_origin",
+)
+DEFAULT_MAX_VARIANTS = 200
+
+@dataclass
+class ScenarioResult:
+    """One row of the comparison table."""
+    overrides: Dict[str, Any]  # {} for the supplier as stored
+    payload_key: str
+    ecobalyse_score: Optional[float] = None
+    final_csr_score: Optional[float] = None
+    delta_percent: Optional[float] = None  # vs. the baseline ecobalyse score; negative = lower impact
+    error: Optional[str] = None
+    duplicates: List[Dict[str, Any]] = field(default_factory=list)  # other overrides giving the same payload
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "overrides": self.overrides,
+            "payload_key": self.payload_key,
+            "ecobalyse_score": self.ecobalyse_score,
+            "final_csr_score": self.final_csr_score,
+            "delta_percent": self.delta_percent,
+            "error": self.error,
+            "duplicates": self.duplicates,
+        }
+
+def _material_variant(base: Optional[List[dict]], value) -> List[dict]:
+    if isinstance(value, list):
+        return value
+    if not isinstance(value, dict):
+        raise ValueError("material_origin alternatives must be a list of materials or a {id: share} mapping")
+    known = {m.get("id"): m for m in base or [] if isinstance(m, dict)}
+    materials = []
+    for material_id, share in value.items():
+        try:
+            share = float(share)
+        except (TypeError, ValueError):
+            raise ValueError(f"material_origin share for {material_id!r} must be a number")
+        if share > 0:
+            materials.append({**known.get(material_id, {"id": material_id}), "share": share})
+    return materials
+
+def expand_grid(overrides: Dict[str, Any], max_variants: int = DEFAULT_MAX_VARIANTS) -> List[Dict[str, Any]]:
+    """All combinations of ``overrides``; raises ValueError on unknown fields or an oversized grid."""
+    unknown = sorted(set(overrides or {}) - set(SCENARIO_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown scenario field(s): {', '.join(unknown)}; expected {', '.join(SCENARIO_FIELDS)}")
+    axes = []
+    for name in SCENARIO_FIELDS:
+        if name not in (overrides or {}):
+            continue
+        values = overrides[name]
+        if not isinstance(values, list):
+            values = [values]  # a single alternative
+        if not values:
+            raise ValueError(f"No alternatives given for {name}")
+        axes.append([(name, value) for value in values])
+    size = 1
+    for axis in axes:
+        size *= len(axis)
+    if size > max_variants:
+        raise ValueError(f"{size} scenarios requested; at most {max_variants} per sweep")
+    return [dict(combination) for combination in itertools.product(*axes)] if axes else []
+
+def apply_overrides(supplier: Supplier, overrides: Dict[str, Any]) -> Supplier:
+    changes = dict(overrides)
+    if "material_origin" in changes:
+        changes["material_origin"] = _material_variant(supplier.material_origin, changes["material_origin"])
+    return replace(supplier, **changes)
+
+def _scenario_settings(context: ScoringContext) -> int:
+    cfg = context.ecoconfig.get("scenarios", {}) or {}
+    return int(cfg.get("max_variants", DEFAULT_MAX_VARIANTS))
+
+def run_scenarios(supplier: Supplier, overrides: Dict[str, Any], config_root: str, context: ScoringContext = None,
+                  max_variants: int = None, max_in_flight: int = None) -> List[ScenarioResult]:
+    """Score ``supplier`` as stored and under every combination of ``overrides``.
+
+    Returns one ScenarioResult per distinct payload, lowest ecobalyse score first
+    (unscored variants last); the baseline has ``overrides == {}``. ``max_variants``
+    defaults to ``scenarios.max_variants`` in ``ecobalyse.yaml``.
+    """
+    if context is None:
+        context = get_scoring_context(config_root)
+    if max_variants is None:
+        max_variants = _scenario_settings(context)
+    combinations = [{}] + expand_grid(overrides, max_variants)
+
+    # De-duplicate on the payload fingerprint: identical payloads are scored once
+    unique: Dict[str, ScenarioResult] = {}
+    variants: List[Supplier] = []
+    for combination in combinations:
+        variant = apply_overrides(supplier, combination) if combination else supplier
+        _, key = resolved_payload(variant, context)
+        if key in unique:
+            unique[key].duplicates.append(combination)
+            continue
+        unique[key] = ScenarioResult(overrides=combination, payload_key=key)
+        variants.append(variant)
+
+    results = list(unique.values())
+    for result, outcome in zip(results, score_suppliers(variants, config_root, max_in_flight=max_in_flight,
+                                                        context=context)):
+        if outcome.result is not None:
+            result.ecobalyse_score, result.final_csr_score = outcome.result
+        elif outcome.timed_out:
+            result.error = "Ecobalyse request timed out"
+        else:
+            result.error = outcome.error or "Ecobalyse score unavailable"
+
+    baseline = results[0].ecobalyse_score
+    for result in results:
+        if baseline and result.ecobalyse_score is not None:
+            result.delta_percent = round((result.ecobalyse_score - baseline) / baseline * 100, 2)
+    results.sort(key=lambda r: (r.ecobalyse_score is None, r.ecobalyse_score or 0.0))
+    return results
@@ -0,0 +1,29 @@
+"""
+Import/export the supplier store from/to the YAML format.
+
+    python -m src.storage import data/examples/suppliers_min.yaml
+    python -m src.storage export out/suppliers.yaml
+"""
+import argparse
+from .sqlite_repository import SQLiteSupplierRepository, DEFAULT_DB_PATH
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.storage", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite supplier store (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="append the rows of a YAML file to the store")
+    imp.add_argument("path")
+    exp = sub.add_parser("export", help="write the whole store as YAML")
+    exp.add_argument("path")
+    args = parser.parse_args(argv)
+
+    repo = SQLiteSupplierRepository(args.db)
+    if args.command == "import":
+        ids = repo.import_yaml(args.path)
+        print(f"Imported {len(ids)} suppliers into {args.db}")
+    else:
+        repo.export_yaml(args.path)
+        print(f"Exported {repo.count()} suppliers to {args.path}")
+
+if __name__ == "__main__":
+    main()
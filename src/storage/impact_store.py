@@ -0,0 +1,302 @@
+"""
+Full Ecobalyse impact vectors in a compact columnar store.
+
+The simulator answers with a dozen impacts (``cch``, ``wtu``, ``etf``, ...), the
+complements (``microfibers``, ...) and, from the detailed endpoint, the same
+impacts per life-cycle step. ``flatten_simulation`` turns a response into flat
+columns (``cch``, ``complements.microfibers``, ``lifecycle.<step>.cch``).
+The store keeps them keyed by payload fingerprint (the score cache key; a
+supplier's key follows from its record, see ``ecobalyse_score.impacts_for_records``),
+so new radar axes and export columns are computed locally instead of re-querying
+the catalog.
+
+Layout of the store directory:
+
+* ``staging.sqlite``: rows written since the last compaction (any worker may
+  write);
+* ``gen-<n>/``: one compaction, as ``keys.npy`` (sorted fixed-width keys) and
+  one float64 ``.npy`` per column (NaN = not reported), listed in
+  ``columns.json``. ``CURRENT`` names the live generation and is replaced
+  atomically.
+
+Generations are opened with ``np.load(mmap_mode="r")`` so reading a column of a
+large catalog pages in only that column. Compaction runs once the staging table
+holds ``compact_threshold`` rows (or explicitly, e.g. after a rescore).
+"""
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any, List, Iterable, Sequence, Set
+import numpy as np
+
+DEFAULT_IMPACT_STORE_PATH = os.path.join("data", "cache", "impacts")
+DEFAULT_COMPACT_THRESHOLD = 1000
+KEY_DTYPE = "S64"  # sha256 hex digest
+COMPACT_LEASE_SECONDS = 300
+
+def flatten_simulation(simulation: Dict[str, Any]) -> Dict[str, float]:
+    """Flat ``{column: value}`` of the numeric impacts in a simulator response."""
+    columns: Dict[str, float] = {}
+
+    def _add(prefix: str, impacts):
+        for name, value in (impacts or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                columns[prefix + name] = float(value)
+
+    _add("", simulation.get("impacts"))
+    _add("complements.", simulation.get("complementsImpacts"))
+    if isinstance(simulation.get("durability"), (int, float)):
+        columns["durability"] = float(simulation["durability"])
+    for step in simulation.get("lifeCycle") or []:
+        if isinstance(step, dict) and step.get("label"):
+            _add(f"lifecycle.{step['label']}.", step.get("impacts"))
+    return columns
+
+class ImpactTable:
+    """One compacted generation, memory-mapped."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "columns.json"), "r", encoding="utf-8") as f:
+            self.columns: List[str] = json.load(f)
+        self.keys = np.load(os.path.join(directory, "keys.npy"), mmap_mode="r")
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def column(self, name: str) -> Optional[np.ndarray]:
+        if name not in self.columns:
+            return None
+        array = self._arrays.get(name)
+        if array is None:
+            array = self._arrays[name] = np.load(os.path.join(self.directory, f"{self.columns.index(name)}.npy"),
+                                                 mmap_mode="r")
+        return array
+
+    def rows(self, keys: Sequence[str]) -> np.ndarray:
+        """Row index of each key, -1 where missing."""
+        wanted = np.asarray([k.encode("ascii") for k in keys], dtype=KEY_DTYPE)
+        if not len(self.keys) or not len(wanted):
+            return np.full(len(wanted), -1)
+        positions = np.searchsorted(self.keys, wanted)
+        clipped = np.minimum(positions, len(self.keys) - 1)
+        return np.where(self.keys[clipped] == wanted, clipped, -1)
+
+class ImpactStore:
+    def __init__(self, path: str, compact_threshold: int = DEFAULT_COMPACT_THRESHOLD):
+        self.path = path
+        self.compact_threshold = int(compact_threshold)
+        self._local = threading.local()
+        self._table: Optional[ImpactTable] = None
+        self._table_lock = threading.Lock()
+        self._known: Set[str] = set()  # keys has() already found
+        os.makedirs(path, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS staged ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " key TEXT NOT NULL,"
+            " api_version TEXT,"
+            " data TEXT NOT NULL)"  # flattened columns (JSON)
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS staged_key ON staged(key)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value REAL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.path, "staging.sqlite"), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --------- writes ---------
+
+    def put(self, key: str, simulation: Dict[str, Any], api_version: str = None):
+        """Stage the impacts of one simulator response."""
+        columns = flatten_simulation(simulation or {})
+        if not columns:
+            return
+        conn = self._connect()
+        conn.execute("INSERT INTO staged(key, api_version, data) VALUES (?, ?, ?)", (key, api_version, json.dumps(columns)))
+        if self.compact_threshold and self.staged_count() >= self.compact_threshold:
+            self.compact()
+
+    def staged_count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM staged").fetchone()[0]
+
+    def _claim_compaction(self) -> bool:
+        now = time.time()
+        conn = self._connect()
+        conn.execute("INSERT OR IGNORE INTO meta(name, value) VALUES ('compacting_until', 0)")
+        return conn.execute("UPDATE meta SET value = ? WHERE name = 'compacting_until' AND value < ?",
+                            (now + COMPACT_LEASE_SECONDS, now)).rowcount == 1
+
+    def compact(self) -> Optional[str]:
+        """Merge staged rows into a new generation; returns its directory (None if another worker is at it)."""
+        if not self._claim_compaction():
+            return None
+        conn = self._connect()
+        try:
+            staged = conn.execute("SELECT seq, key, data FROM staged ORDER BY seq").fetchall()
+            current = self.table()
+            if not staged and current is not None:
+                return current.directory
+            latest: Dict[str, Dict[str, float]] = {}
+            for _, key, data in staged:
+                latest[key] = json.loads(data)  # the newest response for a payload wins
+            columns: List[str] = list(current.columns) if current is not None else []
+            for values in latest.values():
+                columns.extend(name for name in values if name not in columns)
+            old_keys = np.asarray(current.keys) if current is not None else np.empty(0, dtype=KEY_DTYPE)
+            staged_keys = list(latest)
+            old_rows = current.rows(staged_keys) if current is not None else np.full(len(staged_keys), -1)
+            new_keys = [key for key, row in zip(staged_keys, old_rows) if row < 0]
+            all_keys = np.concatenate([old_keys, np.asarray([k.encode("ascii") for k in new_keys], dtype=KEY_DTYPE)])
+            # Position of each staged key in all_keys: its old row, or after the old rows
+            new_positions = iter(range(len(old_keys), len(all_keys)))
+            positions = [row if row >= 0 else next(new_positions) for row in old_rows]
+            order = np.argsort(all_keys, kind="stable")
+            generation = self._next_generation()
+            tmp = os.path.join(self.path, f".{generation}.tmp")
+            os.makedirs(tmp, exist_ok=True)
+            np.save(os.path.join(tmp, "keys.npy"), all_keys[order])
+            for index, name in enumerate(columns):
+                array = np.full(len(all_keys), np.nan)
+                old_column = current.column(name) if current is not None else None
+                if old_column is not None:
+                    array[:len(old_keys)] = old_column
+                for position, key in zip(positions, staged_keys):
+                    array[position] = latest[key].get(name, np.nan)
+                np.save(os.path.join(tmp, f"{index}.npy"), array[order])
+            with open(os.path.join(tmp, "columns.json"), "w", encoding="utf-8") as f:
+                json.dump(columns, f)
+            final = os.path.join(self.path, generation)
+            os.replace(tmp, final)
+            pointer = os.path.join(self.path, "CURRENT.tmp")
+            with open(pointer, "w", encoding="utf-8") as f:
+                f.write(generation)
+            os.replace(pointer, os.path.join(self.path, "CURRENT"))
+            if staged:
+                conn.execute("DELETE FROM staged WHERE seq <= ?", (staged[-1][0],))
+            self._drop_old_generations(keep=(generation, current and os.path.basename(current.directory)))
+            return final
+        finally:
+            conn.execute("UPDATE meta SET value = 0 WHERE name = 'compacting_until'")
+
+    def _next_generation(self) -> str:
+        numbers = [int(name[4:]) for name in os.listdir(self.path) if name.startswith("gen-") and name[4:].isdigit()]
+        return f"gen-{max(numbers, default=0) + 1}"
+
+    def _drop_old_generations(self, keep: Iterable[Optional[str]]):
+        # The previous generation stays for readers that still have it mapped
+        keep = set(filter(None, keep))
+        for name in os.listdir(self.path):
+            if name.startswith("gen-") and name not in keep:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    # --------- reads ---------
+
+    def table(self) -> Optional[ImpactTable]:
+        """The live generation (reopened when another worker compacted)."""
+        try:
+            with open(os.path.join(self.path, "CURRENT"), "r", encoding="utf-8") as f:
+                generation = f.read().strip()
+        except FileNotFoundError:
+            return None
+        directory = os.path.join(self.path, generation)
+        with self._table_lock:
+            if self._table is None or self._table.directory != directory:
+                self._table = ImpactTable(directory)
+            return self._table
+
+    def _staged(self, keys: Sequence[str]) -> Dict[str, Dict[str, float]]:
+        staged = {}
+        conn = self._connect()
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), 500):  # stay below SQLite's bound-parameter limit
+            chunk = unique[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            for key, data in conn.execute(f"SELECT key, data FROM staged WHERE key IN ({marks}) ORDER BY seq", chunk):
+                staged[key] = json.loads(data)
+        return staged
+
+    def columns(self) -> List[str]:
+        """Every column reported so far."""
+        table = self.table()
+        names = list(table.columns) if table is not None else []
+        for (data,) in self._connect().execute("SELECT data FROM staged"):
+            names.extend(name for name in json.loads(data) if name not in names)
+        return names
+
+    def has(self, key: str) -> bool:
+        """Whether impacts are stored for ``key``, from the keys only (no column is read)."""
+        if key in self._known:
+            return True
+        table = self.table()
+        found = (table is not None and table.rows([key])[0] >= 0) or self._connect().execute(
+            "SELECT 1 FROM staged WHERE key = ? LIMIT 1", (key,)).fetchone() is not None
+        if found:
+            self._known.add(key)  # compaction carries every key forward, so it stays true
+        return found
+
+    def get(self, key: str) -> Optional[Dict[str, float]]:
+        values = self.lookup([key], None)
+        row = {name: float(array[0]) for name, array in values.items() if not np.isnan(array[0])}
+        return row or None
+
+    def lookup(self, keys: Sequence[str], columns: Optional[Sequence[str]]) -> Dict[str, np.ndarray]:
+        """``{column: float64 array aligned with keys}`` (NaN where unknown); all columns if ``columns`` is None."""
+        keys = list(keys)
+        table = self.table()
+        staged = self._staged(keys)
+        if columns is None:
+            columns = list(table.columns) if table is not None else []
+            for values in staged.values():
+                columns.extend(name for name in values if name not in columns)
+        rows = table.rows(keys) if table is not None else np.full(len(keys), -1)
+        found = rows >= 0
+        overlay = [(i, staged[key]) for i, key in enumerate(keys) if key in staged]
+        result = {}
+        for name in columns:
+            values = np.full(len(keys), np.nan)
+            column = table.column(name) if table is not None else None
+            if column is not None and found.any():
+                values[found] = column[rows[found]]
+            for i, entry in overlay:
+                values[i] = entry.get(name, np.nan)
+            result[name] = values
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        table = self.table()
+        return {
+            "path": self.path,
+            "rows": len(table) if table is not None else 0,
+            "columns": len(table.columns) if table is not None else 0,
+            "staged": self.staged_count(),
+            "generation": os.path.basename(table.directory) if table is not None else None,
+        }
+
+_stores: Dict[str, ImpactStore] = {}
+_stores_lock = threading.Lock()
+
+def impact_store_from_config(ecoconfig: Dict[str, Any], config_root: str) -> Optional[ImpactStore]:
+    """Process-wide ImpactStore described by ``ecobalyse.yaml``'s ``impacts`` section (None if disabled)."""
+    cfg = (ecoconfig or {}).get("impacts", {}) or {}
+    if not cfg or cfg.get("enabled", True) is False:
+        return None
+    path = cfg.get("path", DEFAULT_IMPACT_STORE_PATH)
+    if not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(os.path.abspath(config_root)), path)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = ImpactStore(path, compact_threshold=cfg.get("compact_threshold", DEFAULT_COMPACT_THRESHOLD))
+            _stores[path] = store
+        return store
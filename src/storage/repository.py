@@ -0,0 +1,286 @@
+"""
+Supplier storage interface plus helpers for the legacy YAML file format.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple
+import base64
+import binascii
+import hashlib
+import json
+import math
+import os
+import yaml
+from ..models.supplier import PAYLOAD_FIELDS
+
+@dataclass
+class ScoreState:
+    """Materialized Ecobalyse score stored next to a supplier record."""
+    payload_hash: str  # hash of the record's PAYLOAD_FIELDS when last written
+    ecobalyse_score: Optional[float]
+    score_version: Optional[str]  # ScoringContext.payload_version the score was computed under
+    dirty: bool  # payload-relevant fields changed since the score was computed
+    error: Optional[str] = None  # why the last attempt failed (cleared by a score or a payload edit)
+    error_version: Optional[str] = None  # payload_version of that attempt
+    attempted_at: Optional[float] = None
+    attempts: int = 0  # consecutive failed attempts under error_version
+
+    def is_current(self, score_version: str) -> bool:
+        return not self.dirty and self.ecobalyse_score is not None and self.score_version == score_version
+
+    def failure(self, score_version: str) -> Optional[str]:
+        """Error of the last attempt under ``score_version``, unless a current score is stored."""
+        if self.error is None or self.error_version != score_version or self.is_current(score_version):
+            return None
+        return self.error
+
+    def retry_at(self, base_seconds: float, max_seconds: float) -> float:
+        """When a failed supplier may be sent again: exponential backoff per failed attempt."""
+        return (self.attempted_at or 0.0) + min(max_seconds, base_seconds * 2 ** max(0, self.attempts - 1))
+
+# Sort keys accepted by ``SupplierRepository.query``: text keys sort missing values
+# first, numeric keys (and the stored ecobalyse_score) sort them last
+TEXT_SORT_KEYS = ("supplier", "product", "fabricName")
+NUMERIC_SORT_KEYS = ("price_eur_per_m", "lead_time_weeks", "fabric_lead_time_weeks", "moq_m", "ecobalyse_score")
+SORT_KEYS = ("id",) + TEXT_SORT_KEYS + NUMERIC_SORT_KEYS
+
+@dataclass
+class SupplierQuery:
+    """Filters, sort order and page of a ``SupplierRepository.query`` call.
+
+    ``certifications`` must all be present on a record; ``material`` matches any
+    ``material_origin`` id containing it (case-insensitive). ``cursor`` is the opaque
+    value returned with the previous page.
+    """
+    product: Optional[str] = None
+    supplier: Optional[str] = None
+    fabric_name: Optional[str] = None
+    certifications: Tuple[str, ...] = ()
+    material: Optional[str] = None
+    sort: str = "id"
+    descending: bool = False
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+
+    def __post_init__(self):
+        if self.sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {self.sort} (expected one of {', '.join(SORT_KEYS)})")
+        if self.limit is not None and self.limit < 1:
+            raise ValueError("limit must be a positive integer")
+
+    def encode_cursor(self, sort_value, supplier_id: int) -> str:
+        raw = json.dumps([self.sort, self.descending, sort_value, supplier_id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def decode_cursor(self) -> Optional[Tuple[Any, int]]:
+        """``(sort_value, id)`` of the last record of the previous page, or None."""
+        if not self.cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(self.cursor + "=" * (-len(self.cursor) % 4))
+            sort, descending, sort_value, supplier_id = json.loads(raw)
+        except (ValueError, TypeError, binascii.Error):
+            raise ValueError("Invalid cursor")
+        if sort != self.sort or descending != self.descending or not isinstance(supplier_id, int):
+            raise ValueError("Cursor does not match the requested sort order")
+        return sort_value, supplier_id
+
+def sort_value(record: Dict[str, Any], key: str, ecobalyse_score: Optional[float] = None):
+    """Value ``record`` is ordered by for ``key`` (None replaced like the SQL store does)."""
+    if key == "id":
+        return record["id"]
+    value = ecobalyse_score if key == "ecobalyse_score" else record.get(key)
+    if key in TEXT_SORT_KEYS:
+        return "" if value is None else str(value)
+    try:
+        return math.inf if value is None or isinstance(value, bool) else float(value)
+    except (TypeError, ValueError):
+        return math.inf
+
+def _material_ids(record: Dict[str, Any]) -> List[str]:
+    materials = record.get("material_origin")
+    if not isinstance(materials, list):
+        return []
+    return [str(m.get("id") or "").lower() for m in materials if isinstance(m, dict)]
+
+def _certification_set(record: Dict[str, Any]):
+    certifications = record.get("certifications")
+    if isinstance(certifications, str):
+        certifications = [certifications]
+    if not isinstance(certifications, list):
+        return set()
+    return {str(c).strip().lower() for c in certifications}
+
+def record_matches(record: Dict[str, Any], query: SupplierQuery) -> bool:
+    for field, value in (("product", query.product), ("supplier", query.supplier), ("fabricName", query.fabric_name)):
+        if value is not None and record.get(field) != value:
+            return False
+    if query.certifications:
+        present = _certification_set(record)
+        if any(c.strip().lower() not in present for c in query.certifications):
+            return False
+    if query.material:
+        needle = query.material.lower()
+        if not any(needle in mat_id for mat_id in _material_ids(record)):
+            return False
+    return True
+
+def payload_inputs_hash(record: Dict[str, Any]) -> str:
+    """Hash of only the fields that feed the simulator payload."""
+    inputs = {field: record.get(field) for field in PAYLOAD_FIELDS}
+    encoded = json.dumps(inputs, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+class SupplierRepository(ABC):
+    """Persistent supplier store addressed by stable integer IDs.
+
+    Records are plain dicts in the same shape as the YAML rows; records returned by
+    ``list``/``get`` additionally carry their ``id``.
+    """
+
+    @abstractmethod
+    def list(self, product: str = None, supplier: str = None, fabric_name: str = None) -> List[Dict[str, Any]]:
+        ...
+
+    def iter_records(self, product: str = None, supplier: str = None, fabric_name: str = None,
+                     page_size: int = 200, after_id: int = 0) -> Iterator[Dict[str, Any]]:
+        """Like ``list`` but yields records lazily, in id order from ``after_id`` (exclusive);
+        implementations read them page by page."""
+        records = self.list(product=product, supplier=supplier, fabric_name=fabric_name)
+        yield from sorted((r for r in records if r["id"] > after_id), key=lambda r: r["id"])
+
+    def query(self, query: SupplierQuery) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of matching records in ``query.sort`` order, plus the cursor of the next page.
+
+        The cursor is None on the last page. This default filters ``list()`` in memory;
+        stores should push filtering, ordering and the page limit down to their backend.
+        """
+        records = [r for r in self.list(product=query.product, supplier=query.supplier, fabric_name=query.fabric_name)
+                   if record_matches(r, query)]
+        scores = {}
+        if query.sort == "ecobalyse_score":
+            scores = {i: s.ecobalyse_score for i, s in self.score_states([r["id"] for r in records]).items()}
+        keyed = [((sort_value(r, query.sort, scores.get(r["id"])), r["id"]), r) for r in records]
+        keyed.sort(key=lambda item: item[0], reverse=query.descending)
+        after = query.decode_cursor()
+        if after is not None:
+            after = (math.inf if after[0] is None else after[0], after[1])
+            keyed = [item for item in keyed if (item[0] < after if query.descending else item[0] > after)]
+        if query.limit is None or len(keyed) <= query.limit:
+            return [r for _, r in keyed], None
+        page = keyed[:query.limit]
+        last_value, last_id = page[-1][0]
+        return [r for _, r in page], query.encode_cursor(_json_safe(last_value), last_id)
+
+    @abstractmethod
+    def get(self, supplier_id: int) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def get_many(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """Records for the given ids, in id order (missing ids are skipped)."""
+        ...
+
+    @abstractmethod
+    def add(self, record: Dict[str, Any]) -> int:
+        ...
+
+    @abstractmethod
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> List[int]:
+        """Insert all records in a single transaction (all or nothing)."""
+        ...
+
+    @abstractmethod
+    def update(self, supplier_id: int, record: Dict[str, Any]) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, supplier_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    @abstractmethod
+    def version(self) -> int:
+        """Counter bumped by every committed write (records or scores); shared by all processes."""
+        ...
+
+    @abstractmethod
+    def score_states(self, ids: Iterable[int] = None) -> Dict[int, ScoreState]:
+        ...
+
+    @abstractmethod
+    def failure_states(self, score_version: str) -> Dict[int, ScoreState]:
+        """States of the records whose last attempt under ``score_version`` failed."""
+        ...
+
+    @abstractmethod
+    def save_scores(self, scores: Iterable[Tuple[int, str, float, str]]) -> int:
+        """Store ``(id, payload_hash, ecobalyse_score, score_version)`` tuples.
+
+        A score is only written if the record's payload hash still matches, so a score
+        computed before a concurrent edit never overwrites the dirty flag of the edit.
+        Returns the number of records updated.
+        """
+        ...
+
+    @abstractmethod
+    def previous_scores(self, ids: Iterable[int], score_version: str) -> Dict[int, Tuple[str, float]]:
+        """``{id: (version, score)}``: each record's latest score under another version than ``score_version``.
+
+        Kept per version by ``save_scores``, so rescoring under a new version does not lose it.
+        """
+        ...
+
+    @abstractmethod
+    def save_failures(self, failures: Iterable[Tuple[int, str, str, str]]) -> int:
+        """Store ``(id, payload_hash, error, score_version)`` of failed scoring attempts.
+
+        Like ``save_scores`` only written while the payload hash matches; repeated
+        failures under the same version count up ``ScoreState.attempts``.
+        """
+        ...
+
+    def import_yaml(self, path: str) -> List[int]:
+        return self.add_many(load_suppliers_yaml(path))
+
+    def export_yaml(self, path: str):
+        dump_suppliers_yaml(self.list(), path)
+
+def _json_safe(value):
+    # Cursors are JSON; an infinite sort value (missing number) is sent as null
+    return None if isinstance(value, float) and math.isinf(value) else value
+
+def _strip_id(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in record.items() if k != "id"}
+
+def _to_plain(obj):
+    if isinstance(obj, dict):
+        return {k: _to_plain(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_to_plain(v) for v in obj]
+    return obj
+
+def load_suppliers_yaml(path: str) -> List[Dict[str, Any]]:
+    """Read supplier rows from a YAML file (a list, or a mapping with a ``suppliers`` key)."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or []
+    rows = data if isinstance(data, list) else data.get("suppliers", []) if isinstance(data, dict) else []
+    return [row for row in rows if isinstance(row, dict)]
+
+def yaml_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    """A record as a plain dict for ``yaml.safe_dump``, without its ID."""
+    return _to_plain(_strip_id(record))
+
+def dump_suppliers_yaml(records: Iterable[Dict[str, Any]], path_or_stream):
+    """Write records in the suppliers_min.yaml layout (IDs are not exported)."""
+    rows = [yaml_row(r) for r in records]
+    if isinstance(path_or_stream, str):
+        with open(path_or_stream, "w", encoding="utf-8") as f:
+            yaml.safe_dump(rows, f, allow_unicode=True, sort_keys=False, default_flow_style=False)
+    else:
+        yaml.safe_dump(rows, path_or_stream, allow_unicode=True, sort_keys=False, default_flow_style=False)
@@ -0,0 +1,369 @@
+"""
+SQLite (WAL mode) implementation of SupplierRepository.
+
+Each supplier is one row with a stable INTEGER id; the full record is kept as
+JSON next to indexed ``supplier``, ``product`` and ``fabricName`` columns.
+Writes run in ``BEGIN IMMEDIATE`` transactions so concurrent gunicorn workers
+serialize instead of overwriting each other.
+
+The last Ecobalyse score is materialized on the row together with a hash of the
+payload-relevant fields; edits that change that hash mark the row dirty. The
+last score under each score version is also kept in ``score_history``. Every
+write also bumps a version counter in the ``meta`` table (used for HTTP ETags).
+"""
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from .repository import (SupplierRepository, SupplierQuery, ScoreState, TEXT_SORT_KEYS, load_suppliers_yaml,
+                         payload_inputs_hash, _json_safe, _strip_id)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DB_PATH = os.environ.get("SUPPLIERS_DB") or os.path.join(PROJECT_ROOT, "data", "examples", "suppliers.sqlite")
+
+class SQLiteSupplierRepository(SupplierRepository):
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection):
+        conn.execute(
+            "INSERT INTO meta(key, value) VALUES ('version', '1')"
+            " ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    def version(self) -> int:
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _init_schema(self):
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS suppliers ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " supplier TEXT,"
+                " product TEXT,"
+                " fabricName TEXT,"
+                " data TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._migrate(conn)
+            conn.execute("CREATE INDEX IF NOT EXISTS suppliers_failed ON suppliers(error_version)"
+                         " WHERE score_error IS NOT NULL")
+            conn.execute("CREATE INDEX IF NOT EXISTS suppliers_supplier ON suppliers(supplier)")
+            conn.execute("CREATE INDEX IF NOT EXISTS suppliers_product ON suppliers(product)")
+            conn.execute("CREATE INDEX IF NOT EXISTS suppliers_fabric_name ON suppliers(fabricName)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS score_history ("
+                " supplier_id INTEGER NOT NULL REFERENCES suppliers(id) ON DELETE CASCADE,"
+                " score_version TEXT NOT NULL,"
+                " ecobalyse_score REAL NOT NULL,"
+                " scored_at REAL,"
+                " PRIMARY KEY (supplier_id, score_version))"
+            )
+            # Scores materialized before the history existed
+            conn.execute(
+                "INSERT OR IGNORE INTO score_history(supplier_id, score_version, ecobalyse_score, scored_at)"
+                " SELECT id, score_version, ecobalyse_score, scored_at FROM suppliers"
+                " WHERE ecobalyse_score IS NOT NULL AND score_version IS NOT NULL"
+            )
+
+    # Columns added after the first release of the store
+    _SCORE_COLUMNS = (
+        ("payload_hash", "TEXT"),
+        ("ecobalyse_score", "REAL"),
+        ("score_version", "TEXT"),
+        ("scored_at", "REAL"),
+        ("dirty", "INTEGER NOT NULL DEFAULT 1"),
+        ("score_error", "TEXT"),
+        ("error_version", "TEXT"),
+        ("attempted_at", "REAL"),
+        ("attempts", "INTEGER NOT NULL DEFAULT 0"),
+    )
+
+    def _migrate(self, conn: sqlite3.Connection):
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(suppliers)")}
+        for name, decl in self._SCORE_COLUMNS:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE suppliers ADD COLUMN {name} {decl}")
+        for supplier_id, data in conn.execute("SELECT id, data FROM suppliers WHERE payload_hash IS NULL").fetchall():
+            conn.execute("UPDATE suppliers SET payload_hash = ? WHERE id = ?", (payload_inputs_hash(json.loads(data)), supplier_id))
+
+    @staticmethod
+    def _columns(record: Dict[str, Any]):
+        data = _strip_id(record)
+        return (
+            data.get("supplier"),
+            data.get("product"),
+            data.get("fabricName"),
+            json.dumps(data, ensure_ascii=False),
+            payload_inputs_hash(data),
+        )
+
+    @staticmethod
+    def _decode(row) -> Dict[str, Any]:
+        # Plain dicts keep key order; an OrderedDict hook made decoding about twice as slow
+        record = {"id": row[0]}
+        record.update(json.loads(row[1]))
+        return record
+
+    @staticmethod
+    def _filters(product: str = None, supplier: str = None, fabric_name: str = None):
+        clauses, params = [], []
+        for column, value in (("product", product), ("supplier", supplier), ("fabricName", fabric_name)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return clauses, params
+
+    @staticmethod
+    def _sort_expression(key: str) -> str:
+        # Must order like repository.sort_value so the default and SQL queries agree
+        if key == "id":
+            return "id"
+        if key in TEXT_SORT_KEYS:
+            return f"COALESCE({key}, '')"
+        if key == "ecobalyse_score":
+            return "COALESCE(ecobalyse_score, 9e999)"
+        return f"COALESCE(CAST(json_extract(data, '$.{key}') AS REAL), 9e999)"
+
+    def query(self, query: SupplierQuery) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        clauses, params = self._filters(query.product, query.supplier, query.fabric_name)
+        for certification in query.certifications:
+            clauses.append("EXISTS (SELECT 1 FROM json_each(suppliers.data, '$.certifications')"
+                           " WHERE lower(trim(value)) = lower(trim(?)))")
+            params.append(certification)
+        if query.material:
+            clauses.append("EXISTS (SELECT 1 FROM json_each(suppliers.data, '$.material_origin')"
+                           " WHERE instr(lower(json_extract(value, '$.id')), lower(?)) > 0)")
+            params.append(query.material)
+        expr = self._sort_expression(query.sort)
+        direction, op = ("DESC", "<") if query.descending else ("ASC", ">")
+        after = query.decode_cursor()
+        if after is not None:
+            value = math.inf if after[0] is None else after[0]
+            if query.sort == "id":
+                clauses.append(f"id {op} ?")
+                params.append(after[1])
+            else:
+                clauses.append(f"({expr} {op} ? OR ({expr} = ? AND id {op} ?))")
+                params.extend([value, value, after[1]])
+        sql = f"SELECT id, data, {expr} FROM suppliers"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {expr} {direction}, id {direction}"
+        if query.limit is not None:
+            sql += " LIMIT ?"
+            params.append(query.limit + 1)  # one extra row tells whether there is a next page
+        rows = self._connect().execute(sql, params).fetchall()
+        if query.limit is None or len(rows) <= query.limit:
+            return [self._decode(row) for row in rows], None
+        rows = rows[:query.limit]
+        return [self._decode(row) for row in rows], query.encode_cursor(_json_safe(rows[-1][2]), rows[-1][0])
+
+    def list(self, product: str = None, supplier: str = None, fabric_name: str = None) -> List[Dict[str, Any]]:
+        clauses, params = self._filters(product, supplier, fabric_name)
+        sql = "SELECT id, data FROM suppliers"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id"
+        return [self._decode(row) for row in self._connect().execute(sql, params)]
+
+    def iter_records(self, product: str = None, supplier: str = None, fabric_name: str = None,
+                     page_size: int = 200, after_id: int = 0) -> Iterator[Dict[str, Any]]:
+        # Keyset pagination: no cursor stays open between pages, so writers are never blocked
+        clauses, params = self._filters(product, supplier, fabric_name)
+        where = "".join(f" AND {c}" for c in clauses)
+        last_id = after_id
+        while True:
+            rows = self._connect().execute(
+                f"SELECT id, data FROM suppliers WHERE id > ?{where} ORDER BY id LIMIT ?",
+                [last_id] + params + [page_size],
+            ).fetchall()
+            for row in rows:
+                yield self._decode(row)
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1][0]
+
+    def get(self, supplier_id: int) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT id, data FROM suppliers WHERE id = ?", (supplier_id,)).fetchone()
+        return self._decode(row) if row else None
+
+    def get_many(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        ids = list(ids)
+        records = []
+        conn = self._connect()
+        for start in range(0, len(ids), 500):  # stay below SQLite's bound-parameter limit
+            chunk = ids[start:start + 500]
+            records.extend(
+                self._decode(row) for row in conn.execute(
+                    f"SELECT id, data FROM suppliers WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                )
+            )
+        records.sort(key=lambda r: r["id"])
+        return records
+
+    def add(self, record: Dict[str, Any]) -> int:
+        return self.add_many([record])[0]
+
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> List[int]:
+        now = time.time()
+        ids = []
+        with self._transaction() as conn:
+            for record in records:
+                cur = conn.execute(
+                    "INSERT INTO suppliers(supplier, product, fabricName, data, payload_hash, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    self._columns(record) + (now, now),
+                )
+                ids.append(cur.lastrowid)
+            if ids:
+                self._bump_version(conn)
+        return ids
+
+    def update(self, supplier_id: int, record: Dict[str, Any]) -> bool:
+        columns = self._columns(record)
+        new_hash = columns[-1]
+        with self._transaction() as conn:
+            # Commercial-only edits keep the payload hash, so the stored score (or failure) stays valid
+            cur = conn.execute(
+                "UPDATE suppliers SET supplier = ?, product = ?, fabricName = ?, data = ?, payload_hash = ?,"
+                " dirty = CASE WHEN payload_hash = ? THEN dirty ELSE 1 END,"
+                " score_error = CASE WHEN payload_hash = ? THEN score_error END,"
+                " attempts = CASE WHEN payload_hash = ? THEN attempts ELSE 0 END, updated_at = ? WHERE id = ?",
+                columns + (new_hash, new_hash, new_hash, time.time(), supplier_id),
+            )
+            if cur.rowcount:
+                self._bump_version(conn)
+            return cur.rowcount > 0
+
+    def delete(self, supplier_id: int) -> bool:
+        with self._transaction() as conn:
+            deleted = conn.execute("DELETE FROM suppliers WHERE id = ?", (supplier_id,)).rowcount > 0
+            if deleted:
+                self._bump_version(conn)
+            return deleted
+
+    def count(self) -> int:
+        (n,) = self._connect().execute("SELECT COUNT(*) FROM suppliers").fetchone()
+        return n
+
+    _STATE_SELECT = ("SELECT id, payload_hash, ecobalyse_score, score_version, dirty, score_error, error_version,"
+                     " attempted_at, attempts FROM suppliers")
+
+    def _states(self, sql: str, params: List[Any]) -> Dict[int, ScoreState]:
+        return {
+            row[0]: ScoreState(payload_hash=row[1], ecobalyse_score=row[2], score_version=row[3], dirty=bool(row[4]),
+                               error=row[5], error_version=row[6], attempted_at=row[7], attempts=row[8])
+            for row in self._connect().execute(sql, params)
+        }
+
+    def score_states(self, ids: Iterable[int] = None) -> Dict[int, ScoreState]:
+        sql = self._STATE_SELECT
+        params: List[Any] = []
+        if ids is not None:
+            params = list(ids)
+            if not params:
+                return {}
+            sql += f" WHERE id IN ({','.join('?' * len(params))})"
+        return self._states(sql, params)
+
+    def failure_states(self, score_version: str) -> Dict[int, ScoreState]:
+        return self._states(self._STATE_SELECT + " WHERE score_error IS NOT NULL AND error_version = ?",
+                            [score_version])
+
+    def save_scores(self, scores: Iterable[Tuple[int, str, float, str]]) -> int:
+        now = time.time()
+        updated = 0
+        with self._transaction() as conn:
+            for supplier_id, payload_hash, ecobalyse_score, score_version in scores:
+                updated += conn.execute(
+                    "UPDATE suppliers SET ecobalyse_score = ?, score_version = ?, scored_at = ?, dirty = 0,"
+                    " score_error = NULL, attempts = 0 WHERE id = ? AND payload_hash = ?",
+                    (ecobalyse_score, score_version, now, supplier_id, payload_hash),
+                ).rowcount
+                conn.execute(
+                    "INSERT OR REPLACE INTO score_history(supplier_id, score_version, ecobalyse_score, scored_at)"
+                    " SELECT id, score_version, ecobalyse_score, scored_at FROM suppliers"
+                    " WHERE id = ? AND payload_hash = ? AND ecobalyse_score IS NOT NULL",
+                    (supplier_id, payload_hash),
+                )
+            if updated:
+                self._bump_version(conn)
+        return updated
+
+    def previous_scores(self, ids: Iterable[int], score_version: str) -> Dict[int, Tuple[str, float]]:
+        ids = list(ids)
+        if not ids:
+            return {}
+        rows = self._connect().execute(
+            "SELECT supplier_id, score_version, ecobalyse_score FROM score_history"
+            f" WHERE supplier_id IN ({','.join('?' * len(ids))}) AND score_version != ?"
+            " ORDER BY scored_at",
+            ids + [score_version],
+        )
+        return {supplier_id: (version, score) for supplier_id, version, score in rows}  # latest wins
+
+    def save_failures(self, failures: Iterable[Tuple[int, str, str, str]]) -> int:
+        now = time.time()
+        updated = 0
+        with self._transaction() as conn:
+            for supplier_id, payload_hash, error, score_version in failures:
+                updated += conn.execute(
+                    "UPDATE suppliers SET score_error = ?,"
+                    " attempts = CASE WHEN error_version = ? AND score_error IS NOT NULL THEN attempts + 1 ELSE 1 END,"
+                    " error_version = ?, attempted_at = ? WHERE id = ? AND payload_hash = ?",
+                    (error, score_version, score_version, now, supplier_id, payload_hash),
+                ).rowcount
+            if updated:
+                self._bump_version(conn)  # pending rows turn into unavailable ones
+        return updated
+
+    def seed_from_yaml(self, path: str) -> int:
+        """Import ``path`` once into a fresh, empty store; safe to call from several workers at once."""
+        rows = load_suppliers_yaml(path)
+        now = time.time()
+        with self._transaction() as conn:
+            seeded = conn.execute("SELECT value FROM meta WHERE key = 'seeded_from'").fetchone()
+            (n,) = conn.execute("SELECT COUNT(*) FROM suppliers").fetchone()
+            if seeded or n or not rows:
+                return 0
+            conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('seeded_from', ?)", (os.path.abspath(path),))
+            conn.executemany(
+                "INSERT INTO suppliers(supplier, product, fabricName, data, payload_hash, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [self._columns(row) + (now, now) for row in rows],
+            )
+            self._bump_version(conn)
+        return len(rows)
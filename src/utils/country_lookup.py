@@ -1,74 +1,119 @@
 """
 Country code lookup utilities for Ecobalyse.
+
+Names are resolved through an index built once from the Ecobalyse countries list:
+keys are casefolded and accent-stripped, so "Chine", "chine" and "CHINE" (or
+"Région - Europe de l'Ouest" typed with a curly apostrophe) are all one dict hit.
+A small alias table adds English and common variant names.
 """
 from typing import Optional, Dict, List
+import re
+import unicodedata
+
+def normalize_country_name(name: str) -> str:
+    """Casefold, strip accents and unify apostrophes/dashes/whitespace."""
+    decomposed = unicodedata.normalize("NFKD", str(name))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    stripped = stripped.replace("’", "'").replace("‘", "'").replace("–", "-").replace("—", "-")
+    return re.sub(r"\s+", " ", stripped).strip().casefold()
+
+# Alternative names -> Ecobalyse (ISO) codes; only used when the code is in the countries list
+_ALIASES = {
+    "FR": ("France", "République française"),
+    "US": ("United States", "United States of America", "USA", "États-Unis", "Etats-Unis"),
+    "DE": ("Germany", "Allemagne"), "ES": ("Spain", "Espagne"), "PT": ("Portugal",), "IT": ("Italy", "Italie"),
+    "NL": ("Netherlands", "Pays-Bas"), "BE": ("Belgium", "Belgique"), "PL": ("Poland", "Pologne"),
+    "CZ": ("Czechia", "Czech Republic", "Tchéquie", "République tchèque"), "AT": ("Austria", "Autriche"),
+    "HU": ("Hungary", "Hongrie"), "SK": ("Slovakia", "Slovaquie"), "SI": ("Slovenia", "Slovénie"),
+    "HR": ("Croatia", "Croatie"), "RO": ("Romania", "Roumanie"), "BG": ("Bulgaria", "Bulgarie"),
+    "GR": ("Greece", "Grèce"), "SE": ("Sweden", "Suède"), "FI": ("Finland", "Finlande"),
+    "DK": ("Denmark", "Danemark"), "IE": ("Ireland", "Irlande"), "EE": ("Estonia", "Estonie"),
+    "LV": ("Latvia", "Lettonie"), "LT": ("Lithuania", "Lituanie"), "LU": ("Luxembourg",), "MT": ("Malta", "Malte"),
+    "CY": ("Cyprus", "Chypre"), "TR": ("Turkey", "Türkiye", "Turquie"), "MA": ("Morocco", "Maroc"),
+    "TN": ("Tunisia", "Tunisie"), "CN": ("China", "Chine"), "IN": ("India", "Inde"),
+    "BD": ("Bangladesh",), "VN": ("Vietnam", "Viet Nam", "Viêt Nam"), "PK": ("Pakistan",),
+    "KH": ("Cambodia", "Cambodge"), "MM": ("Myanmar", "Burma", "Birmanie"),
+}
+
+_EU_CODES = {"FR", "DE", "ES", "PT", "IT", "NL", "BE", "PL", "CZ", "AT", "HU", "SK", "SI", "HR", "RO", "BG",
+             "GR", "SE", "FI", "DK", "IE", "EE", "LV", "LT", "LU", "MT", "CY"}
+_NEAR_EU_CODES = {"TR", "MA", "TN"}
+_MAX_RESOLVED = 10000
+_ALIAS_INDEX = {normalize_country_name(alias): code for code, aliases in _ALIASES.items() for alias in aliases}
+
+class CountryIndex:
+    """Name -> code mapping with exact and normalized keys, built once per countries list."""
 
-_country_cache: Optional[Dict[str, str]] = None
+    def __init__(self, countries_data: List):
+        self.exact: Dict[str, str] = {}
+        for item in countries_data or []:
+            if isinstance(item, dict):
+                name = item.get('name') or item.get('label') or str(item)
+                code = item.get('code') or item.get('id') or str(item)
+                if name and code:
+                    self.exact[name] = code
+            elif isinstance(item, str):
+                # If it's just a code string, use it as both name and code
+                self.exact[item] = item
+        codes = set(self.exact.values())
+        # Aliases first so that names from the API win on conflicts
+        self.normalized: Dict[str, str] = {key: code for key, code in _ALIAS_INDEX.items() if code in codes}
+        for name, code in self.exact.items():
+            self.normalized[normalize_country_name(name)] = code
+        # Spellings already resolved (or found missing), so each is normalized only once
+        self._resolved: Dict[str, Optional[str]] = dict(self.exact)
 
-def _build_country_mapping(countries_data: List) -> Dict[str, str]:
-    """Build a mapping from country name to code from Ecobalyse countries list."""
-    mapping = {}
-    for item in countries_data:
-        if isinstance(item, dict):
-            # If it's a dict with 'name' and 'code' or similar
-            name = item.get('name') or item.get('label') or str(item)
-            code = item.get('code') or item.get('id') or str(item)
-            if name and code:
-                mapping[name] = code
-                # Also map common variations
-                if name.lower() == 'france':
-                    mapping['France'] = 'FR'
-                elif name.lower() == 'united states':
-                    mapping['United States'] = 'US'
-        elif isinstance(item, str):
-            # If it's just a code string, use it as both name and code
-            mapping[item] = item
-    return mapping
+    def lookup(self, country_name: str) -> Optional[str]:
+        try:
+            return self._resolved[country_name]
+        except KeyError:
+            pass
+        code = self.normalized.get(normalize_country_name(country_name))
+        if len(self._resolved) < _MAX_RESOLVED:
+            self._resolved[country_name] = code
+        return code
+
+_country_index: Optional[CountryIndex] = None
+_indexed_data: Optional[List] = None
 
 def get_country_code(country_name: str, countries_data: List = None) -> Optional[str]:
     """
     Translate a country name to its Ecobalyse country code.
     If countries_data is provided, uses it; otherwise tries to load from cache.
     """
-    global _country_cache
-    
     if not country_name:
         return None
-    
+
     # If it's already a 2-3 letter code, return as-is
     if len(country_name) <= 3 and country_name.isupper():
         return country_name
-    
-    # Build mapping if not cached
-    if _country_cache is None and countries_data:
-        _country_cache = _build_country_mapping(countries_data)
-    
-    # Try direct lookup
-    if _country_cache and country_name in _country_cache:
-        return _country_cache[country_name]
-    
-    # Try case-insensitive lookup
-    if _country_cache:
-        for name, code in _country_cache.items():
-            if name.lower() == country_name.lower():
-                return code
-    
+
+    # Build index if not cached
+    if _country_index is None and countries_data:
+        set_country_cache(countries_data)
+
+    if _country_index is not None:
+        code = _country_index.lookup(country_name)
+        if code is not None:
+            return code
+
     # Fallback: return as-is if no mapping found
     return country_name
 
 def set_country_cache(countries_data: List):
-    """Set the country cache from Ecobalyse countries data."""
-    global _country_cache
-    _country_cache = _build_country_mapping(countries_data)
+    """Set the country index from Ecobalyse countries data (no-op for the list already indexed)."""
+    global _country_index, _indexed_data
+    if countries_data is _indexed_data and _country_index is not None:
+        return
+    _country_index = CountryIndex(countries_data)
+    _indexed_data = countries_data
 
-# Placeholder mapping helpers
 def classify_region(country: str) -> str:
     if not country or country.lower() == "unknown":
         return "unknown"
-    eu = {"France","Germany","Spain","Portugal","Italy","Netherlands","Belgium","Poland","Czechia","Austria","Hungary","Slovakia","Slovenia","Croatia","Romania","Bulgaria","Greece","Sweden","Finland","Denmark","Ireland","Estonia","Latvia","Lithuania","Luxembourg","Malta","Cyprus"}
-    near_eu = {"Turkey","Morocco","Tunisia"}
-    if country in eu:
+    code = country if country in _EU_CODES or country in _NEAR_EU_CODES else _ALIAS_INDEX.get(normalize_country_name(country))
+    if code in _EU_CODES:
         return "EU"
-    if country in near_eu:
+    if code in _NEAR_EU_CODES:
         return "near_EU"
     return "rest_of_world"
@@ -1,9 +1,10 @@
 import yaml
 from typing import Any
 import os
+from .metrics import stage
 
 def load_yaml(path: str) -> Any:
     if not os.path.exists(path):
         return None
-    with open(path, "r", encoding="utf-8") as f:
+    with stage("yaml_load"), open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
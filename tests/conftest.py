@@ -0,0 +1,27 @@
+import shutil
+import threading
+import pytest
+from werkzeug.serving import make_server
+from src.api.mock_server import create_mock_app
+from src.scoring.context import ScoringContext
+
+@pytest.fixture
+def mock_ecobalyse(tmp_path):
+    """Local mock simulator plus a config root pointing at it; yields ``(config_root, context)``."""
+    server = make_server("127.0.0.1", 0, create_mock_app(seed=0), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    config_root = tmp_path / "config"
+    config_root.mkdir()
+    for name in ("bourrienne.yaml", "scoring.yaml"):
+        shutil.copy(f"config/{name}", config_root / name)
+    (config_root / "ecobalyse.yaml").write_text(
+        f'base_url: "http://127.0.0.1:{server.server_port}/versions/v7.0.0/api"\n'
+        "timeout_seconds: 5\n"
+        "cache:\n  enabled: false\n"
+        "http:\n  max_retries: 0\n"
+    )
+    try:
+        yield str(config_root), ScoringContext(str(config_root))
+    finally:
+        server.shutdown()
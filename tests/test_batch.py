@@ -0,0 +1,62 @@
+import time
+
+from src.models.supplier import Supplier
+from src.scoring import batch
+
+def _supplier(name):
+    return Supplier(
+        supplier=name, fabricName=None, price_eur_per_m=10.0, lead_time_weeks=6.0, moq_m=100.0,
+        stock_service=False, fibre_origin=None, yarn_origin=None, fabric_origin=None, dye_origin=None,
+        sewing_origin=None, certifications=[], documentation_level="none",
+    )
+
+def test_results_keep_input_order_and_per_row_errors(monkeypatch):
+    delays = {"slow": 0.3, "fast": 0.0, "boom": 0.0, "none": 0.0}
+
+    def fake_final(s, config_root, client=None, context=None):
+        time.sleep(delays[s.supplier])
+        if s.supplier == "boom":
+            raise ValueError("bad row")
+        if s.supplier == "none":
+            return None
+        return (1.0, 2.0)
+
+    monkeypatch.setattr(batch, "final_csr_score", fake_final)
+    names = ["slow", "fast", "boom", "none"]
+    outcomes = batch.score_suppliers([_supplier(n) for n in names], "config", max_in_flight=4, deadline_seconds=5)
+    assert [o.supplier.supplier for o in outcomes] == names
+    assert outcomes[0].result == (1.0, 2.0)
+    assert outcomes[2].error == "bad row"
+    assert outcomes[3].result is None and outcomes[3].error is None
+
+def test_deadline_marks_row_timed_out(monkeypatch):
+    def fake_final(s, config_root, client=None, context=None):
+        time.sleep(2 if s.supplier == "stuck" else 0)
+        return (1.0, 1.0)
+
+    monkeypatch.setattr(batch, "final_csr_score", fake_final)
+    started = time.monotonic()
+    outcomes = batch.score_suppliers([_supplier("stuck"), _supplier("ok")], "config", max_in_flight=2, deadline_seconds=0.3)
+    assert time.monotonic() - started < 1.5
+    assert outcomes[0].timed_out and outcomes[0].result is None
+    assert outcomes[1].result == (1.0, 1.0)
+
+def test_iter_yields_as_completed_and_reads_input_lazily(monkeypatch):
+    def fake_final(s, config_root, client=None, context=None):
+        time.sleep(0.3 if s.supplier == "slow" else 0)
+        return (1.0, 1.0)
+
+    monkeypatch.setattr(batch, "final_csr_score", fake_final)
+    consumed = []
+
+    def suppliers():
+        for name in ["slow", "a", "b", "c"]:
+            consumed.append(name)
+            yield _supplier(name)
+
+    stream = batch.iter_score_suppliers(suppliers(), "config", max_in_flight=2, deadline_seconds=5)
+    first_index, first = next(stream)
+    assert first_index == 1 and first.supplier.supplier == "a"
+    assert len(consumed) <= 3  # never more than max_in_flight rows beyond those yielded
+    rest = sorted(i for i, _ in stream)
+    assert rest == [0, 2, 3]
@@ -0,0 +1,61 @@
+import io
+import pytest
+from src.interface.bulk import bulk_import, detect_format, export_catalog, iter_rows, iter_scored_records
+from src.interface.supplier_entry_ui import PREFERRED_FIELD_ORDER, normalize_supplier
+from src.storage.repository import load_suppliers_yaml
+from src.storage.sqlite_repository import SQLiteSupplierRepository
+
+EXAMPLE_YAML = "data/examples/suppliers_min.yaml"
+COLUMNS = ["id"] + PREFERRED_FIELD_ORDER
+
+@pytest.fixture
+def repo(tmp_path):
+    return SQLiteSupplierRepository(str(tmp_path / "suppliers.sqlite"))
+
+def _import(repo, data: bytes, fmt: str, **kwargs):
+    return bulk_import(repo, iter_rows(io.BytesIO(data), fmt), normalize_supplier, **kwargs)
+
+@pytest.mark.parametrize("fmt", ["csv", "yaml", "xlsx"])
+def test_export_then_import_round_trips(repo, tmp_path, fmt):
+    if fmt == "xlsx":
+        pytest.importorskip("openpyxl")
+    repo.seed_from_yaml(EXAMPLE_YAML)
+    out = io.BytesIO()
+    export_catalog(iter_scored_records(repo, "v"), fmt, COLUMNS, out)
+
+    target = SQLiteSupplierRepository(str(tmp_path / "copy.sqlite"))
+    report = _import(target, out.getvalue(), fmt)
+    assert report.ok and len(report.imported_ids) == 4
+    for original, copy in zip(load_suppliers_yaml(EXAMPLE_YAML), target.list()):
+        assert "ecobalyse_score" not in copy
+        # Empty lists come back as blank cells, i.e. missing fields
+        expected = {k: v for k, v in normalize_supplier(original).items() if v != []}
+        assert {k: copy.get(k) for k in expected} == expected
+
+def test_invalid_rows_are_reported_and_nothing_is_written(repo):
+    sheet = (
+        "supplier;price_eur_per_m;material_1_id;material_1_share;material_2_id;material_2_share;certifications\n"
+        "A;12.5;ei-coton;60;ei-pet;40;GOTS | OEKO-TEX\n"
+        "B;cheap;ei-coton;50;;;\n"
+        ";3;;;;;\n"
+    ).encode()
+    report = _import(repo, sheet, "csv")
+    assert [(e.row, e.supplier) for e in report.errors] == [(3, "B"), (4, None)]
+    assert "price_eur_per_m" in report.errors[0].errors[0]
+    assert "50%" in report.errors[0].errors[1]
+    assert report.valid == 1 and repo.count() == 0
+
+    report = _import(repo, sheet, "csv", partial=True)
+    (record,) = repo.list()
+    assert report.imported_ids == [record["id"]]
+    assert record["certifications"] == ["GOTS", "OEKO-TEX"]
+    assert [m["share"] for m in record["material_origin"]] == [0.6, 0.4]
+
+def test_dry_run_and_format_detection(repo):
+    report = _import(repo, b"- supplier: A\n- supplier: B\n  product: robe\n", "yaml",
+                     products=("chemise",), dry_run=True)
+    assert report.rows == 2 and report.valid == 1 and repo.count() == 0
+    assert detect_format("catalog.XLSX") == "xlsx"
+    assert detect_format(None, "text/csv; charset=utf-8") == "csv"
+    with pytest.raises(ValueError):
+        detect_format("catalog.txt")
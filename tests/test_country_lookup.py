@@ -0,0 +1,34 @@
+from src.utils import country_lookup
+from src.utils.country_lookup import classify_region, get_country_code, set_country_cache
+
+COUNTRIES = [
+    {"code": "CN", "name": "Chine"},
+    {"code": "REO", "name": "Région - Europe de l'Ouest"},
+    {"code": "FR", "name": "France"},
+    {"code": "US", "name": "États-Unis"},
+    {"code": "DE", "name": "Allemagne"},
+]
+
+def test_lookup_ignores_case_accents_and_apostrophes():
+    set_country_cache(COUNTRIES)
+    assert get_country_code("Chine") == "CN"
+    assert get_country_code("CHINE ") == "CN"
+    assert get_country_code("region - europe de l’ouest") == "REO"
+    assert get_country_code("United States") == "US"
+    assert get_country_code("Germany") == "DE"
+    assert get_country_code("India") == "India"  # alias code not in the API list: passthrough
+    assert get_country_code("XYZ") == "XYZ" and get_country_code("") is None
+
+def test_index_is_built_once_per_countries_list():
+    set_country_cache(COUNTRIES)
+    index = country_lookup._country_index
+    set_country_cache(COUNTRIES)
+    assert country_lookup._country_index is index
+    set_country_cache(list(COUNTRIES))
+    assert country_lookup._country_index is not index
+
+def test_classify_region_accepts_names_and_codes():
+    assert classify_region("Germany") == "EU" and classify_region("france") == "EU" and classify_region("PT") == "EU"
+    assert classify_region("Turquie") == "near_EU" and classify_region("Morocco") == "near_EU"
+    assert classify_region("Chine") == "rest_of_world"
+    assert classify_region("unknown") == "unknown"
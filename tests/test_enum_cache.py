@@ -0,0 +1,61 @@
+import time
+from src.api.enum_cache import EnumCache
+from src.api.recordings import Recordings
+
+URL = "http://ecobalyse.test/api"
+
+class Fetcher:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+def test_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "enums.sqlite")
+    fetch = Fetcher(["FR", "CN"])
+    assert EnumCache(path).get("countries", URL, fetch) == ["FR", "CN"]
+    assert EnumCache(path).get("countries", URL, fetch) == ["FR", "CN"]  # another worker
+    assert fetch.calls == 1
+
+def test_stale_list_is_served_while_refreshing(tmp_path):
+    cache = EnumCache(str(tmp_path / "enums.sqlite"), ttl_seconds=1, refresh_ahead_seconds=5)
+    cache.get("countries", URL, Fetcher(["FR"]))
+    fetch = Fetcher(["FR", "PT"])
+    assert cache.get("countries", URL, fetch) == ["FR"]  # within refresh-ahead window: old value, no wait
+    cache.join(5)
+    assert fetch.calls == 1
+    assert cache.get("countries", URL, Fetcher(["FR", "PT"])) == ["FR", "PT"]
+    cache.join(5)
+    assert cache.stats()[0]["failures"] == 0
+
+def test_failed_refresh_keeps_last_good_list_and_retries_soon(tmp_path):
+    cache = EnumCache(str(tmp_path / "enums.sqlite"), ttl_seconds=0, refresh_ahead_seconds=0, failure_ttl_seconds=0.2)
+    cache.get("countries", URL, Fetcher(["FR"]))
+    failing = Fetcher(ConnectionError("down"))
+    assert cache.get("countries", URL, failing) == ["FR"]
+    cache.join(5)
+    assert cache.stats()[0]["failures"] == 1
+    assert cache.get("countries", URL, Fetcher()) == ["FR"]  # negative-cached: no new fetch yet
+    time.sleep(0.25)
+    retry = Fetcher(["FR", "IT"])
+    cache.get("countries", URL, retry)
+    cache.join(5)
+    assert retry.calls == 1
+    assert cache.stats()[0]["failures"] == 0
+
+def test_cold_cache_serves_the_bundled_snapshot(tmp_path):
+    snapshots = Recordings(str(tmp_path / "fixtures"))
+    snapshots.save_reference("materials", [{"id": "ei-coton"}])
+    cache = EnumCache(str(tmp_path / "enums.sqlite"), snapshots=snapshots)
+    assert cache.warm(["materials", "trims"], URL) == 1
+    fetch = Fetcher(None)
+    assert cache.get("materials", URL, fetch) == [{"id": "ei-coton"}]
+    cache.join(5)
+    assert fetch.calls == 1  # refreshed in the background
+    assert cache.get("materials", URL, Fetcher()) == [{"id": "ei-coton"}]
@@ -1,9 +1,12 @@
 from src.models.supplier import Supplier
 from src.scoring.final_score import final_csr_score
+from src.scoring.ecobalyse_score import _build_payload
+from src.api.mock_server import synthetic_ecs
 
 def test_placeholder():
     s = Supplier(
         supplier="Test",
+        fabricName=None,
         price_eur_per_m=10.0,
         lead_time_weeks=6.0,
         moq_m=100.0,
@@ -18,3 +21,35 @@ def test_placeholder():
     )
     # Without a real Ecobalyse score, final returns None
     assert final_csr_score(s, "config") is None
+
+def test_scores_against_local_mock(mock_ecobalyse):
+    s = Supplier(
+        supplier="Test", fabricName="Popeline", price_eur_per_m=10.0, lead_time_weeks=6.0, moq_m=100.0,
+        stock_service=True, fibre_origin=None, yarn_origin=None, fabric_origin=None, dye_origin=None,
+        sewing_origin=None, certifications=["GOTS"], documentation_level="audits_verified",
+        product="chemise", material_origin=[{"id": "ei-coton-organic", "share": 1.0, "country": "RNA"}],
+        countrySpinning="Chine", countryMaking="Région - Europe de l'Ouest", weight_gm2=120.0, gross_width=150.0,
+    )
+    config_root, context = mock_ecobalyse
+    eco, final = final_csr_score(s, config_root, context=context)
+    payload = _build_payload(s, context.assumptions, context.countries_data, context.trims_data)
+    assert payload["countrySpinning"] == "CN" and payload["trims"][0]["id"] == "0e8ea799-9b06-490c-a925-37564746c454"
+    assert eco == synthetic_ecs(payload)
+    assert final == min(eco * 1.15, context.max_score)  # audits_verified transparency weight
+
+def test_payload_templates_are_compiled_once_per_config(mock_ecobalyse):
+    config_root, context = mock_ecobalyse
+    templates = context.payload_templates
+    assert context.payload_templates is templates
+    chemise = templates.for_product("chemise")
+    assert chemise.static["trims"][0]["id"] == "0e8ea799-9b06-490c-a925-37564746c454"
+    # Unknown garment types borrow the default product's template but keep their own name
+    s = Supplier(supplier="Test", fabricName=None, price_eur_per_m=10.0, lead_time_weeks=6.0, moq_m=100.0,
+                 stock_service=True, fibre_origin=None, yarn_origin=None, fabric_origin=None, dye_origin=None,
+                 sewing_origin=None, certifications=[], documentation_level=None, product="kimono")
+    payload = _build_payload(s, context.assumptions, context.countries_data, context.trims_data, templates=templates)
+    assert payload["product"] == "kimono"
+    assert payload == _build_payload(s, context.assumptions, context.countries_data, context.trims_data)
+    context._mtimes = {}  # as if bourrienne.yaml had been edited
+    context.refresh()
+    assert context.payload_templates is not templates
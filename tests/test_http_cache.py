@@ -0,0 +1,111 @@
+import time
+
+import pytest
+from src.interface import supplier_entry_ui as ui
+from src.scoring import incremental
+from src.storage.sqlite_repository import SQLiteSupplierRepository
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, mock_ecobalyse):
+    config_root, _ = mock_ecobalyse
+    repo = SQLiteSupplierRepository(str(tmp_path / "suppliers.sqlite"))
+    repo.seed_from_yaml("data/examples/suppliers_min.yaml")
+    monkeypatch.setattr(ui, "_repository", repo)
+    monkeypatch.setattr(ui, "CONFIG_ROOT", config_root)
+    return ui.app.test_client(), repo
+
+def test_supplier_list_revalidates_until_the_store_changes(client):
+    client, repo = client
+    first = client.get("/api/suppliers/all")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "no-cache"
+
+    again = client.get("/api/suppliers/all", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.headers["ETag"] == etag and not again.data
+    # Different query, different representation
+    assert client.get("/api/suppliers/all?limit=1").headers["ETag"] != etag
+
+    record = repo.list()[0]
+    repo.update(record["id"], dict(record, price_eur_per_m=1.0))
+    changed = client.get("/api/suppliers/all", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+def test_store_version_counts_writes(tmp_path):
+    repo = SQLiteSupplierRepository(str(tmp_path / "suppliers.sqlite"))
+    assert repo.version() == 0
+    supplier_id = repo.add({"supplier": "A"})
+    assert repo.version() == 1
+    assert not repo.update(supplier_id + 1, {"supplier": "missing"})
+    assert repo.save_scores([(supplier_id, "stale-hash", 1.0, "v")]) == 0
+    assert repo.version() == 1  # no-op writes keep cached responses valid
+    repo.delete(supplier_id)
+    assert repo.version() == 2
+
+def test_enums_are_tagged_by_content(client):
+    client, _ = client
+    first = client.get("/api/enums/certifications")
+    assert "max-age" in first.headers["Cache-Control"]
+    again = client.get("/api/enums/certifications", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+
+def test_failed_scores_are_unavailable_not_pending(client, monkeypatch):
+    client, repo = client
+    monkeypatch.setattr(ui, "enqueue_scoring", lambda queue, ids: 7 if ids else None)
+    version = ui.get_scoring_context(ui.CONFIG_ROOT).payload_version
+    states = repo.score_states()
+    repo.save_failures([(i, state.payload_hash, "HTTP 422", version) for i, state in states.items()])
+    scores = client.get("/api/scores")
+    assert "X-Scoring-Job" not in scores.headers
+    assert all(r["error"] == "Ecobalyse score unavailable" and "pending" not in r for r in scores.get_json())
+    radar = client.get("/api/suppliers/for-radar").get_json()
+    assert all(r["pending"] is False and r["score_error"] == "HTTP 422" for r in radar)
+
+def test_admin_routes_are_disabled_without_a_token(client, monkeypatch):
+    client, _ = client
+    monkeypatch.setattr(ui, "ADMIN_TOKEN", None)
+    assert client.delete("/api/admin/cache").status_code == 404
+    assert client.get("/api/admin/ecobalyse").status_code == 404
+    monkeypatch.setattr(ui, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/api/admin/ecobalyse").status_code == 403
+    assert client.get("/api/admin/ecobalyse", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/api/admin/ecobalyse", headers={"X-Admin-Token": "s3cret"}).status_code == 200
+
+def test_projection_and_stream_share_the_listing_filters(client, monkeypatch):
+    client, repo = client
+    monkeypatch.setattr(ui, "enqueue_scoring", lambda queue, ids: 7 if ids else None)
+    version = ui.get_scoring_context(ui.CONFIG_ROOT).payload_version
+    states = repo.score_states()
+    repo.save_failures([(i, state.payload_hash, "HTTP 422", version) for i, state in states.items()])
+    query = "sort=-price_eur_per_m&limit=2&fields=supplier"
+    page = client.get(f"/api/suppliers/for-radar?{query}")
+    assert all(set(r) == {"id", "supplier", "pending", "score_error"} for r in page.get_json())
+
+    stream = client.get(f"/api/suppliers/for-radar/stream?{query}")
+    lines = [ui.json.loads(line) for line in stream.data.decode().splitlines()]
+    assert lines == page.get_json()
+    assert stream.headers["X-Next-Cursor"] == page.headers["X-Next-Cursor"]
+    everything = client.get("/api/suppliers/for-radar/stream?sort=-price_eur_per_m").data.decode().splitlines()
+    assert len(everything) == len(repo.list())
+    assert client.get("/api/suppliers/for-radar/stream?sort=color").status_code == 400
+
+def test_failed_scores_are_retried_once_the_backoff_passes(client, monkeypatch):
+    client, repo = client
+    monkeypatch.setattr(ui, "enqueue_scoring", lambda queue, ids: 7 if ids else None)
+    version = ui.get_scoring_context(ui.CONFIG_ROOT).payload_version
+    states = repo.score_states()
+    repo.save_failures([(i, state.payload_hash, "HTTP 422", version) for i, state in states.items()])
+    first = client.get("/api/suppliers/for-radar")
+    etag = first.headers["ETag"]
+    assert "X-Scoring-Job" not in first.headers
+    assert client.get("/api/suppliers/for-radar", headers={"If-None-Match": etag}).status_code == 304
+
+    later = time.time() + 3600  # past the default 300 s backoff
+    monkeypatch.setattr(incremental.time, "time", lambda: later)
+    retried = client.get("/api/suppliers/for-radar", headers={"If-None-Match": etag})
+    assert retried.status_code == 200 and retried.headers["X-Scoring-Job"] == "7"
+
+def test_rankings_reject_bad_weights(client):
+    client, _ = client
+    for weights in ("price:abc", "price:nan"):
+        response = client.get(f"/api/rankings?weights={weights}")
+        assert response.status_code == 400 and "price" in response.get_json()["error"]
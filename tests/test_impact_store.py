@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.api.mock_server import synthetic_ecs, synthetic_simulation
+from src.scoring.context import ScoringContext
+from src.scoring.ecobalyse_score import ecobalyse_score_for_supplier, impacts_for_records, resolved_payload
+from src.storage.impact_store import ImpactStore, flatten_simulation
+from src.storage.sqlite_repository import SQLiteSupplierRepository
+from src.models.supplier import supplier_from_row
+
+KEY_A, KEY_B, KEY_C = "a" * 64, "b" * 64, "c" * 64
+
+def test_flatten_simulation_columns():
+    columns = flatten_simulation({"impacts": {"ecs": 10.0, "cch": 2.0}, "complementsImpacts": {"microfibers": -1.0},
+                                  "durability": 1.2, "lifeCycle": [{"label": "Confection", "impacts": {"cch": 0.5}}],
+                                  "description": "ignored"})
+    assert columns == {"ecs": 10.0, "cch": 2.0, "complements.microfibers": -1.0, "durability": 1.2,
+                       "lifecycle.Confection.cch": 0.5}
+
+def test_staged_rows_are_compacted_into_memory_mapped_columns(tmp_path):
+    store = ImpactStore(str(tmp_path / "impacts"), compact_threshold=0)
+    store.put(KEY_B, {"impacts": {"ecs": 2.0, "cch": 0.2}})
+    store.put(KEY_A, {"impacts": {"ecs": 1.0}})
+    assert store.get(KEY_B) == {"ecs": 2.0, "cch": 0.2}  # served from staging
+    store.compact()
+    assert store.staged_count() == 0
+    table = store.table()
+    assert isinstance(table.column("ecs"), np.memmap)
+    values = store.lookup([KEY_B, KEY_C, KEY_A], ["ecs", "cch"])
+    np.testing.assert_array_equal(values["ecs"], [2.0, np.nan, 1.0])
+    np.testing.assert_array_equal(values["cch"], [0.2, np.nan, np.nan])
+
+def test_compaction_merges_generations_and_newest_response_wins(tmp_path):
+    store = ImpactStore(str(tmp_path / "impacts"), compact_threshold=2)
+    store.put(KEY_A, {"impacts": {"ecs": 1.0}})
+    store.put(KEY_B, {"impacts": {"ecs": 2.0}})  # reaches the threshold
+    first = store.stats()["generation"]
+    assert first is not None and store.staged_count() == 0
+    store.put(KEY_A, {"impacts": {"ecs": 1.5, "wtu": 3.0}})
+    store.put(KEY_C, {"impacts": {"ecs": 3.0}})
+    stats = store.stats()
+    assert (stats["rows"], stats["columns"], stats["staged"]) == (3, 2, 0)
+    assert store.get(KEY_A) == {"ecs": 1.5, "wtu": 3.0}
+    assert store.get(KEY_B) == {"ecs": 2.0}
+    # Only the live generation and the one before it are kept on disk
+    assert sorted(n for n in os.listdir(store.path) if n.startswith("gen-")) == [first, stats["generation"]]
+
+def test_membership_check_reads_no_columns(tmp_path, monkeypatch):
+    store = ImpactStore(str(tmp_path / "impacts"), compact_threshold=0)
+    store.put(KEY_A, {"impacts": {"ecs": 1.0}})
+    monkeypatch.setattr(store, "lookup", lambda *args: pytest.fail("has() must not read columns"))
+    assert store.has(KEY_A) and not store.has(KEY_B)  # staged
+    store.compact()
+    fresh = ImpactStore(store.path)
+    monkeypatch.setattr(fresh, "lookup", lambda *args: pytest.fail("has() must not read columns"))
+    assert fresh.has(KEY_A) and not fresh.has(KEY_C)  # compacted
+    assert fresh.table()._arrays == {}
+
+def test_scoring_fills_the_store_for_exports(tmp_path, mock_ecobalyse):
+    config_root, _ = mock_ecobalyse
+    eco_path = os.path.join(config_root, "ecobalyse.yaml")
+    with open(eco_path, "a") as f:
+        f.write(f'endpoints:\n  score: "/textile/simulator/detailed"\n'
+                f'impacts:\n  path: "{tmp_path / "impacts"}"\n  compact_threshold: 0\n')
+    context = ScoringContext(config_root)
+    repo = SQLiteSupplierRepository(str(tmp_path / "suppliers.sqlite"))
+    repo.seed_from_yaml("data/examples/suppliers_min.yaml")
+    rows = repo.list()
+    for row in rows[:2]:
+        ecobalyse_score_for_supplier(supplier_from_row(row), config_root, context=context)
+
+    values = impacts_for_records(rows, context, ["ecs", "cch", "lifecycle.Confection.ecs"])
+    for i, row in enumerate(rows[:2]):
+        payload = resolved_payload(supplier_from_row(row), context)[0]
+        expected = synthetic_simulation(payload)
+        assert values["ecs"][i] == synthetic_ecs(payload)
+        assert values["cch"][i] == expected["impacts"]["cch"]
+        assert values["lifecycle.Confection.ecs"][i] == expected["lifeCycle"][4]["impacts"]["ecs"]
+    assert np.isnan(values["ecs"][2:]).all()  # never scored, no simulator call made
@@ -0,0 +1,104 @@
+from src.scoring import incremental
+from src.scoring.batch import BatchOutcome
+from src.scoring.context import ScoringContext
+from src.storage.sqlite_repository import SQLiteSupplierRepository
+
+RECORD = {
+    "supplier": "BORGHI", "fabricName": "EPOQUE", "product": "chemise",
+    "price_eur_per_m": 29.07, "lead_time_weeks": 13.0, "moq_m": 240.0,
+    "material_origin": [{"id": "ei-coton-organic", "share": 1.0, "country": "RNA"}],
+    "countrySpinning": "Chine", "weight_gm2": 129.0, "gross_width": 150.0,
+}
+
+def _setup(tmp_path, monkeypatch):
+    (tmp_path / "scoring.yaml").write_text("transparency_weight:\n  none: 0.5\n")
+    context = ScoringContext(str(tmp_path))
+    repo = SQLiteSupplierRepository(str(tmp_path / "suppliers.sqlite"))
+    calls = []
+
+    def fake_score_suppliers(suppliers, config_root, max_in_flight=None, context=None):
+        calls.extend(s.fabricName for s in suppliers)
+        return [BatchOutcome(supplier=s, result=(4.0, 2.0)) for s in suppliers]
+
+    monkeypatch.setattr(incremental, "score_suppliers", fake_score_suppliers)
+    return context, repo, calls
+
+def test_only_payload_edits_trigger_rescoring(tmp_path, monkeypatch):
+    context, repo, calls = _setup(tmp_path, monkeypatch)
+    supplier_id = repo.add(RECORD)
+
+    first = incremental.score_rows(repo.list(), repo, str(tmp_path), context=context)
+    assert calls == ["EPOQUE"]
+    assert first[0].ecobalyse_score == 4.0 and first[0].final_score == 2.0
+
+    repo.update(supplier_id, dict(RECORD, price_eur_per_m=19.0, moq_m=100.0, lead_time_weeks=4.0))
+    incremental.score_rows(repo.list(), repo, str(tmp_path), context=context)
+    assert calls == ["EPOQUE"]  # commercial-only edit reused the stored score
+
+    repo.update(supplier_id, dict(RECORD, countrySpinning="Inde"))
+    assert repo.score_states()[supplier_id].dirty
+    incremental.score_rows(repo.list(), repo, str(tmp_path), context=context)
+    assert calls == ["EPOQUE", "EPOQUE"]
+    assert not repo.score_states()[supplier_id].dirty
+
+def test_stale_rows_are_reported_without_rescoring(tmp_path, monkeypatch):
+    context, repo, calls = _setup(tmp_path, monkeypatch)
+    repo.add(RECORD)
+    results = incremental.score_rows(repo.list(), repo, str(tmp_path), context=context, rescore=False)
+    assert calls == []
+    assert results[0].stale and results[0].ecobalyse_score is None
+
+def test_iter_yields_stored_scores_before_scoring_stale_rows(tmp_path, monkeypatch):
+    context, repo, calls = _setup(tmp_path, monkeypatch)
+    fresh_id = repo.add(RECORD)
+    incremental.score_rows(repo.list(), repo, str(tmp_path), context=context)
+    stale_id = repo.add(dict(RECORD, fabricName="NEW"))
+
+    def fake_iter(suppliers, config_root, context=None):
+        for i, s in enumerate(suppliers):
+            calls.append(s.fabricName)
+            yield i, BatchOutcome(supplier=s, result=(3.0, 1.5))
+
+    monkeypatch.setattr(incremental, "iter_score_suppliers", fake_iter)
+    stream = incremental.iter_score_rows(repo.iter_records(page_size=1), repo, str(tmp_path), context=context)
+    first = next(stream)
+    assert first.row["id"] == fresh_id and first.ecobalyse_score == 4.0
+    assert calls == ["EPOQUE"]  # the stale row has not been scored yet
+    second = next(stream)
+    assert second.row["id"] == stale_id and second.ecobalyse_score == 3.0 and not second.stale
+    assert list(stream) == []
+    assert repo.score_states()[stale_id].is_current(context.payload_version)
+
+def test_failed_attempts_are_stored_and_backed_off(tmp_path, monkeypatch):
+    context, repo, calls = _setup(tmp_path, monkeypatch)
+    supplier_id = repo.add(RECORD)
+
+    def failing_iter(suppliers, config_root, context=None):
+        for i, s in enumerate(suppliers):
+            calls.append(s.fabricName)
+            yield i, BatchOutcome(supplier=s, result=None)
+
+    monkeypatch.setattr(incremental, "iter_score_suppliers", failing_iter)
+    [item] = incremental.iter_score_rows(repo.list(), repo, str(tmp_path), context=context)
+    assert item.failure == "Ecobalyse score unavailable" and not item.pending
+    state = repo.score_states()[supplier_id]
+    assert state.failure(context.payload_version) and state.attempts == 1
+
+    # Within the backoff: reported as unavailable, neither pending nor sent again
+    [item] = incremental.score_rows(repo.list(), repo, str(tmp_path), context=context, rescore=False)
+    assert item.stale and not item.pending and item.failure
+    list(incremental.iter_score_rows(repo.list(), repo, str(tmp_path), context=context))
+    assert calls == ["EPOQUE"]
+
+    # Once it has passed the row is due again, and each failure doubles the wait
+    monkeypatch.setattr(incremental.time, "time", lambda: state.attempted_at + 301)
+    assert incremental.score_rows(repo.list(), repo, str(tmp_path), context=context, rescore=False)[0].pending
+    list(incremental.iter_score_rows(repo.list(), repo, str(tmp_path), context=context))
+    state = repo.score_states()[supplier_id]
+    assert calls == ["EPOQUE", "EPOQUE"] and state.attempts == 2
+    assert state.retry_at(300, 86400) == state.attempted_at + 600
+
+    # A payload edit forgets the failure
+    repo.update(supplier_id, dict(RECORD, countrySpinning="Inde"))
+    state = repo.score_states()[supplier_id]
+    assert state.failure(context.payload_version) is None and state.attempts == 0
@@ -0,0 +1,75 @@
+import time
+from src.jobs import worker
+from src.jobs.queue import JobQueue
+
+def test_enqueue_dedupes_active_jobs_and_claims_in_order(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    first = worker.enqueue_scoring(queue, [3, 1, 2])
+    assert worker.enqueue_scoring(queue, [1, 2, 3]) == first
+    second = worker.enqueue_scoring(queue, [4])
+
+    job = queue.claim("w1")
+    assert job["id"] == first and job["status"] == "running"
+    assert job["payload"] == {"ids": [1, 2, 3]} and job["total"] == 3
+    assert queue.claim("w2")["id"] == second
+    assert queue.claim("w3") is None
+
+    queue.finish(first, {"scored": 3, "failed": 0})
+    done = queue.get(first)
+    assert done["status"] == "done" and done["progress"] == 3
+    assert worker.enqueue_scoring(queue, [1, 2, 3]) != first  # finished jobs are not reused
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), lease_seconds=0.05)
+    job_id = queue.enqueue("score_suppliers", {"ids": [1]})
+    assert queue.claim("w1")["id"] == job_id
+    time.sleep(0.1)
+    job = queue.claim("w2")
+    assert job["id"] == job_id and job["attempts"] == 2 and job["worker"] == "w2"
+
+def test_worker_runs_handler_and_records_failures(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+
+    def ok(job, queue, repository, config_root):
+        queue.update_progress(job["id"], 1, 2)
+        return {"ids": job["payload"]["ids"]}
+
+    def boom(job, queue, repository, config_root):
+        raise RuntimeError("simulator down")
+
+    monkeypatch.setitem(worker.HANDLERS, "ok", ok)
+    monkeypatch.setitem(worker.HANDLERS, "boom", boom)
+    good = queue.enqueue("ok", {"ids": [1, 2]}, total=2)
+    bad = queue.enqueue("boom", {})
+
+    job_worker = worker.JobWorker(queue, repository=None, config_root=str(tmp_path))
+    assert job_worker.run_once() and job_worker.run_once()
+    assert not job_worker.run_once()
+
+    assert queue.get(good)["status"] == "done" and queue.get(good)["result"] == {"ids": [1, 2]}
+    assert queue.get(bad)["status"] == "failed" and queue.get(bad)["error"] == "simulator down"
+
+def test_job_is_failed_after_max_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), lease_seconds=0.05, max_attempts=2)
+    job_id = queue.enqueue("score_suppliers", {"ids": [1]})
+    assert queue.claim("w1")["id"] == job_id
+    time.sleep(0.1)
+    assert queue.claim("w2")["attempts"] == 2
+    time.sleep(0.1)
+    assert queue.claim("w3") is None
+    job = queue.get(job_id)
+    assert job["status"] == "failed" and "2 attempts" in job["error"]
+
+def test_writes_of_a_worker_that_lost_its_lease_are_ignored(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), lease_seconds=0.05)
+    job_id = queue.enqueue("score_suppliers", {"ids": [1, 2]}, total=2)
+    queue.claim("w1")
+    time.sleep(0.1)
+    queue.claim("w2")
+    assert not queue.update_progress(job_id, 1, worker="w1")
+    assert not queue.finish(job_id, {"scored": 0}, worker="w1")
+    assert not queue.fail(job_id, "stale", worker="w1")
+    assert queue.get(job_id)["status"] == "running"
+    assert queue.finish(job_id, {"scored": 2}, worker="w2")
+    job = queue.get(job_id)
+    assert job["status"] == "done" and job["result"] == {"scored": 2}
@@ -0,0 +1,49 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.metrics import Counter, Histogram, Registry, RequestTimings, current_timings, stage
+
+def test_counter_and_histogram_render_prometheus_text(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr("src.utils.metrics.REGISTRY", registry)
+    requests = Counter("test_requests_total", "Requests.", ["result"])
+    latency = Histogram("test_latency_seconds", "Latency.", ["stage"], buckets=(0.1, 1.0))
+    requests.inc(result="hit")
+    requests.inc(2, result="miss")
+    latency.observe(0.05, stage="a")
+    latency.observe(0.5, stage="a")
+    latency.observe(5.0, stage="a")
+
+    text = registry.render()
+    assert "# TYPE test_requests_total counter" in text
+    assert 'test_requests_total{result="miss"} 2.0' in text
+    assert 'test_latency_seconds_bucket{stage="a",le="0.1"} 1.0' in text
+    assert 'test_latency_seconds_bucket{stage="a",le="1.0"} 2.0' in text
+    assert 'test_latency_seconds_bucket{stage="a",le="+Inf"} 3.0' in text
+    assert 'test_latency_seconds_count{stage="a"} 3.0' in text
+    assert latency.count(stage="a") == 3
+
+def _simulate_call():
+    with stage("simulator"):
+        pass
+
+def test_stage_timings_follow_the_request_into_worker_threads():
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    try:
+        with stage("store_read"):
+            pass
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, _simulate_call)
+                       for _ in range(2)]
+            for future in futures:
+                future.result()
+    finally:
+        current_timings.reset(token)
+
+    with stage("outside"):
+        pass
+    header = timings.header()
+    assert header.startswith("total=")
+    assert "store_read=" in header
+    assert "simulator=" in header and "ms(2)" in header
+    assert "outside" not in header
@@ -0,0 +1,53 @@
+from src.api import ecobalyse_client
+from src.api.ecobalyse_client import EcobalyseClient, configure_recording
+from src.api.mock_server import create_mock_app, synthetic_ecs
+from src.api.recordings import Recordings, RecordingMissError
+
+PAYLOAD = {"mass": 0.2, "product": "chemise", "materials": [{"id": "ei-coton", "share": 1.0}]}
+
+def test_mock_serves_fixtures_and_synthetic_scores(tmp_path):
+    recordings = Recordings(str(tmp_path))
+    recordings.save_reference("countries", [{"code": "CN", "name": "Chine"}])
+    recordings.record_simulator({"mass": 1.0}, {"impacts": {"ecs": 42.0}})
+    client = create_mock_app(Recordings(str(tmp_path))).test_client()
+
+    assert client.get("/versions/v7.0.0/api/textile/countries").get_json() == [{"code": "CN", "name": "Chine"}]
+    assert client.get("/api/textile/trims").status_code == 404
+    assert client.post("/api/textile/simulator", json={"mass": 1.0}).get_json() == {"impacts": {"ecs": 42.0}}
+    synthetic = client.post("/api/textile/simulator", json=PAYLOAD).get_json()
+    assert synthetic["impacts"]["ecs"] == synthetic_ecs(PAYLOAD) == synthetic_ecs(dict(PAYLOAD))
+    assert client.get("/__mock/stats").get_json()["synthetic"] == 1
+
+def test_error_injection(tmp_path):
+    client = create_mock_app(Recordings(str(tmp_path)), error_rate=1.0, error_status=429, retry_after=2).test_client()
+    resp = client.post("/api/textile/simulator", json=PAYLOAD)
+    assert resp.status_code == 429 and resp.headers["Retry-After"] == "2"
+
+def test_record_then_replay_without_network(tmp_path, monkeypatch):
+    class LiveSession:
+        calls = 0
+
+        def request(self, method, url, **kwargs):
+            LiveSession.calls += 1
+            return ecobalyse_client._replayed_response({"impacts": {"ecs": 7.5}})
+
+    monkeypatch.setenv("ECOBALYSE_RECORDINGS_PATH", str(tmp_path))
+    try:
+        monkeypatch.setenv("ECOBALYSE_RECORDING", "record")
+        configure_recording({}, str(tmp_path))
+        assert EcobalyseClient("http://eco.test/api", session=LiveSession()).get_score(PAYLOAD) == 7.5
+
+        monkeypatch.setenv("ECOBALYSE_RECORDING", "replay")
+        configure_recording({}, str(tmp_path))
+        replaying = EcobalyseClient("http://eco.test/api", session=LiveSession())
+        assert replaying.get_score(PAYLOAD) == 7.5
+        assert replaying.get_score(dict(PAYLOAD, mass=0.3)) is None  # never recorded
+        assert LiveSession.calls == 1
+        try:
+            replaying._request("GET", "/textile/countries")
+            assert False, "expected RecordingMissError"
+        except RecordingMissError:
+            pass
+    finally:
+        monkeypatch.delenv("ECOBALYSE_RECORDING")
+        configure_recording({}, str(tmp_path))
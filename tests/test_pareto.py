@@ -0,0 +1,69 @@
+import numpy as np
+
+from src.interface import supplier_entry_ui as ui
+from src.storage.repository import load_suppliers_yaml
+from src.storage.sqlite_repository import SQLiteSupplierRepository
+from src.scoring.pareto import criteria_matrix, dominance_layers, pareto_by_product, pareto_group
+
+def _peeled_layers(matrix):
+    """Reference layers by repeatedly removing the non-dominated rows (all pairs)."""
+    dominates = ((matrix[:, None, :] >= matrix[None, :, :]).all(axis=2)
+                 & (matrix[:, None, :] > matrix[None, :, :]).any(axis=2))
+    layers = np.zeros(len(matrix), dtype=int)
+    remaining = np.ones(len(matrix), dtype=bool)
+    layer = 0
+    while remaining.any():
+        layer += 1
+        rows = np.nonzero(remaining)[0]
+        front = rows[~dominates[np.ix_(rows, rows)].any(axis=0)]
+        layers[front] = layer
+        remaining[front] = False
+    return layers
+
+def test_layers_match_all_pairs_peeling():
+    rng = np.random.default_rng(0)
+    for n, levels in ((1, 3), (700, 4), (1200, 40)):
+        matrix = rng.integers(0, levels, (n, 6)).astype(float)
+        matrix[: n // 10] = matrix[n // 10: 2 * (n // 10)]  # identical rows share a layer
+        expected = _peeled_layers(matrix)
+        assert (dominance_layers(matrix) == expected).all()
+        assert (dominance_layers(matrix, max_layers=2) == np.where(expected > 2, 0, expected)).all()
+    continuous = rng.random((900, 6))  # ranks too wide for a single packed word
+    assert (dominance_layers(continuous) == _peeled_layers(continuous)).all()
+
+def test_missing_values_rank_last():
+    records = [
+        {"id": 1, "ecobalyse_score": 1000.0, "price_eur_per_m": 10.0, "lead_time_weeks": 4.0, "moq_m": 100.0},
+        {"id": 2, "ecobalyse_score": None, "price_eur_per_m": 10.0, "lead_time_weeks": 4.0, "moq_m": 100.0},
+    ]
+    assert criteria_matrix(records)[1, 0] == -np.inf
+    layers = pareto_group(records)
+    assert [[entry["id"] for entry in layer] for layer in layers] == [[1], [2]]
+
+def test_example_catalog_front():
+    records = load_suppliers_yaml("data/examples/suppliers_min.yaml")
+    for i, (record, eco) in enumerate(zip(records, [1200.0, 1500.0, 1100.0, 3000.0]), start=1):
+        record["id"], record["ecobalyse_score"] = i, eco
+    groups = pareto_by_product(records)
+    for product, layers in groups.items():
+        group = [r for r in records if (r.get("product") or "") == product]
+        matrix = criteria_matrix(group)
+        front = {entry["id"] for entry in layers[0]}
+        for i, record in enumerate(group):
+            dominated = any((other >= matrix[i]).all() and (other > matrix[i]).any() for other in matrix)
+            assert (record["id"] not in front) == dominated
+        assert sum(len(layer) for layer in layers) == len(group)
+    assert set(pareto_by_product(records, product="none")) == {"none"}
+
+def test_pareto_endpoint(tmp_path, monkeypatch, mock_ecobalyse):
+    config_root, _ = mock_ecobalyse
+    repo = SQLiteSupplierRepository(str(tmp_path / "suppliers.sqlite"))
+    repo.seed_from_yaml("data/examples/suppliers_min.yaml")
+    monkeypatch.setattr(ui, "_repository", repo)
+    monkeypatch.setattr(ui, "CONFIG_ROOT", config_root)
+    client = ui.app.test_client()
+    assert client.get("/api/pareto?layers=0").status_code == 400
+    body = client.get("/api/pareto?product=chemise&layers=1").get_json()
+    assert body["axes"][0] == "ecobalyse" and [g["product"] for g in body["groups"]] == ["chemise"]
+    layers = body["groups"][0]["layers"]
+    assert len(layers) == 1 and all(entry["layer"] == 1 for entry in layers[0])
@@ -0,0 +1,44 @@
+import pytest
+from src.storage.repository import load_suppliers_yaml
+from src.scoring.rankings import material_category, parse_weights, radar_scores, rank_by_category, rank_group
+
+EXAMPLE_YAML = "data/examples/suppliers_min.yaml"
+
+def _example_records():
+    records = load_suppliers_yaml(EXAMPLE_YAML)
+    for record, eco in zip(records, [1200.0, 1500.0, None, 3000.0]):
+        record["ecobalyse_score"] = eco
+    return records
+
+def test_axes_match_radar_scoring_js():
+    # Expected values produced by calculateRadarScores() in static/js/radar-scoring.js
+    axes = radar_scores(_example_records())
+    assert axes["ecobalyse"].tolist() == [5.0, 3.56, 5.0, 1.46]
+    assert axes["ecobalyseDiffPercent"].tolist() == [0.0, 25.0, 0.0, 150.0]
+    assert axes["price"].tolist() == [1.94, 3.69, 5.0, 3.51]
+    assert axes["priceDiffPercent"].tolist() == [112.19, 20.66, 0.0, 26.64]
+    assert axes["traceability"].tolist() == [9.0, 9.0, 9.0, 7.4]
+    assert axes["certificationsScore"].tolist() == [1.0, 0.0, 1.0, 3.0]
+
+def test_single_supplier_sits_at_centre():
+    axes = radar_scores(_example_records()[:1])
+    assert axes["ecobalyse"].tolist() == [5.0] and axes["moq"].tolist() == [5.0]
+
+def test_weighted_ranking_is_stable_and_grouped():
+    weights = parse_weights("ecobalyse:50,price:50,unknown:10")
+    ranked = rank_group(_example_records(), weights)
+    # Expected order and scores produced by getRecommendedSuppliers() in weighted-scoring.js
+    assert [(r["fabricName"], r["weightedScore"]) for r in ranked] == [
+        ("THOR BIO RECYCLE GOTS GRS", 5.0),
+        ("Art CR ISPIRATO fin 800", 3.63),
+        ("Art CR EPOQUE GOTS", 3.47),
+        ("ECO BYRON KENT PD BIOFUSION (OCS, GOTS, OEKO TEX)", 2.49),
+    ]
+    groups = rank_by_category(_example_records(), weights)
+    assert set(groups) == {material_category(r) for r in _example_records()}
+
+def test_parse_weights_rejects_non_numeric_and_non_finite_values():
+    for raw in ("price:abc", "price:nan", "price:inf", "price:-10"):
+        with pytest.raises(ValueError, match="price"):
+            parse_weights(raw)
+    assert parse_weights({"moq": "10"})["moq"] == 10.0
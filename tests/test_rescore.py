@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from src.scoring.context import ScoringContext
+from src.scoring.rescore import RescoreLedger, RescoreRun, diff_report, rescore_catalog
+from src.scoring.incremental import score_rows
+from src.storage.sqlite_repository import SQLiteSupplierRepository
+
+class Interrupted(Exception):
+    pass
+
+def test_interrupted_run_resumes_and_keeps_previous_version(tmp_path, mock_ecobalyse):
+    config_root, context = mock_ecobalyse
+    repo = SQLiteSupplierRepository(str(tmp_path / "suppliers.sqlite"))
+    repo.seed_from_yaml("data/examples/suppliers_min.yaml")
+    ids = [row["id"] for row in repo.list()]
+    ledger = RescoreLedger(str(tmp_path / "rescore.sqlite"))
+    first = rescore_catalog(repo, config_root, ledger, context=context, page_size=2)
+    assert first.finished_at is not None and first.checkpoint_id == ids[-1]
+
+    # Move to another Ecobalyse version and stop after the first page
+    eco_path = f"{config_root}/ecobalyse.yaml"
+    with open(eco_path) as f:
+        text = f.read()
+    with open(eco_path, "w") as f:
+        f.write(text.replace("/versions/v7.0.0/", "/versions/v8.0.0/"))
+    context = ScoringContext(config_root)
+    assert context.payload_version.startswith("v8.0.0:")
+
+    def stop(run):
+        raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        rescore_catalog(repo, config_root, ledger, context=context, page_size=2, progress=stop)
+    partial = ledger.run(context.payload_version)
+    assert partial.checkpoint_id == ids[1] and partial.finished_at is None
+
+    pages = []
+    run = rescore_catalog(repo, config_root, ledger, context=context, page_size=2,
+                          progress=lambda run: pages.append(run.checkpoint_id))
+    assert run.finished_at is not None and pages[0] == ids[3]
+    history = ledger.history(context.payload_version)
+    assert [row["id"] for row in history] == ids
+    assert all(row["previous_version"] == first.score_version for row in history)
+    assert all(state.is_current(context.payload_version) for state in repo.score_states().values())
+
+def test_diff_report_lists_rank_changes_per_product(tmp_path):
+    ledger = RescoreLedger(str(tmp_path / "rescore.sqlite"))
+    run = ledger.start("v8")
+    now = time.time()
+    entries = [
+        # id, version, new, final, previous version, previous, supplier, fabric, product, recorded
+        (1, "v8", 300.0, None, "v7", 100.0, "A", "a", "chemise", now),
+        (2, "v8", 200.0, None, "v7", 200.0, "B", "b", "chemise", now),
+        (3, "v8", 50.0, None, "v7", 80.0, "C", "c", "pull", now),
+        (4, "v8", None, None, "v7", 90.0, "D", "d", "chemise", now),  # failed: left out
+    ]
+    ledger.record_page(run, entries, 4, 3, 1)
+    changed = diff_report(ledger, "v8")
+    assert [(r["id"], r["previous_rank"], r["rank"]) for r in changed] == [(2, 2, 1), (1, 1, 2)]
+    assert changed[1]["delta_percent"] == 200.0
+
+def test_previous_score_survives_background_rescoring_and_failures_are_retried(tmp_path, monkeypatch, mock_ecobalyse):
+    config_root, context = mock_ecobalyse
+    repo = SQLiteSupplierRepository(str(tmp_path / "suppliers.sqlite"))
+    repo.seed_from_yaml("data/examples/suppliers_min.yaml")
+    ids = [row["id"] for row in repo.list()]
+    ledger = RescoreLedger(str(tmp_path / "rescore.sqlite"))
+    score_rows(repo.list(), repo, config_root, context=context)
+    old_version = context.payload_version
+
+    eco_path = f"{config_root}/ecobalyse.yaml"
+    with open(eco_path) as f:
+        text = f.read()
+    with open(eco_path, "w") as f:
+        f.write(text.replace("/versions/v7.0.0/", "/versions/v8.0.0/"))
+    context = ScoringContext(config_root)
+    # A dashboard read rescores part of the catalog before the migration runs
+    score_rows(repo.get_many(ids[:2]), repo, config_root, context=context)
+
+    failing = {ids[3]}
+
+    def flaky_score_rows(rows, *args, **kwargs):
+        results = score_rows(rows, *args, **kwargs)
+        for item in results:
+            if item.row["id"] in failing:
+                item.ecobalyse_score = None
+        return results
+
+    monkeypatch.setattr("src.scoring.rescore.score_rows", flaky_score_rows)
+    run = rescore_catalog(repo, config_root, ledger, context=context, page_size=2)
+    assert run.failed == 1 and run.finished_at is None  # retried at the end, still failing
+    assert all(row["previous_version"] == old_version for row in ledger.history(context.payload_version))
+
+    failing.clear()
+    run = rescore_catalog(repo, config_root, ledger, context=context, page_size=2)
+    assert run.failed == 0 and run.scored == len(ids) and run.finished_at is not None
+    assert [row["ecobalyse_score"] is not None for row in ledger.history(context.payload_version)] == [True] * len(ids)
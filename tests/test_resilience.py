@@ -0,0 +1,96 @@
+import requests
+from src.api import resilience
+from src.api.ecobalyse_client import EcobalyseClient
+from src.api.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+class FakeResponse:
+    def __init__(self, status, body=None, headers=None):
+        self.status_code = status
+        self._body = body or {}
+        self.headers = headers or {}
+        self.content = b""
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code), response=self)
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        item = self.responses.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+def _client(responses, breaker=None, max_retries=3):
+    retry = RetryPolicy(max_retries=max_retries, backoff_base_seconds=0, backoff_max_seconds=1)
+    return EcobalyseClient("http://eco.test/api", session=FakeSession(responses), retry=retry,
+                           breaker=breaker or CircuitBreaker(failure_threshold=2, reset_timeout_seconds=60))
+
+def test_retries_transient_errors_then_succeeds(monkeypatch):
+    monkeypatch.setattr("src.api.ecobalyse_client.time.sleep", lambda s: None)
+    client = _client([FakeResponse(503), requests.ConnectionError("reset"), FakeResponse(200, {"impacts": {"ecs": 12.5}})])
+    assert client.get_score({}) == 12.5
+    assert client.session.calls == 3
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+def test_client_errors_are_not_retried():
+    client = _client([FakeResponse(400)])
+    assert client.get_score({}) is None
+    assert client.session.calls == 1
+    assert client.breaker.snapshot()["consecutive_failures"] == 0
+
+def test_breaker_opens_and_fails_fast(monkeypatch):
+    monkeypatch.setattr("src.api.ecobalyse_client.time.sleep", lambda s: None)
+    client = _client([FakeResponse(500)] * 2, max_retries=0)
+    assert client.get_score({}) is None and client.get_score({}) is None
+    assert client.breaker.state == CircuitBreaker.OPEN
+    try:
+        client._request("POST", "/textile/simulator")
+        assert False, "expected CircuitOpenError"
+    except CircuitOpenError:
+        pass
+    assert client.session.calls == 2
+    assert client.breaker.snapshot()["short_circuited"] == 1
+
+def test_half_open_lets_one_trial_through(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: clock[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=30)
+    breaker.record_failure()
+    assert not breaker.allow()
+    clock[0] += 30
+    assert breaker.allow() and not breaker.allow()  # single trial while half-open
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_retry_after_is_honoured_and_capped():
+    policy = RetryPolicy(max_retries=2, backoff_base_seconds=1, backoff_max_seconds=5)
+    assert policy.delay(0, "3") == 3.0
+    assert policy.delay(0, "60") is None  # longer than we are willing to wait
+    assert 0 <= policy.delay(1) <= 2
+    assert policy.delay(2) is None
+
+def test_rate_limit_timeout_releases_half_open_trial(monkeypatch):
+    from src.api.rate_limit import RateLimiter
+    monkeypatch.setattr("src.api.ecobalyse_client.time.sleep", lambda s: None)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=0)
+    client = _client([FakeResponse(500), FakeResponse(200, {"impacts": {"ecs": 3.0}})], breaker=breaker, max_retries=0)
+    assert client.get_score({}) is None
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    limiter = RateLimiter(requests_per_second=0.001, burst=1, max_wait_seconds=0.1)
+    with limiter.acquire():
+        pass  # bucket now empty
+    client.rate_limiter = limiter
+    assert client.get_score({}) is None  # timed out waiting for a token
+    assert breaker.state == CircuitBreaker.HALF_OPEN and client.session.calls == 1
+    client.rate_limiter = None
+    assert client.get_score({}) == 3.0  # the trial is available again
+    assert breaker.state == CircuitBreaker.CLOSED
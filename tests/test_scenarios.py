@@ -0,0 +1,63 @@
+import pytest
+
+from src.models.supplier import Supplier
+from src.api.mock_server import synthetic_ecs
+from src.scoring.ecobalyse_score import resolved_payload
+from src.scoring.scenarios import apply_overrides, expand_grid, run_scenarios
+
+def _supplier():
+    return Supplier(
+        supplier="Test", fabricName="Popeline", price_eur_per_m=10.0, lead_time_weeks=6.0, moq_m=100.0,
+        stock_service=True, fibre_origin=None, yarn_origin=None, fabric_origin=None, dye_origin=None,
+        sewing_origin=None, certifications=[], documentation_level="none", product="chemise",
+        material_origin=[{"id": "ei-coton", "share": 1.0, "spinning": "ConventionalSpinning", "country": "Chine"}],
+        countryMaking="Chine", dyeingProcess="continuous",
+    )
+
+def test_expand_grid_validates_fields_and_size():
+    assert len(expand_grid({"countryMaking": ["Portugal", "Chine"], "dyeingProcess": "continuous"})) == 2
+    with pytest.raises(ValueError, match="Unknown scenario field"):
+        expand_grid({"price": [1, 2]})
+    with pytest.raises(ValueError, match="at most 3"):
+        expand_grid({"countryMaking": ["a", "b"], "countryFabric": ["c", "d"]}, max_variants=3)
+
+def test_share_map_keeps_known_material_details():
+    variant = apply_overrides(_supplier(), {"material_origin": {"ei-coton": 0.7, "ei-lin": 0.3}})
+    assert variant.material_origin[0] == {"id": "ei-coton", "share": 0.7, "spinning": "ConventionalSpinning",
+                                          "country": "Chine"}
+    assert variant.material_origin[1] == {"id": "ei-lin", "share": 0.3}
+
+def test_identical_payloads_are_scored_once_and_sorted(mock_ecobalyse):
+    config_root, context = mock_ecobalyse
+    supplier = _supplier()
+    # "Chine" and "continuous" reproduce the stored supplier
+    results = run_scenarios(supplier, {"countryMaking": ["Portugal", "Chine"], "dyeingProcess": ["continuous"]},
+                            config_root, context=context)
+    assert len(results) == 2
+    baseline = next(r for r in results if r.overrides == {})
+    assert baseline.duplicates == [{"countryMaking": "Chine", "dyeingProcess": "continuous"}]
+    assert baseline.ecobalyse_score == synthetic_ecs(resolved_payload(supplier, context)[0])
+    scores = [r.ecobalyse_score for r in results]
+    assert scores == sorted(scores)
+    other = next(r for r in results if r.overrides)
+    assert other.delta_percent == round((other.ecobalyse_score - baseline.ecobalyse_score)
+                                        / baseline.ecobalyse_score * 100, 2)
+
+def test_scenarios_endpoint(tmp_path, monkeypatch, mock_ecobalyse):
+    from src.interface import supplier_entry_ui as ui
+    from src.storage.sqlite_repository import SQLiteSupplierRepository
+    config_root, _ = mock_ecobalyse
+    repo = SQLiteSupplierRepository(str(tmp_path / "suppliers.sqlite"))
+    repo.seed_from_yaml("data/examples/suppliers_min.yaml")
+    monkeypatch.setattr(ui, "_repository", repo)
+    monkeypatch.setattr(ui, "CONFIG_ROOT", config_root)
+    client = ui.app.test_client()
+    supplier_id = repo.list()[0]["id"]
+
+    response = client.post("/api/scenarios", json={"supplier_id": supplier_id,
+                                                   "overrides": {"countryMaking": ["Portugal", "Inde"]}})
+    assert response.status_code == 200
+    scenarios = response.get_json()["scenarios"]
+    assert {} in [s["overrides"] for s in scenarios] and all(s["ecobalyse_score"] for s in scenarios)
+    assert client.post("/api/scenarios", json={"supplier_id": supplier_id, "overrides": {"moq_m": [1]}}).status_code == 400
+    assert client.post("/api/scenarios", json={"supplier_id": 10 ** 6}).status_code == 404
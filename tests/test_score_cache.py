@@ -0,0 +1,36 @@
+import time
+
+from src.api.score_cache import ScoreCache, api_version_from_url, payload_fingerprint
+
+def test_fingerprint_is_order_independent_and_versioned():
+    a = {"mass": 0.1, "materials": [{"id": "ei-coton", "share": 1.0}], "product": "chemise"}
+    b = {"product": "chemise", "materials": [{"share": 1.0, "id": "ei-coton"}], "mass": 0.1}
+    assert payload_fingerprint(a, "v7.0.0") == payload_fingerprint(b, "v7.0.0")
+    assert payload_fingerprint(a, "v7.0.0") != payload_fingerprint(a, "v8.0.0")
+    assert api_version_from_url("https://ecobalyse.beta.gouv.fr/versions/v7.0.0/api") == "v7.0.0"
+
+def test_hits_misses_ttl_and_lru(tmp_path):
+    cache = ScoreCache(str(tmp_path / "scores.sqlite"), ttl_seconds=3600, max_entries=2)
+    assert cache.get("a") is None
+    cache.set("a", 1.5, "v7.0.0")
+    cache.set("b", 2.5, "v7.0.0")
+    assert cache.get("a") == 1.5  # "a" is now the most recently used
+    cache.set("c", 3.5, "v7.0.0")  # evicts "b"
+    assert cache.get("b") is None
+    assert cache.get("c") == 3.5
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 2 and stats["misses"] == 2
+    assert stats["evictions"] == 1
+
+    expired = ScoreCache(str(tmp_path / "scores.sqlite"), ttl_seconds=1)
+    expired._connect().execute("UPDATE scores SET created_at = ?", (time.time() - 10,))
+    assert expired.get("a") is None
+
+def test_invalidate(tmp_path):
+    cache = ScoreCache(str(tmp_path / "scores.sqlite"))
+    cache.set("a", 1.0, "v7.0.0")
+    cache.set("b", 2.0, "v8.0.0")
+    assert cache.invalidate(api_version="v7.0.0") == 1
+    assert cache.invalidate(key="b") == 1
+    assert cache.stats()["entries"] == 0
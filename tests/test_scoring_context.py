@@ -0,0 +1,21 @@
+import os
+
+from src.scoring.context import ScoringContext
+
+def test_configs_reload_only_when_mtime_changes(tmp_path):
+    scoring = tmp_path / "scoring.yaml"
+    scoring.write_text("caps:\n  final_csr_score: 10.0\n")
+    (tmp_path / "bourrienne.yaml").write_text("products: {}\n")
+    ctx = ScoringContext(str(tmp_path))
+    assert ctx.max_score == 10.0
+    version = ctx.version
+
+    ctx.refresh()
+    assert ctx.version == version
+
+    scoring.write_text("caps:\n  final_csr_score: 8.0\n")
+    stat = scoring.stat()
+    os.utime(scoring, (stat.st_atime, stat.st_mtime + 5))
+    ctx.refresh()
+    assert ctx.max_score == 8.0
+    assert ctx.version != version
@@ -0,0 +1,77 @@
+import threading
+import time
+
+from src.api.ecobalyse_client import EcobalyseClient
+from src.api.single_flight import SingleFlight, SINGLE_FLIGHT_CALLS
+
+def _run_concurrently(fn, count):
+    results = [None] * count
+    start = threading.Barrier(count)
+
+    def worker(i):
+        start.wait()
+        results[i] = fn()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    return results
+
+def test_identical_calls_share_one_request(mock_ecobalyse):
+    _, context = mock_ecobalyse
+    calls = []
+    client = context.make_client()
+    original = client._fetch_simulation
+
+    def slow_fetch(payload):
+        calls.append(payload)
+        time.sleep(0.2)
+        return original(payload)
+
+    client._fetch_simulation = slow_fetch
+    coalesced = SINGLE_FLIGHT_CALLS.value(result="coalesced")
+    payload = {"mass": 0.2, "product": "chemise", "materials": [{"id": "ei-coton", "share": 1.0}]}
+    results = _run_concurrently(lambda: client.get_score(payload), 6)
+    assert len(calls) == 1 and len(set(results)) == 1 and results[0] is not None
+    assert SINGLE_FLIGHT_CALLS.value(result="coalesced") - coalesced == 5
+    # Once finished, the next call goes upstream again (caching is the score cache's job)
+    client.get_score(payload)
+    assert len(calls) == 2
+
+def test_workers_wait_on_each_others_lease(tmp_path):
+    path = str(tmp_path / "inflight.sqlite")
+    workers = [SingleFlight(path, poll_interval_seconds=0.01) for _ in range(3)]  # one per gunicorn worker
+    calls = []
+
+    def upstream():
+        calls.append(1)
+        time.sleep(0.2)
+        return 42.0
+
+    counter = iter(range(3))
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            worker = workers[next(counter)]
+        return worker.do("key", upstream)
+
+    assert _run_concurrently(call, 3) == [42.0, 42.0, 42.0]
+    assert len(calls) == 1
+
+def test_expired_lease_is_taken_over(tmp_path):
+    path = str(tmp_path / "inflight.sqlite")
+    crashed = SingleFlight(path, lease_seconds=0.1)
+    assert crashed._claim("key", "dead-worker", time.time())  # never finishes
+    survivor = SingleFlight(path, lease_seconds=0.1, poll_interval_seconds=0.01)
+    started = time.monotonic()
+    assert survivor.do("key", lambda: 7.0) == 7.0
+    assert time.monotonic() - started < 1.0
+
+def test_client_without_single_flight_calls_directly(monkeypatch):
+    client = EcobalyseClient("http://127.0.0.1:9/api")
+    client.single_flight = None
+    monkeypatch.setattr(client, "_fetch_simulation", lambda payload: {"impacts": {"ecs": 1.5}})
+    assert client.get_score({"mass": 1}) == 1.5
@@ -0,0 +1,72 @@
+import pytest
+from src.storage.repository import SupplierQuery, SupplierRepository, load_suppliers_yaml
+from src.storage.sqlite_repository import SQLiteSupplierRepository
+
+EXAMPLE_YAML = "data/examples/suppliers_min.yaml"
+
+def test_crud_keeps_stable_ids(tmp_path):
+    repo = SQLiteSupplierRepository(str(tmp_path / "suppliers.sqlite"))
+    first = repo.add({"supplier": "A", "product": "chemise", "fabricName": "one"})
+    second = repo.add({"supplier": "B", "product": "pull", "fabricName": "two"})
+    assert repo.delete(first)
+    assert repo.get(second)["supplier"] == "B"  # ids do not shift like list indexes
+    assert repo.update(second, {"supplier": "B", "product": "robe", "fabricName": "two"})
+    assert [r["id"] for r in repo.list(product="robe")] == [second]
+    assert not repo.update(first, {"supplier": "gone"})
+
+def test_yaml_round_trip_and_seed_once(tmp_path):
+    repo = SQLiteSupplierRepository(str(tmp_path / "suppliers.sqlite"))
+    rows = load_suppliers_yaml(EXAMPLE_YAML)
+    assert repo.seed_from_yaml(EXAMPLE_YAML) == len(rows)
+    assert repo.seed_from_yaml(EXAMPLE_YAML) == 0
+
+    out = tmp_path / "export.yaml"
+    repo.export_yaml(str(out))
+    exported = load_suppliers_yaml(str(out))
+    assert exported == rows
+    assert list(exported[0].keys()) == list(rows[0].keys())
+
+    for record in repo.list():
+        repo.delete(record["id"])
+    assert repo.seed_from_yaml(EXAMPLE_YAML) == 0  # an emptied store is not re-seeded
+
+def _page_through(repo, query_args, query_fn):
+    ids, cursor = [], None
+    while True:
+        page, cursor = query_fn(repo, SupplierQuery(cursor=cursor, **query_args))
+        ids.extend(r["id"] for r in page)
+        if cursor is None:
+            return ids
+
+def test_query_filters_sorts_and_pages_like_the_in_memory_default(tmp_path):
+    repo = SQLiteSupplierRepository(str(tmp_path / "suppliers.sqlite"))
+    repo.seed_from_yaml(EXAMPLE_YAML)
+    repo.add({"supplier": "Z", "product": "chemise", "certifications": ["gots "],
+              "material_origin": [{"id": "ei-coton", "share": 1.0}]})  # no price: sorts last
+    for query_args in (
+        {"limit": 2},
+        {"sort": "price_eur_per_m", "limit": 3},
+        {"sort": "price_eur_per_m", "descending": True, "limit": 1},  # cursor past a missing price
+        {"sort": "supplier", "descending": True, "limit": 1},
+        {"product": "chemise", "certifications": ("GOTS",), "sort": "price_eur_per_m", "limit": 2},
+        {"material": "COTON"},
+    ):
+        expected = _page_through(repo, query_args, SupplierRepository.query)
+        assert _page_through(repo, query_args, SQLiteSupplierRepository.query) == expected
+        assert len(set(expected)) == len(expected)
+
+    page, cursor = repo.query(SupplierQuery(sort="price_eur_per_m", limit=1000))
+    assert cursor is None and page[-1]["supplier"] == "Z"
+    certified, _ = repo.query(SupplierQuery(certifications=("GOTS",)))
+    assert certified and all("GOTS" in [c.strip().upper() for c in r["certifications"]] for r in certified)
+
+def test_query_rejects_bad_sort_and_foreign_cursor(tmp_path):
+    repo = SQLiteSupplierRepository(str(tmp_path / "suppliers.sqlite"))
+    repo.seed_from_yaml(EXAMPLE_YAML)
+    with pytest.raises(ValueError):
+        SupplierQuery(sort="data")
+    _, cursor = repo.query(SupplierQuery(sort="supplier", limit=1))
+    with pytest.raises(ValueError):
+        repo.query(SupplierQuery(sort="price_eur_per_m", cursor=cursor))
+    with pytest.raises(ValueError):
+        repo.query(SupplierQuery(cursor="not-a-cursor"))
@@ -0,0 +1,28 @@
+import dataclasses
+import math
+import pytest
+from src.models.supplier import Supplier, SupplierColumns
+from src.storage.repository import load_suppliers_yaml
+
+ROWS = load_suppliers_yaml("data/examples/suppliers_min.yaml")
+
+def test_from_row_fills_every_field_by_name():
+    row = dict(ROWS[0], stock_service=True, fibre_origin="FR", documentation_level="audits_verified")
+    supplier = Supplier.from_row(row)
+    for field in dataclasses.fields(Supplier):
+        expected = row.get(field.name)
+        if field.name == "documentation_level" or expected is not None:
+            assert getattr(supplier, field.name) == expected, field.name
+    assert not hasattr(supplier, "__dict__")
+
+def test_from_row_names_the_bad_field():
+    with pytest.raises(ValueError, match="moq_m"):
+        Supplier.from_row(dict(ROWS[0], moq_m="lots"))
+
+def test_columns_are_aligned_and_nan_for_missing_values():
+    records = [dict(ROWS[0], id=7, ecobalyse_score=812.5), {"id": 8, "price_eur_per_m": "n/a"}]
+    columns = SupplierColumns.from_records(records)
+    assert len(columns) == 2 and columns.ids == [7, 8]
+    assert columns["price_eur_per_m"][0] == ROWS[0]["price_eur_per_m"]
+    assert columns["ecobalyse_score"][0] == 812.5
+    assert math.isnan(columns["price_eur_per_m"][1]) and math.isnan(columns["moq_m"][1])